@@ -8,6 +8,15 @@ Public API
 """
 __version__ = "1.6.1"
 
-from .api import PrecheckResult, precheck, precheck_source
 
-__all__ = ["precheck", "precheck_source", "PrecheckResult", "__version__"]
+def __getattr__(name):
+    # The public API is imported on first use, so `from src import
+    # __version__` (the CLI's --version, the model cache key) stays cheap.
+    if name in ("precheck", "precheck_matrix", "precheck_source", "PrecheckResult"):
+        from . import api
+
+        return getattr(api, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+__all__ = ["precheck", "precheck_matrix", "precheck_source", "PrecheckResult", "__version__"]
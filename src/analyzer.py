@@ -1,3 +1,9 @@
+import threading
+from functools import lru_cache
+from types import MappingProxyType
+
+from .lexer import KEY_CACHE_SIZE, identifier_key
+from .model_store import StoreSection
 from .parser import (  # noqa: F401
     DoNode,
     EraseNode,
@@ -10,6 +16,10 @@ from .parser import (  # noqa: F401
     WithNode,
 )
 
+# Every `SymbolTable.resolve` / `define` goes through
+# `_normalize_identifier`, so each spelling is stripped and lower-cased
+# once rather than once per lookup; LRU-bounded like `identifier_key`.
+@lru_cache(maxsize=KEY_CACHE_SIZE)
 def _normalize_identifier(name):
     """Strip VBA legacy type-suffix and bracket-quoting from an identifier.
 
@@ -28,7 +38,7 @@ def _normalize_identifier(name):
     # operators / preprocessor / date markers and never lex into IDENTIFIER).
     if n and n[-1] in '$%@':
         n = n[:-1]
-    return n.lower()
+    return identifier_key(n)
 
 
 class SymbolTable:
@@ -36,65 +46,182 @@ class SymbolTable:
         self.name = name
         self.parent = parent
         self.scope_type = scope_type
-        self.symbols = {} # name -> {type: ..., kind: Var/Proc/Class, extra: ...}
+        self.symbols = {} # name -> {type: ..., kind: Var/Proc/Class, extra: ..., source: model layer or None}
+        self.usage = None # model_prune.ModelUsage notified of model-symbol hits
 
-    def define(self, name, type_name, kind, extra=None):
-        self.symbols[_normalize_identifier(name)] = {"type": type_name, "kind": kind, "extra": extra}
+    def define(self, name, type_name, kind, extra=None, source=None):
+        self.symbols[_normalize_identifier(name)] = {"type": type_name, "kind": kind, "extra": extra, "source": source}
 
     def resolve(self, name):
         key = _normalize_identifier(name)
-        if key in self.symbols:
-            return self.symbols[key]
-        if self.parent:
-            return self.parent.resolve(name)
+        scope = self
+        usage = None
+        while scope is not None:
+            if scope.usage is not None:
+                usage = scope.usage
+            sym = scope.symbols.get(key)
+            if sym is not None:
+                if usage is not None and sym["source"] is not None:
+                    usage.note_symbol(key, sym)
+                return sym
+            scope = scope.parent
         return None
 
+
+def _global_symbol(defn, source):
+    # Use 'returns' as type if available, otherwise 'type'
+    type_name = defn.get("returns", defn.get("type", "Variant"))
+    return {"type": type_name, "kind": defn.get("type", "Global"), "extra": defn, "source": source}
+
+
+class _LazySymbols(dict):
+    """Model symbols whose store-backed globals are still references —
+    `(store section, key, layer name)` — decoded into a symbol the first
+    time they are looked up. Globals have the lowest lookup priority, so
+    a pending one only answers keys nothing else in the scope defines."""
+
+    __slots__ = ("_pending",)
+
+    def __init__(self, pending):
+        super().__init__()
+        self._pending = pending
+
+    def __missing__(self, key):
+        ref = self._pending.get(key)
+        if ref is None:
+            raise KeyError(key)
+        section, name, source = ref
+        return self.setdefault(key, _global_symbol(section[name], source))
+
+    def get(self, key, default=None):
+        sym = dict.get(self, key)
+        if sym is None:
+            if key not in self._pending:
+                return default
+            sym = self.__missing__(key)
+        return sym
+
+    def __contains__(self, key):
+        return dict.__contains__(self, key) or key in self._pending
+
+
+class ModelScope(SymbolTable):
+    """Frozen scope holding every object-model symbol (globals, classes,
+    references, enums and their members) of one layer stack.
+
+    Building it walks the whole model — ~10k symbols for Excel — so it
+    is built once per `LayeredModel.fingerprint` (see `model_scope()`)
+    and shared by every `Analyzer` over that stack. Each analyser puts
+    its own `Global` scope on top for project symbols; never `define`
+    into this one. Globals of `.vbm` layers are only indexed here and
+    enum members come from the store's name table, so building the
+    scope decodes none of a store's records.
+    """
+
+    def __init__(self, model):
+        super().__init__("Model", scope_type='Global')
+        pending = {}
+        symbols = _LazySymbols(pending)
+        reference_names = set()
+
+        # Model symbols record the layer that supplied them (`source`)
+        # so a hit can be traced back to std_model / host / custom model.
+        # Later definitions win, so the order below is the lookup
+        # priority: enum members > enums > references > classes > globals.
+        for name, layer in model["globals"].keys_with_layer():
+            key = _normalize_identifier(name)
+            if isinstance(layer.globals, StoreSection):
+                symbols.pop(key, None)
+                pending[key] = (layer.globals, name, layer.name)
+            else:
+                pending.pop(key, None)
+                symbols[key] = _global_symbol(layer.globals[name], layer.name)
+
+        # Classes are types
+        for name, source in model["classes"].keys_with_source():
+            symbols[_normalize_identifier(name)] = {"type": name, "kind": "Class", "extra": None, "source": source}
+
+        # References are global symbols (treated as objects/libraries)
+        if "references" in model:
+            for ref in model["references"]:
+                name = ref["name"]
+                reference_names.add(name.lower())
+                symbols[_normalize_identifier(name)] = {
+                    "type": name, "kind": "Library", "extra": None, "source": model.source("references", name),
+                }
+
+        model_enums = model["enums"]
+        for enum_name, source in model_enums.keys_with_source():
+            symbols[_normalize_identifier(enum_name)] = {"type": enum_name, "kind": "Enum", "extra": None, "source": source}
+            # Every member of one enum shares a single (read-only) entry.
+            item = {"type": "Long", "kind": "EnumItem", "extra": None, "source": source}
+            for member_name in model_enums.member_names(enum_name):
+                symbols[_normalize_identifier(member_name)] = item
+
+        self.symbols = MappingProxyType(symbols if pending else dict(symbols))
+        self.reference_names = frozenset(reference_names)
+        self.fingerprint = model.fingerprint
+
+
+# LayeredModel.fingerprint -> ModelScope, oldest first.
+_MODEL_SCOPES = {}
+_MODEL_SCOPES_MAX = 8
+_MODEL_SCOPES_LOCK = threading.Lock()
+
+
+def model_scope(model):
+    """Return the shared `ModelScope` for `model` (a `LayeredModel`),
+    building it on first use for that layer stack."""
+    fingerprint = model.fingerprint
+    scope = _MODEL_SCOPES.get(fingerprint)
+    if scope is None:
+        with _MODEL_SCOPES_LOCK:
+            scope = _MODEL_SCOPES.get(fingerprint)
+            if scope is None:
+                scope = ModelScope(model)
+                while len(_MODEL_SCOPES) >= _MODEL_SCOPES_MAX:
+                    del _MODEL_SCOPES[next(iter(_MODEL_SCOPES))]
+                _MODEL_SCOPES[fingerprint] = scope
+    return scope
+
+
 class Analyzer:
     def __init__(self, config):
         self.config = config
         self.modules = []
-        self.global_scope = SymbolTable("Global", scope_type='Global')
+        self.model_scope = model_scope(self.config.object_model)
+        # Project symbols (pass 1) go here, on top of the shared model scope.
+        self.global_scope = SymbolTable("Global", parent=self.model_scope, scope_type='Global')
         self.errors = []
         self.udts = {} # name_lower -> TypeNode
-        self.reference_names = set()
+        self.module_issues = {} # module node -> the issues pass 2 found in it
+        self.reference_names = self.model_scope.reference_names
         self._current_labels = None
         self._current_proc_name = None
         self._current_def_type_map = {}
-        
-        # Load Standard/Config Globals into Global Scope
-        for name, defn in self.config.object_model.get("globals", {}).items():
-            # Use 'returns' as type if available, otherwise 'type'
-            type_name = defn.get("returns", defn.get("type", "Variant"))
-            kind = defn.get("type", "Global")
-            self.global_scope.define(name, type_name, kind, extra=defn)
-            
-        # Load Classes into Global Scope (as Types)
-        for name in self.config.object_model.get("classes", {}).keys():
-            self.global_scope.define(name, name, "Class")
-
-        # Load References as Global Symbols (Treat as Objects/Libraries)
-        if "references" in self.config.object_model:
-            for ref in self.config.object_model["references"]:
-                 self.reference_names.add(ref["name"].lower())
-                 self.global_scope.define(ref["name"], ref["name"], "Library")
-
-        # Load Enums into Global Scope
-        for enum_name, members in self.config.object_model.get("enums", {}).items():
-            self.global_scope.define(enum_name, enum_name, "Enum") # Type = Enum Name
-            for member_name, val in members.items():
-                self.global_scope.define(member_name, "Long", "EnumItem")
-            for member_name, val in members.items():
-                self.global_scope.define(member_name, "Long", "EnumItem")
+
+    def record_model_usage(self, usage):
+        """Record every model symbol this analysis resolves into `usage`
+        (a `model_prune.ModelUsage`), for `vbalidator model prune`."""
+        self.global_scope.usage = usage
+        self.config.object_model.record_usage(usage)
 
     def add_module(self, module_node):
         self.modules.append(module_node)
 
-    def analyze(self):
+    def analyze(self, reuse=None):
+        """Run both passes and return every issue found.
+
+        `reuse` maps module nodes to the issues an earlier pass 2 found
+        for them in a project with the same surface (see
+        `api.precheck_matrix`); those modules are not walked again. The
+        issues pass 2 finds per module are left in `module_issues`.
+        """
         # Pass 1: Populate Symbol Tables
         self.pass1_discovery()
         
         # Pass 2: Verify References
-        self.pass2_resolution()
+        self.pass2_resolution(reuse)
         
         return self.errors
 
@@ -135,7 +262,8 @@ class Analyzer:
                          self.global_scope.define(type_name, type_name, 'Type')
                          self.udts[type_name.lower()] = udt
 
-    def pass2_resolution(self):
+    def pass2_resolution(self, reuse=None):
+        self.module_issues = {}
         for mod in self.modules:
             mod_scope = SymbolTable(mod.name, parent=self.global_scope, scope_type=mod.module_type)
 
@@ -157,6 +285,11 @@ class Analyzer:
             if mod.module_type in ('Form', 'Class'):
                  mod_scope.define('Me', mod.name, 'Variable')
 
+            if reuse is not None and mod in reuse:
+                self.errors.extend(reuse[mod])
+                continue
+            start = len(self.errors)
+
             # Phase 2.3 — Property Get/Let/Set arity & type compatibility
             self._validate_property_arity(mod)
 
@@ -175,6 +308,8 @@ class Analyzer:
             for proc in mod.procedures:
                 self.analyze_procedure(proc, mod_scope, mod)
 
+            self.module_issues[mod] = self.errors[start:]
+
     def _validate_option_explicit(self, mod):
         """Modules without `Option Explicit` allow implicit (auto-Variant)
         variable creation, which is the #1 source of typo-induced bugs in
@@ -249,7 +384,7 @@ class Analyzer:
         """
         if not tokens or len(tokens) < 2:
             return
-        if tokens[0].type != 'IDENTIFIER' or tokens[0].value.lower() != 'raiseevent':
+        if tokens[0].type != 'IDENTIFIER' or tokens[0].key != 'raiseevent':
             return
         name_tok = tokens[1]
         if name_tok.type != 'IDENTIFIER':
@@ -262,7 +397,7 @@ class Analyzer:
             if mod.filename != filename:
                 continue
             for proc in mod.procedures:
-                if (proc.proc_type or '').lower() == 'event' and proc.name.lower() == name_tok.value.lower():
+                if (proc.proc_type or '').lower() == 'event' and proc.name.lower() == name_tok.key:
                     event = proc
                     break
             break
@@ -519,14 +654,14 @@ class Analyzer:
 
         i = 0
         n = len(tokens)
-        first = tokens[0].value.lower() if tokens[0].type == 'IDENTIFIER' else None
+        first = tokens[0].key if tokens[0].type == 'IDENTIFIER' else None
 
         # `On Error GoTo <target>` / `On Error Resume Next`
-        if first == 'on' and n >= 2 and tokens[1].type == 'IDENTIFIER' and tokens[1].value.lower() == 'error':
+        if first == 'on' and n >= 2 and tokens[1].type == 'IDENTIFIER' and tokens[1].key == 'error':
             i = 2
             if i >= n:
                 return
-            kw = tokens[i].value.lower() if tokens[i].type == 'IDENTIFIER' else ''
+            kw = tokens[i].key if tokens[i].type == 'IDENTIFIER' else ''
             if kw == 'resume':
                 # `On Error Resume Next` — no target to validate
                 return
@@ -552,7 +687,7 @@ class Analyzer:
         if first == 'on':
             j = self._find_on_jump_keyword(tokens)
             if j is not None:
-                kind = "On GoTo" if tokens[j].value.lower() == 'goto' else "On GoSub"
+                kind = "On GoTo" if tokens[j].key == 'goto' else "On GoSub"
                 for tok in self._iter_label_list(tokens[j + 1:]):
                     self._check_label_exists(tok, filename, context, kind)
                 return
@@ -571,7 +706,7 @@ class Analyzer:
                 return  # bare `Resume`
             tok = tokens[1]
             if tok.type == 'IDENTIFIER':
-                if tok.value.lower() == 'next':
+                if tok.key == 'next':
                     return
                 self._check_label_exists(tok, filename, context, "Resume")
             return
@@ -582,7 +717,7 @@ class Analyzer:
             return
 
     def _check_label_exists(self, token, filename, context, kind):
-        name = token.value.lower()
+        name = token.key
         if name not in self._current_labels:
             self.errors.append({
                 "file": filename,
@@ -605,7 +740,7 @@ class Analyzer:
         keyword we're looking for is the bare `GoTo` or `GoSub`
         (NOT `On Error GoTo`, handled separately).
         """
-        if not tokens or tokens[0].type != 'IDENTIFIER' or tokens[0].value.lower() != 'on':
+        if not tokens or tokens[0].type != 'IDENTIFIER' or tokens[0].key != 'on':
             return None
         depth = 0
         for idx in range(1, len(tokens)):
@@ -617,7 +752,7 @@ class Analyzer:
                     depth -= 1
                 continue
             if depth == 0 and t.type == 'IDENTIFIER':
-                lv = t.value.lower()
+                lv = t.key
                 if lv in ('goto', 'gosub'):
                     return idx
                 if lv == 'error':
@@ -688,10 +823,10 @@ class Analyzer:
         has_let = False
         start = 0
         first = toks[0]
-        if first.type == 'IDENTIFIER' and first.value.lower() == 'set':
+        if first.type == 'IDENTIFIER' and first.key == 'set':
             has_set = True
             start = 1
-        elif first.type == 'IDENTIFIER' and first.value.lower() == 'let':
+        elif first.type == 'IDENTIFIER' and first.key == 'let':
             has_let = True
             start = 1
 
@@ -731,7 +866,7 @@ class Analyzer:
         first = lhs_tokens[0]
         if first.type != 'IDENTIFIER':
             return None, None
-        sym = scope.resolve(first.value)
+        sym = scope.resolve(first.key)
         if not sym:
             return None, None
         type_name = sym.get("type")
@@ -827,7 +962,7 @@ class Analyzer:
         for node in nodes:
             if isinstance(node, StatementNode):
                 if self.is_label(node.tokens):
-                    out.add(node.tokens[0].value.lower())
+                    out.add(node.tokens[0].key)
             elif isinstance(node, IfNode):
                 self._collect_labels(node.true_block, out)
                 for _cond, blk in node.else_blocks:
@@ -884,9 +1019,9 @@ class Analyzer:
                 self._validate_raise_event(node.tokens, scope, filename, context)
 
                 # Check for Dim
-                if node.tokens and node.tokens[0].value.lower() in ('dim', 'static', 'const'):
+                if node.tokens and node.tokens[0].key in ('dim', 'static', 'const'):
                      self.process_dim(node.tokens, scope, filename, context, with_stack)
-                elif node.tokens and node.tokens[0].value.lower() == 'raiseevent':
+                elif node.tokens and node.tokens[0].key == 'raiseevent':
                      # Suppress regular identifier resolution on the event name
                      # — events are only visible to their declaring class and
                      # _validate_raise_event has already vetted them.
@@ -895,9 +1030,9 @@ class Analyzer:
                      self.analyze_statement(node.tokens, scope, filename, context, with_stack)
 
                 # Check for Exit Mismatch
-                if node.tokens and node.tokens[0].value.lower() == 'exit':
+                if node.tokens and node.tokens[0].key == 'exit':
                     if len(node.tokens) > 1:
-                        exit_kind = node.tokens[1].value.lower()
+                        exit_kind = node.tokens[1].key
                         if exit_kind in ('sub', 'function', 'property'):
                             # Verify against context
                             # Resolve context in parent scope
@@ -933,7 +1068,7 @@ class Analyzer:
                          # Check if on same line
                          if prev_node.tokens and node.tokens and prev_node.tokens[0].line == node.tokens[0].line:
                              # Check if prev starts with If
-                             if prev_node.tokens[0].value.lower() == 'if':
+                             if prev_node.tokens[0].key == 'if':
                                  is_conditional_jump = True
 
                     if not is_conditional_jump:
@@ -1185,7 +1320,7 @@ class Analyzer:
         for i, tok in enumerate(tokens):
             if tok.type == 'OPERATOR' and tok.value in self._ARITH_OPS:
                 self._check_arith_at(tokens, i, tok.value, filename, context)
-            elif tok.type == 'IDENTIFIER' and tok.value.lower() in self._ARITH_KEYWORDS:
+            elif tok.type == 'IDENTIFIER' and tok.key in self._ARITH_KEYWORDS:
                 self._check_arith_at(tokens, i, tok.value, filename, context)
 
     def _check_arith_at(self, tokens, idx, op_text, filename, context):
@@ -1198,7 +1333,7 @@ class Analyzer:
         if op_text == '-':
             if lhs.type == 'OPERATOR' and lhs.value in {'(', ',', '=', '<', '>', '+', '-', '*', '/', '\\', '^', '<>', '<=', '>='}:
                 return
-            if lhs.type == 'IDENTIFIER' and lhs.value.lower() in {
+            if lhs.type == 'IDENTIFIER' and lhs.key in {
                 'and', 'or', 'not', 'xor', 'eqv', 'imp', 'mod', 'like',
                 'is', 'then', 'to', 'step', 'in', 'else',
             }:
@@ -1269,7 +1404,7 @@ class Analyzer:
         while i < n:
             tok = expr_tokens[i]
             if tok.type == 'IDENTIFIER':
-                low = tok.value.lower().rstrip('$')
+                low = tok.key.rstrip('$')
                 # Reserved keywords that are valid in const expressions
                 if low in self._CONST_KEYWORDS or low in self._CONST_KEYWORD_OPS:
                     i += 1
@@ -1281,7 +1416,7 @@ class Analyzer:
                     and expr_tokens[i + 1].type == 'OPERATOR'
                     and expr_tokens[i + 1].value == '('
                 )
-                sym = scope.resolve(tok.value)
+                sym = scope.resolve(tok.key)
                 if next_is_call:
                     self.errors.append({
                         "file": filename,
@@ -1324,7 +1459,7 @@ class Analyzer:
 
     def process_dim(self, tokens, scope, filename, context, with_stack):
         # Simplified Dim parser
-        is_const = bool(tokens) and tokens[0].value.lower() == 'const'
+        is_const = bool(tokens) and tokens[0].key == 'const'
         symbol_kind = 'Const' if is_const else 'Variable'
         # Track whether the current name has been given an explicit `As` —
         # used so DefType only applies when typing was implicit.
@@ -1341,12 +1476,12 @@ class Analyzer:
         while i < len(tokens_list):
             t = tokens_list[i]
             if t.type == 'IDENTIFIER':
-                if t.value.lower() == 'as':
+                if t.key == 'as':
                     explicit_as = True
                     i += 1
                     type_parts = []
                     while i < len(tokens_list):
-                        if tokens_list[i].value.lower() == 'new':
+                        if tokens_list[i].key == 'new':
                             i += 1
                             continue
                         
@@ -1527,9 +1662,9 @@ class Analyzer:
         # other VBA contexts — see the comment in `analyze_expression_info`'s
         # KEYWORDS set — but here it's part of the On-Error syntax).
         if (
-            tokens and tokens[0].type == 'IDENTIFIER' and tokens[0].value.lower() == 'on'
+            tokens and tokens[0].type == 'IDENTIFIER' and tokens[0].key == 'on'
             and len(tokens) >= 2 and tokens[1].type == 'IDENTIFIER'
-            and tokens[1].value.lower() == 'error'
+            and tokens[1].key == 'error'
         ):
             return None
 
@@ -1537,7 +1672,7 @@ class Analyzer:
         # selector expression normally and skip the label list — those
         # identifiers are validated by `_validate_jump_target`, not as
         # value references (otherwise every label fires VBA001).
-        if tokens and tokens[0].type == 'IDENTIFIER' and tokens[0].value.lower() == 'on':
+        if tokens and tokens[0].type == 'IDENTIFIER' and tokens[0].key == 'on':
             j = self._find_on_jump_keyword(tokens)
             if j is not None and j >= 2:
                 self.analyze_expression_info(
@@ -1548,30 +1683,32 @@ class Analyzer:
         type_name, _, _ = self.analyze_expression_info(tokens, scope, filename, context, with_stack, report_errors=report_errors)
         return type_name
 
+    _EXPRESSION_KEYWORDS = frozenset({
+        'set', 'call', 'if', 'then', 'else', 'elseif', 'end', 'exit',
+        # `error` is intentionally NOT here — VBA reserves it only in
+        # the two-token forms `On Error ...` (handled by the dedicated
+        # `on` + lookahead branch above analyze_statement) and `Error
+        # <number>` raise-statement. Anywhere else it's a perfectly
+        # valid identifier (and stdVBA's `stdAcc::AwaitForElement`
+        # uses it as a local variable name).
+        'on', 'goto', 'resume', 'do', 'loop', 'while', 'wend',
+        'for', 'next', 'select', 'case', 'with', 'to', 'step', 'in',
+        'byval', 'byref', 'optional', 'paramarray', 'true', 'false',
+        'nothing', 'empty', 'null',
+        'not', 'each', 'sub', 'function', 'property', 'const', 'dim', 'as',
+        'type', 'boolean', 'integer', 'string', 'variant', 'object',
+        'byte', 'long', 'single', 'double', 'currency', 'date', 'decimal',
+        'and', 'or', 'xor', 'is', 'like', 'typeof', 'mod', 'new', 'print',
+        'open', 'close', 'input', 'output', 'append', 'binary', 'random',
+        'get', 'put', 'let', 'stop', 'len', 'mid', 'redim', 'preserve', 'erase',
+        'friend', 'event', 'implements', 'raiseevent', 'gosub', 'return',
+        'lset', 'rset', 'addressof',
+        'defbool', 'defbyte', 'defint', 'deflong', 'defcur', 'defsng',
+        'defdbl', 'defdec', 'defdate', 'defstr', 'defobj', 'defvar'
+    })
+
     def analyze_expression_info(self, tokens, scope, filename, context, with_stack, report_errors=True, allow_implicit_call=True):
-        KEYWORDS = {
-            'set', 'call', 'if', 'then', 'else', 'elseif', 'end', 'exit',
-            # `error` is intentionally NOT here — VBA reserves it only in
-            # the two-token forms `On Error ...` (handled by the dedicated
-            # `on` + lookahead branch above analyze_statement) and `Error
-            # <number>` raise-statement. Anywhere else it's a perfectly
-            # valid identifier (and stdVBA's `stdAcc::AwaitForElement`
-            # uses it as a local variable name).
-            'on', 'goto', 'resume', 'do', 'loop', 'while', 'wend',
-            'for', 'next', 'select', 'case', 'with', 'to', 'step', 'in',
-            'byval', 'byref', 'optional', 'paramarray', 'true', 'false',
-            'nothing', 'empty', 'null',
-            'not', 'each', 'sub', 'function', 'property', 'const', 'dim', 'as',
-            'type', 'boolean', 'integer', 'string', 'variant', 'object',
-            'byte', 'long', 'single', 'double', 'currency', 'date', 'decimal',
-            'and', 'or', 'xor', 'is', 'like', 'typeof', 'mod', 'new', 'print',
-            'open', 'close', 'input', 'output', 'append', 'binary', 'random',
-            'get', 'put', 'let', 'stop', 'len', 'mid', 'redim', 'preserve', 'erase',
-            'friend', 'event', 'implements', 'raiseevent', 'gosub', 'return',
-            'lset', 'rset', 'addressof',
-            'defbool', 'defbyte', 'defint', 'deflong', 'defcur', 'defsng',
-            'defdbl', 'defdec', 'defdate', 'defstr', 'defobj', 'defvar'
-        }
+        KEYWORDS = self._EXPRESSION_KEYWORDS
 
         i = 0
         last_resolved_type = None
@@ -1594,8 +1731,8 @@ class Analyzer:
             if allow_implicit_call and last_resolved_kind in ('Function', 'Procedure', 'Global') and last_resolved_name and not expect_member:
                  is_arg_start = False
                  if token.type in ('STRING', 'INTEGER', 'FLOAT'): is_arg_start = True
-                 elif token.type == 'IDENTIFIER' and token.value.lower() not in KEYWORDS: is_arg_start = True
-                 elif token.type == 'OPERATOR' and token.value.lower() in ('-', 'not', 'byval', 'byref'): is_arg_start = True
+                 elif token.type == 'IDENTIFIER' and token.key not in KEYWORDS: is_arg_start = True
+                 elif token.type == 'OPERATOR' and token.key in ('-', 'not', 'byval', 'byref'): is_arg_start = True
 
                  if is_arg_start:
                       arg_tokens = tokens[i:]
@@ -1608,7 +1745,7 @@ class Analyzer:
                       break
             
             if token.type == 'OPERATOR':
-                val = token.value.lower()
+                val = token.key
                 if val not in ('.', '!', '(', ')', ','):
                     if val == '&':
                         implied_type = 'String'
@@ -1633,8 +1770,8 @@ class Analyzer:
                 name = token.value
                 last_resolved_name = name
                 
-                if name.lower() in KEYWORDS and not expect_member:
-                    prev_keyword = name.lower()
+                if token.key in KEYWORDS and not expect_member:
+                    prev_keyword = token.key
                     last_resolved_type = None
                     last_resolved_kind = None
                     last_resolved_symbol = None
@@ -1703,7 +1840,7 @@ class Analyzer:
 
                     expect_member = False
                 else:
-                    sym = scope.resolve(name)
+                    sym = scope.resolve(token.key)
                     last_resolved_symbol = sym
                     if not sym:
                         # Dynamic ENUM Lookup
@@ -1896,7 +2033,7 @@ class Analyzer:
                     i += 1
             
             elif token.type == 'OPERATOR':
-                val = token.value.lower()
+                val = token.key
                 if val == '&':
                     last_resolved_type = 'String'
                     last_resolved_kind = 'Expression'
@@ -2244,26 +2381,25 @@ class Analyzer:
                 # FALLBACK for Special Project Classes
                 if mod.module_type == 'Form':
                      # Check 'UserForm' base class members
-                     userform_cls = self.config.get_class('UserForm')
-                     if userform_cls:
-                         members = userform_cls.get('members', {})
-                         for m_name, m_def in members.items():
-                             if m_name.lower() == member_name.lower():
-                                 t = m_def.get('type', 'Variant')
-                                 return t, 'Expression', m_def
+                     userform_members = self.config.get_class_members('UserForm')
+                     if userform_members:
+                         hit = userform_members.get(member_name.lower())
+                         if hit:
+                             m_def = hit[2]
+                             return m_def.get('type', 'Variant'), 'Expression', m_def
 
                      # Implicit Controls (Form Heuristic - Keep for compatibility unless causing issues)
                      # Since we can't always parse controls perfectly from .frm, assume other members are Controls
                      return 'Object', 'Variable', None
 
                 if mod.name.lower() == 'thisdocument':
-                     doc_cls = self.config.get_class('Document') or self.config.get_class('IVDocument')
-                     if doc_cls:
-                         members = doc_cls.get('members', {})
-                         for m_name, m_def in members.items():
-                             if m_name.lower() == member_name.lower():
-                                 t = m_def.get('type', 'Variant')
-                                 return t, 'Expression', m_def
+                     doc_cls = 'Document' if self.config.get_class('Document') else 'IVDocument'
+                     doc_members = self.config.get_class_members(doc_cls)
+                     if doc_members:
+                         hit = doc_members.get(member_name.lower())
+                         if hit:
+                             m_def = hit[2]
+                             return m_def.get('type', 'Variant'), 'Expression', m_def
 
         if found_module_match:
              # Strict Check: If we found the module/class but not the member, STOP.
@@ -2278,39 +2414,26 @@ class Analyzer:
         
         # 4. Check Enums
         # If type_name matches a known Enum, check its members
-        enums = self.config.object_model.get("enums", {})
-        if type_name.lower() in enums:
-            members = enums[type_name.lower()]
-            # Case insensitive lookup
-            for m in members:
-                if m.lower() == member_name.lower():
-                    return "Long", "EnumItem", None
+        enum_members = self.config.get_enum_members(type_name)
+        if enum_members is not None:
+            if member_name.lower() in enum_members:
+                return "Long", "EnumItem", None
             
             # Fallback: Check Global Scope (e.g. VisUnitCodes.visMillimeters where visMillimeters is Global)
             sym = self.global_scope.resolve(member_name)
             if sym:
                  return sym['type'], sym.get('kind', 'Expression'), sym.get('extra')
         
-        # 5. Check Config Classes (Loaded from Model)
-        cls_def = self.config.get_class(type_name)
-        if cls_def:
-            members = cls_def.get("members", {})
-            for m_name, m_def in members.items():
-                if m_name.lower() == member_name.lower():
-                    raw_type = m_def.get("type", "Variant")
-                    # Host models commonly encode the *kind* in `type`
-                    # (Sub / Function / Property) and the actual return
-                    # type in `returns`. If only `type` is present and
-                    # it's a procedure-kind literal, the chain after
-                    # this hop is unknowable — return Variant so the
-                    # downstream walker treats the chain as permissive
-                    # instead of asking "Member 'X' not found in type
-                    # 'Function'".
-                    if raw_type in ('Sub', 'Function', 'Property', 'Event'):
-                        ret = m_def.get("returns")
-                        t = ret if ret else 'Variant'
-                        return t, 'Procedure', m_def
-                    return raw_type, 'Expression', m_def
+        # 5. Check Config Classes (Loaded from Model). The per-class
+        # member index resolves procedure-kind members (`type` Sub /
+        # Function / Property) to their `returns` type, or Variant so
+        # the downstream walker treats the chain as permissive instead
+        # of asking "Member 'X' not found in type 'Function'".
+        members = self.config.get_class_members(type_name)
+        if members:
+            hit = members.get(member_name.lower())
+            if hit:
+                return hit
 
         return None
 
@@ -2330,7 +2453,7 @@ class Analyzer:
     def is_unconditional_jump(self, tokens):
         if not tokens: return False
         t0 = tokens[0]
-        val = t0.value.lower()
+        val = t0.key
 
         if val == 'goto':
             # Check if strictly GoTo Label (Simple GoTo is 2 tokens, plus maybe a colon if parsed that way)
@@ -2341,7 +2464,7 @@ class Analyzer:
 
         if val == 'exit':
             if len(tokens) >= 2:
-                t1 = tokens[1].value.lower()
+                t1 = tokens[1].key
                 if t1 in ('sub', 'function', 'property'):
                     return True
 
@@ -2353,30 +2476,24 @@ class Analyzer:
 
     def is_control_flow_boundary(self, tokens):
         if not tokens: return False
-        val = tokens[0].value.lower()
+        val = tokens[0].key
 
         if val in ('else', 'elseif', 'next', 'loop', 'wend', 'case'):
             return True
 
         if val == 'end':
             if len(tokens) >= 2:
-                 val2 = tokens[1].value.lower()
+                 val2 = tokens[1].key
                  if val2 in ('if', 'select', 'with'):
                      return True
 
         return False
 
     def resolve_enum(self, name):
-        # Look up enum constants
-        enums = self.config.object_model.get("enums", {})
-        for enum_name, members in enums.items():
-            if name.lower() in [m.lower() for m in members.keys()]:
-                return members.get(name) # Or handle case insensitive lookup properly
-            # Case insensitive check
-            for m_key, m_val in members.items():
-                if m_key.lower() == name.lower():
-                    return m_val
-        return None
+        # Look up enum constants (case-insensitive, via the model's
+        # reverse index of enum members).
+        hit = self.config.find_enum_member(name)
+        return hit[1] if hit is not None else None
 
     def _is_class_type(self, type_name):
         """True if `type_name` names a user-defined Class (scanned `.cls`)
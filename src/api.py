@@ -20,14 +20,17 @@ and serialise (.json()).
 """
 from __future__ import annotations
 
+import mmap
 import os
+from collections.abc import Iterator
+from contextlib import contextmanager
 from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Any
 
 from .analyzer import Analyzer
 from .config import Config
-from .lexer import Lexer
+from .lexer import Lexer, latin1_bytes_pattern
 from .parser import VBAParser, FormParser
 from .preprocessor import Preprocessor
 from .reporting import build_report_v2, normalize_issues
@@ -36,6 +39,15 @@ from .scoring import compute_score, is_compile_safe
 
 _VBA_EXTS = (".bas", ".cls", ".frm")
 
+# `.bas` / `.cls` files at least this large are not read: their content
+# is a read-only mmap of the file, which the lexer scans as latin-1
+# bytes (see `Lexer.from_file`). Line ends are then left as they are,
+# and the lexer treats CRLF, LF and a lone CR (classic Mac) alike, as
+# reading in universal-newline mode does for smaller files. `.frm`
+# files are always read, as their designer block is scraped as text.
+# Maps are closed when the run is over (`_iter_input_files`).
+_MAP_MIN_BYTES = 8 << 20
+
 
 @dataclass
 class PrecheckResult:
@@ -46,6 +58,8 @@ class PrecheckResult:
     issues: list[dict] = field(default_factory=list)  # normalised
     files_scanned: int = 0
     score_breakdown: dict = field(default_factory=dict)
+    # `precheck_matrix` only: name, score and compile_safe per configuration.
+    configurations: list[dict] = field(default_factory=list)
 
     @property
     def errors(self) -> list[dict]:
@@ -61,22 +75,66 @@ class PrecheckResult:
 
     def json(self) -> dict:
         """Return the canonical JSON v2 report."""
-        return build_report_v2(
+        report = build_report_v2(
             issues=self.issues,
             files_scanned=self.files_scanned,
             score=self.score,
             compile_safe=self.compile_safe,
             score_breakdown=self.score_breakdown,
         )
+        if self.configurations:
+            report["configurations"] = self.configurations
+        return report
 
     def __bool__(self) -> bool:
         # Truthy when the source is compile-safe.
         return self.compile_safe
 
 
-def _iter_input_files(source: str | os.PathLike, inline_name: str = "<inline>") -> tuple[list[tuple[str, str]], int]:
-    """Resolve `source` to a list of (filename, content) pairs and a
-    stable display root (used for relative paths)."""
+def _read_source(path) -> tuple[str | mmap.mmap, bytes]:
+    """The content of the VBA file at `path` — its latin-1 text, or for
+    a large `.bas` / `.cls` (`_MAP_MIN_BYTES`) a read-only mmap — and
+    the digest of its bytes (`_content_digest`)."""
+    with open(path, "rb") as fh:
+        if not str(path).lower().endswith(".frm"):
+            size = os.fstat(fh.fileno()).st_size
+            if size and size >= _MAP_MIN_BYTES:
+                content = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+                return content, _content_digest(content)
+        raw = fh.read()
+    text = str(raw, "latin-1")
+    if "\r" in text:
+        # What reading in universal-newline mode would give.
+        text = text.replace("\r\n", "\n").replace("\r", "\n")
+    return text, _content_digest(raw)
+
+
+def _text(content: str | mmap.mmap) -> str:
+    """`content` as text, decoding a mapped file."""
+    return content if isinstance(content, str) else str(content, "latin-1")
+
+
+@contextmanager
+def _iter_input_files(
+    source: str | os.PathLike, inline_name: str = "<inline>",
+) -> Iterator[tuple[list[tuple[str, str | mmap.mmap]], int, set[str]]]:
+    """Resolve `source` to a list of (filename, content) pairs, the
+    number of files and the companion models they trigger
+    (`apply_auto_layers`), detected as each file is read. Content is
+    text, or a mapped file for large modules (`_read_source`); the maps
+    are closed on exit, so use the content only inside the `with`
+    block."""
+    files, n_files, auto_layers = _read_input_files(source, inline_name)
+    try:
+        yield files, n_files, auto_layers
+    finally:
+        for _, content in files:
+            if isinstance(content, mmap.mmap):
+                content.close()
+
+
+def _read_input_files(source, inline_name):
+    """The (files, count, auto layers) triple `_iter_input_files` hands out."""
     if isinstance(source, (str, os.PathLike)) and (
         isinstance(source, os.PathLike) or os.sep in str(source) or len(str(source)) < 4096
     ):
@@ -85,19 +143,24 @@ def _iter_input_files(source: str | os.PathLike, inline_name: str = "<inline>")
         if "\n" not in s and (os.path.isfile(s) or os.path.isdir(s)):
             p = Path(s)
             if p.is_dir():
-                files = []
+                paths = []
                 for root, _, fnames in os.walk(p):
                     for f in fnames:
                         if f.lower().endswith(_VBA_EXTS):
                             full = os.path.join(root, f)
-                            with open(full, "r", encoding="latin-1") as fh:
-                                files.append((os.path.relpath(full, p), fh.read()))
-                return files, len(files)
+                            paths.append((os.path.relpath(full, p), full))
             else:
-                with open(p, "r", encoding="latin-1") as fh:
-                    return [(p.name, fh.read())], 1
+                paths = [(p.name, p)]
+            files: list[tuple[str, str | mmap.mmap]] = []
+            auto_layers: set[str] = set()
+            for name, path in paths:
+                content, digest = _read_source(path)
+                files.append((name, content))
+                auto_layers |= _auto_layer_models(name, content, digest)
+            return files, len(files), auto_layers
     # Inline source string.
-    return [(inline_name, str(source))], 1
+    source = str(source)
+    return [(inline_name, source)], 1, set(_auto_layer_models(inline_name, source))
 
 
 def _is_path_like(source) -> bool:
@@ -140,42 +203,130 @@ def _autodetect_vba_model(source) -> Path | None:
 
 # Auto-layer table: which companion model to layer when the scan set
 # references it. Each entry is (model filename, regex to look for in
-# any source file, restrict-to-extension or None for "any file").
+# any source file, restrict-to-extension or None for "any file", the
+# lower-case words a match of the regex starts with).
 #
 # Pattern design note: we trigger on the *namespace* name (`MSForms`,
 # `Scripting`, …) rather than the bare class names (`Dictionary`,
 # `UserForm`, …) because the unqualified class names are too generic —
 # they clash with project-internal identifiers in real libraries.
+import hashlib as _hashlib
 import re as _re_aux
 
-_AUTO_LAYER_RULES: list[tuple[str, "_re_aux.Pattern[str]", str | None]] = [
-    ("mscomctl.json", _re_aux.compile(r"\b(?:MS)?Comctl(?:Lib)?\b", _re_aux.IGNORECASE), ".frm"),
-    ("msforms.json", _re_aux.compile(r"\bMSForms\b", _re_aux.IGNORECASE), None),
+_AUTO_LAYER_RULES: list[tuple[str, "_re_aux.Pattern[str]", str | None, tuple[str, ...]]] = [
+    ("mscomctl.json", _re_aux.compile(r"\b(?:MS)?Comctl(?:Lib)?\b", _re_aux.IGNORECASE), ".frm", ("mscomctl", "comctl")),
+    ("msforms.json", _re_aux.compile(r"\bMSForms\b", _re_aux.IGNORECASE), None, ("msforms",)),
     # ProgID-style auto-layers — match the namespace prefix of CreateObject
     # strings or `As Scripting.X` declarations. Spelled out verbatim because
     # VBA is case-insensitive but real-world capitalisation drifts.
-    ("scripting.json", _re_aux.compile(r"\bScripting\.(?:Dictionary|FileSystemObject)\b", _re_aux.IGNORECASE), None),
-    ("vbscript_regexp.json", _re_aux.compile(r"\bVBScript\.Reg[Ee]xp\b", _re_aux.IGNORECASE), None),
-    ("wscript_shell.json", _re_aux.compile(r"\bWScript\.Shell\b", _re_aux.IGNORECASE), None),
-    ("shell_application.json", _re_aux.compile(r"\bShell\.Application\b", _re_aux.IGNORECASE), None),
+    ("scripting.json", _re_aux.compile(r"\bScripting\.(?:Dictionary|FileSystemObject)\b", _re_aux.IGNORECASE), None, ("scripting",)),
+    ("vbscript_regexp.json", _re_aux.compile(r"\bVBScript\.Reg[Ee]xp\b", _re_aux.IGNORECASE), None, ("vbscript",)),
+    ("wscript_shell.json", _re_aux.compile(r"\bWScript\.Shell\b", _re_aux.IGNORECASE), None, ("wscript",)),
+    ("shell_application.json", _re_aux.compile(r"\bShell\.Application\b", _re_aux.IGNORECASE), None, ("shell",)),
 ]
 
 
-def apply_auto_layers(config: Config, files: list[tuple[str, str]]) -> list[str]:
+def _keyword_pattern(words) -> "_re_aux.Pattern[str]":
+    """One case-insensitive pattern for `words` at the start of a word.
+
+    It opens with a class of their first letters, which the regex
+    engine scans for without trying the rest at every position, then
+    checks the word boundary before that letter and the rest of the
+    word. Matches cover the keyword only, so triggers that overlap
+    (`WScript.Shell.Application`) are each found.
+    """
+    by_first: dict[str, list[str]] = {}
+    for word in sorted(words, key=len, reverse=True):
+        by_first.setdefault(word[0], []).append(_re_aux.escape(word[1:]))
+    firsts = "".join(sorted(by_first))
+    rests = "|".join(f"(?<={first})(?:{'|'.join(tails)})" for first, tails in sorted(by_first.items()))
+    return _re_aux.compile(rf"[{firsts}](?<!\w.)(?:{rests})", _re_aux.IGNORECASE)
+
+
+# Every rule's leading words in one pattern, so a file is scanned once;
+# a keyword hit is confirmed by its rule's own regex at that position.
+_AUTO_LAYER_KEYWORDS: dict[str, list[tuple[str, "_re_aux.Pattern[str]", "_re_aux.Pattern[bytes]"]]] = {}
+for _model_name, _pat, _, _words in _AUTO_LAYER_RULES:
+    for _word in _words:
+        _AUTO_LAYER_KEYWORDS.setdefault(_word, []).append((_model_name, _pat, latin1_bytes_pattern(_pat)))
+del _model_name, _pat, _words, _word
+_AUTO_LAYER_PAT = _keyword_pattern(_AUTO_LAYER_KEYWORDS)
+# The same for a mapped file's latin-1 bytes, searched in place.
+_AUTO_LAYER_PAT_BYTES = latin1_bytes_pattern(_AUTO_LAYER_PAT)
+_AUTO_LAYER_EXTS = {model_name: ext for model_name, _, ext, _ in _AUTO_LAYER_RULES}
+
+# Content digest -> match_auto_layer_rules() result. Bounded; oldest dropped first.
+_AUTO_LAYER_CACHE: dict[bytes, frozenset[str]] = {}
+_AUTO_LAYER_CACHE_MAX = 8192
+
+
+def _content_digest(content: str | bytes | mmap.mmap) -> bytes:
+    if not isinstance(content, str):
+        return _hashlib.blake2b(content, digest_size=16).digest()
+    return _hashlib.blake2b(content.encode("utf-8", "surrogatepass"), digest_size=16).digest()
+
+
+def match_auto_layer_rules(content: str | mmap.mmap, digest: bytes | None = None) -> frozenset[str]:
+    """Companion models whose trigger pattern occurs in `content`,
+    ignoring the per-rule extension filter.
+
+    One scan of `content` (text, or a mapped file's bytes) for every
+    rule's leading words at once (`_keyword_pattern`); only a hit runs
+    its rule's regex, anchored there. Results are cached per content
+    digest —
+    `digest` when the caller already has it (`_read_source`), else
+    computed here — so unchanged files in a re-scanned tree are not
+    searched again.
+    """
+    if digest is None:
+        digest = _content_digest(content)
+    hits = _AUTO_LAYER_CACHE.get(digest)
+    if hits is None:
+        text = isinstance(content, str)
+        found: set[str] = set()
+        for mo in (_AUTO_LAYER_PAT if text else _AUTO_LAYER_PAT_BYTES).finditer(content):
+            word = (mo[0] if text else str(mo[0], "latin-1")).lower()
+            for model_name, pat, pat_bytes in _AUTO_LAYER_KEYWORDS[word]:
+                if model_name not in found and (pat if text else pat_bytes).match(content, mo.start()):
+                    found.add(model_name)
+        hits = frozenset(found)
+        while len(_AUTO_LAYER_CACHE) >= _AUTO_LAYER_CACHE_MAX:
+            _AUTO_LAYER_CACHE.pop(next(iter(_AUTO_LAYER_CACHE)), None)
+        _AUTO_LAYER_CACHE[digest] = hits
+    return hits
+
+
+def _auto_layer_models(filename: str, content: str | mmap.mmap, digest: bytes | None = None) -> frozenset[str]:
+    """The companion models the file `filename` triggers, extension
+    filters applied."""
+    hits = match_auto_layer_rules(content, digest)
+    if any(_AUTO_LAYER_EXTS[model_name] is not None for model_name in hits):
+        ext = os.path.splitext(filename)[1].lower()
+        hits = frozenset(
+            model_name for model_name in hits
+            if _AUTO_LAYER_EXTS[model_name] in (None, ext)
+        )
+    return hits
+
+
+def apply_auto_layers(
+    config: Config, files: list[tuple[str, str]], models: set[str] | None = None,
+) -> list[str]:
     """Layer companion models on top of the standard / host model when
-    the scan set references them. Returns the list of layered model
-    filenames (mostly for logging / tests). Shared between `precheck()`
-    and the test conftest pipeline so the two stay in sync."""
+    the scan set references them. `models` are the ones `files` trigger
+    when already known (`_iter_input_files` detects them as it reads);
+    otherwise every file is scanned here. Returns the list of layered
+    model filenames (mostly for logging / tests). Shared between
+    `precheck()` and the test conftest pipeline so the two stay in sync."""
+    if models is None:
+        models = set()
+        for filename, content in files:
+            models |= _auto_layer_models(filename, content)
+
     models_dir = Path(__file__).resolve().parent / "models"
     layered: list[str] = []
-    for model_name, pat, ext_filter in _AUTO_LAYER_RULES:
-        candidates = files
-        if ext_filter is not None:
-            candidates = [
-                (fn, ct) for fn, ct in files
-                if os.path.splitext(fn)[1].lower() == ext_filter
-            ]
-        if any(pat.search(content) for _, content in candidates):
+    for model_name, _, _, _ in _AUTO_LAYER_RULES:  # fixed layering order
+        if model_name in models:
             path = models_dir / model_name
             if path.is_file():
                 config.load_model(str(path))
@@ -183,6 +334,119 @@ def apply_auto_layers(config: Config, files: list[tuple[str, str]]) -> list[str]
     return layered
 
 
+# `--host auto`: identifiers that only (or overwhelmingly) occur in code
+# written for one Office host. Each host is scored by how many distinct
+# fingerprints a file uses in code (comments and string literals don't
+# count); the best total over the scan set wins, ties going to the host
+# listed first. Names shared by two hosts (`ActiveDocument` is Word and
+# Visio) are listed under both.
+_HOST_FINGERPRINTS: list[tuple[str, tuple[str, ...]]] = [
+    ("excel", (
+        "thisworkbook", "activeworkbook", "workbooks", "activesheet", "worksheets",
+        "activecell", "activechart", "worksheetfunction",
+        "xlup", "xldown", "xltoleft", "xltoright", "xlvalues", "xlformulas",
+    )),
+    ("word", (
+        "activedocument", "thisdocument", "wdcollapseend", "wdcollapsestart",
+        "wdstory", "wdline", "wdparagraph", "wdformatdocument",
+    )),
+    ("access", (
+        "docmd", "currentdb", "currentproject", "dlookup", "dcount", "dsum",
+        "acform", "acreport", "acviewnormal",
+    )),
+    ("visio", (
+        "activedocument", "thisdocument", "activepage", "vissectionobject", "visrowxformout",
+    )),
+    ("outlook", (
+        "getnamespace", "olmailitem", "olfolderinbox", "activeexplorer", "activeinspector",
+    )),
+]
+_HOST_WORDS: dict[str, tuple[str, ...]] = {}
+for _host, _words in _HOST_FINGERPRINTS:
+    for _word in _words:
+        _HOST_WORDS[_word] = _HOST_WORDS.get(_word, ()) + (_host,)
+del _host, _words, _word
+# All the fingerprints as whole words, for a mapped file's bytes.
+_HOST_WORDS_BYTES = latin1_bytes_pattern(
+    _re_aux.compile(r"(?<!\w)(?:%s)(?!\w)" % "|".join(_HOST_WORDS), _re_aux.IGNORECASE)
+)
+_HOST_CACHE: dict[bytes, dict[str, int]] = {}
+
+
+def _is_ident_char(ch: str) -> bool:
+    return ch.isalnum() or ch == "_"
+
+
+def _in_code(content: str | mmap.mmap, pos: int) -> bool:
+    """True when `pos` is outside a string literal and a `'` comment.
+    Only the line up to `pos` is looked at (decoded, for a mapped file)."""
+    if isinstance(content, str):
+        line = content[content.rfind("\n", 0, pos) + 1:pos]
+    else:
+        start = content.rfind(b"\n", 0, pos)
+        start = max(start, content.rfind(b"\r", start + 1, pos)) + 1
+        line = str(content[start:pos], "latin-1")
+    in_string = False
+    for ch in line:
+        if ch == '"':
+            in_string = not in_string
+        elif ch == "'" and not in_string:
+            return False
+    return not in_string
+
+
+def host_scores(content: str | mmap.mmap) -> dict[str, int]:
+    """Host name -> number of distinct `_HOST_FINGERPRINTS` identifiers
+    `content` uses in code. Cached per content digest like
+    `match_auto_layer_rules()`."""
+    digest = _content_digest(content)
+    scores = _HOST_CACHE.get(digest)
+    if scores is None:
+        seen = set()
+        if isinstance(content, str):
+            lowered = content.lower()
+            for word in _HOST_WORDS:
+                pos = lowered.find(word)
+                while pos != -1:
+                    end = pos + len(word)
+                    if (
+                        not (pos and _is_ident_char(lowered[pos - 1]))
+                        and not (end < len(lowered) and _is_ident_char(lowered[end]))
+                        and _in_code(lowered, pos)
+                    ):
+                        seen.add(word)
+                        break
+                    pos = lowered.find(word, end)
+        else:
+            # A mapped file: one pass over its bytes, without decoding them.
+            for mo in _HOST_WORDS_BYTES.finditer(content):
+                word = str(mo[0], "latin-1").lower()
+                if word not in seen and _in_code(content, mo.start()):
+                    seen.add(word)
+        scores = {}
+        for word in seen:
+            for host in _HOST_WORDS[word]:
+                scores[host] = scores.get(host, 0) + 1
+        while len(_HOST_CACHE) >= _AUTO_LAYER_CACHE_MAX:
+            _HOST_CACHE.pop(next(iter(_HOST_CACHE)), None)
+        _HOST_CACHE[digest] = scores
+    return scores
+
+
+def detect_host(files: list[tuple[str, str]]) -> str | None:
+    """Resolve `--host auto`: the Office host whose fingerprints the scan
+    set uses most, or None for host-agnostic code (std_model only)."""
+    totals: dict[str, int] = {}
+    for _, content in files:
+        for host, score in host_scores(content).items():
+            totals[host] = totals.get(host, 0) + score
+    best = None
+    for host, _ in _HOST_FINGERPRINTS:
+        if totals.get(host, 0) > totals.get(best, 0):
+            best = host
+    return best
+
+
 def _load_host_model(config: Config, host: str | None) -> bool:
     """Load `models/<host>.json` if it exists. Return True if loaded.
     Silent no-op when host is None or the file does not exist (the user
@@ -206,6 +470,7 @@ def precheck(
     strict: bool = True,
     module_type: str | None = None,
     roundtrip: bool = False,
+    model_usage: Any = None,
 ) -> PrecheckResult:
     """Run the full VBAlidator pipeline.
 
@@ -217,7 +482,9 @@ def precheck(
     host
         One of `excel`, `word`, `access`, `outlook`, `vba_runtime`. When
         provided the matching `models/<host>.json` is auto-loaded so the
-        user does not need to run the model exporter first.
+        user does not need to run the model exporter first. `"auto"`
+        picks the host from identifiers the input uses (`detect_host`),
+        or loads none for host-agnostic code.
     model_path
         Path to a custom JSON object model. Layered on top of the host
         model and the bundled `std_model.json`.
@@ -229,11 +496,129 @@ def precheck(
     module_type
         Override module type when `source` is an inline string. Defaults
         to "Module" / "Class" / "Form" inferred from the extension.
+    model_usage
+        Optional `model_prune.ModelUsage` that collects every object-model
+        symbol the analysis resolved (used by `vbalidator model prune`).
+    """
+    with _iter_input_files(source) as (files, n_files, auto_layers):
+        config, host = _configure(source, files, host, model_path, defines, auto_layers)
+
+        analyzer = Analyzer(config)
+        if model_usage is not None:
+            analyzer.record_model_usage(model_usage)
+
+        for filename, mtype, controls, tokens, lex_issues in _lex_inputs(files, module_type):
+            analyzer.errors.extend(lex_issues)
+            pp = Preprocessor(tokens, config.definitions)
+            module_node, syntax_issues = _parse_module(filename, mtype, controls, pp.process_buffer())
+            analyzer.errors.extend(syntax_issues)
+            analyzer.add_module(module_node)
+
+        raw_issues = analyzer.analyze()
+        if roundtrip:
+            raw_issues.extend(_roundtrip_issues(files, host))
+        return _result(normalize_issues(raw_issues), n_files, strict)
+
+
+def precheck_matrix(
+    source: str | os.PathLike,
+    configurations: list[dict[str, Any]],
+    *,
+    host: str | None = None,
+    model_path: str | os.PathLike | None = None,
+    defines: dict[str, Any] | None = None,
+    strict: bool = True,
+    module_type: str | None = None,
+    roundtrip: bool = False,
+) -> PrecheckResult:
+    """Run the pipeline once per conditional-compilation configuration
+    (`--define-matrix`) and merge the findings.
+
+    Each entry of `configurations` is a defines dict applied on top of
+    `defines`. Every file is lexed once and preprocessed once per
+    configuration; a module is parsed again only when its active token
+    stream differs from one already parsed, so modules without `#If`
+    are parsed once. Pass 2 of the analysis is likewise skipped for a
+    module already analysed in a project with the same surface (the
+    declarations every module exposes, see `_surface`) — with no
+    `#If` touching a declaration, only the modules whose code differs
+    are walked again.
+
+    Each issue carries a `configurations` list naming the
+    configurations it occurs in; `PrecheckResult.configurations`
+    scores every configuration on its own. The overall score gates on
+    the union of the findings.
     """
+    with _iter_input_files(source) as (files, n_files, auto_layers):
+        config, host = _configure(source, files, host, model_path, defines, auto_layers)
+        units = list(_lex_inputs(files, module_type))
+        rt_issues = _roundtrip_issues(files, host) if roundtrip else []
+        base = dict(config.definitions)
+
+        # (file index, active ranges) -> (module node, syntax issues, surface)
+        parsed: dict[tuple, tuple] = {}
+        # project surface -> a small id standing for it in `analysed`
+        projects: dict[tuple, int] = {}
+        # (module node, project id) -> the issues pass 2 found in it
+        analysed: dict[tuple, list[dict]] = {}
+        runs = []
+        for overrides in configurations:
+            label = configuration_label(overrides)
+            definitions = dict(base)
+            for k, v in overrides.items():
+                definitions[k.upper()] = v
+            config.definitions = definitions
+
+            front_issues, modules, surfaces = [], [], []
+            for index, (filename, mtype, controls, tokens, lex_issues) in enumerate(units):
+                front_issues.extend(lex_issues)
+                if tokens.directives:
+                    processed = Preprocessor(tokens, definitions).process_buffer()
+                    key = (index, processed.firsts.tobytes(), processed.offsets.tobytes())
+                else:
+                    processed, key = tokens, (index, None)
+                entry = parsed.get(key)
+                if entry is None:
+                    module_node, syntax_issues = _parse_module(filename, mtype, controls, processed)
+                    entry = parsed[key] = (module_node, syntax_issues, _surface(module_node))
+                front_issues.extend(entry[1])
+                modules.append(entry[0])
+                surfaces.append(entry[2])
+
+            # The PtrSafe check (VBA300) reads the defines directly.
+            surface = (tuple(surfaces), definitions.get("WIN64") is False or definitions.get("VBA7") is False)
+            project = projects.setdefault(surface, len(projects))
+            analyzer = Analyzer(config)
+            analyzer.errors.extend(front_issues)
+            reuse = {}
+            for module_node in modules:
+                hit = analysed.get((module_node, project))
+                if hit is not None:
+                    reuse[module_node] = hit
+                analyzer.add_module(module_node)
+            raw_issues = analyzer.analyze(reuse)
+            for module_node, issues in analyzer.module_issues.items():
+                analysed[(module_node, project)] = issues
+            runs.append((label, normalize_issues(raw_issues + rt_issues)))
+
+        config.definitions = base
+        return _merge_runs(runs, n_files, strict)
+
+
+def configuration_label(defines: dict[str, Any]) -> str:
+    """Display name of one `--define-matrix` configuration."""
+    return ",".join(f"{k.upper()}={v}" for k, v in defines.items()) or "defaults"
+
+
+def _configure(source, files, host, model_path, defines, auto_layers) -> tuple[Config, str | None]:
+    """The `Config` for a run over `files` (which trigger the companion
+    models `auto_layers`), and the host it resolved `"auto"` to."""
     config = Config()
     if defines:
         for k, v in defines.items():
             config.definitions[k.upper()] = v
+    if host == "auto":
+        host = detect_host(files)
     if host:
         _load_host_model(config, host)
     if model_path:
@@ -246,12 +631,13 @@ def precheck(
         if auto is not None:
             config.load_model(str(auto))
 
-    files, n_files = _iter_input_files(source)
-
-    apply_auto_layers(config, files)
+    apply_auto_layers(config, files, auto_layers)
+    return config, host
 
-    analyzer = Analyzer(config)
 
+def _lex_inputs(files, module_type):
+    """Lex every input file. Yields (filename, module type, form
+    controls, TokenBuffer, lexer issues)."""
     for filename, content in files:
         ext = os.path.splitext(filename)[1].lower()
         if module_type is not None and len(files) == 1:
@@ -275,59 +661,86 @@ def precheck(
                 code_content = content[match.start():]
 
         lexer = Lexer(code_content)
-        tokens = list(lexer.tokenize())
-        for lex_err in lexer.errors:
-            analyzer.errors.append(lex_err.to_dict(filename=filename))
-
-        pp = Preprocessor(tokens, config.definitions)
-        processed_tokens = list(pp.process())
-
-        parser = VBAParser(processed_tokens, filename=filename)
-        module_node = parser.parse_module()
-        module_node.filename = filename
-        module_node.module_type = mtype
-        for syn in parser.errors:
-            analyzer.errors.append(syn)
-        if ext == ".frm":
-            module_node.variables.extend(controls)
-        analyzer.add_module(module_node)
-
-    raw_issues = analyzer.analyze()
-
-    # Phase 4.5 — optional dynamic verification through Office COM.
-    if roundtrip:
-        try:
-            from .roundtrip import is_available, availability_reason, verify_compile
-            if not is_available():
-                raw_issues.append({
-                    "file": "<roundtrip>", "line": 0,
-                    "rule_id": "VBA_RT000", "severity": "info",
-                    "category": "roundtrip",
-                    "message": f"Round-trip verification unavailable: {availability_reason()}",
-                })
-            else:
-                # Round-trip every input file individually so the per-file
-                # error attribution stays correct.
-                for filename, content in files:
-                    rt_issues = verify_compile(
-                        content,
-                        host=(host or "excel"),
-                    )
-                    # Re-attribute the file name (verify_compile uses the
-                    # injected component name by default).
-                    for i in rt_issues:
-                        i["file"] = filename
-                    raw_issues.extend(rt_issues)
-        except Exception as exc:  # pragma: no cover — defence-in-depth
-            raw_issues.append({
+        tokens = lexer.tokenize_buffer()
+        yield filename, mtype, controls, tokens, [e.to_dict(filename=filename) for e in lexer.errors]
+
+
+def _parse_module(filename, mtype, controls, tokens):
+    """Parse preprocessed `tokens` into a module node. Returns the node
+    and the parser's syntax issues."""
+    parser = VBAParser(tokens, filename=filename)
+    module_node = parser.parse_module()
+    module_node.filename = filename
+    module_node.module_type = mtype
+    module_node.variables.extend(controls)
+    return module_node, parser.errors
+
+
+def _surface(module_node) -> tuple:
+    """What analysing the other modules of a project can see of
+    `module_node`: its name and attributes, its public variables and
+    procedure signatures, and its types (a private type is visible to
+    the modules analysed after it). Procedure bodies and private
+    members — typically the `#If VBA7` / `#Else` pairs of `Private
+    Declare` lines — are not part of it."""
+    def var(v):
+        return (v.name, v.type_name, v.scope, v.is_optional, v.is_paramarray, v.mechanism, v.is_const, v.is_enum_member)
+
+    return (
+        module_node.filename,
+        module_node.name,
+        module_node.module_type,
+        tuple(module_node.attributes.items()),
+        tuple(var(v) for v in module_node.variables if v.scope.lower() in ("public", "global", "friend")),
+        tuple(
+            (p.name, p.proc_type, p.return_type, p.scope, p.is_declare, p.is_ptrsafe,
+             p.lib_name, p.alias_name, tuple(var(a) for a in p.args))
+            for p in module_node.procedures
+            if p.scope.lower() in ("public", "friend")
+        ),
+        tuple(
+            (name, t.scope, t.is_enum, tuple(var(m) for m in t.members))
+            for name, t in module_node.types.items()
+        ),
+    )
+
+
+def _roundtrip_issues(files, host) -> list[dict]:
+    """Phase 4.5 — optional dynamic verification through Office COM."""
+    issues: list[dict] = []
+    try:
+        from .roundtrip import is_available, availability_reason, verify_compile
+        if not is_available():
+            issues.append({
                 "file": "<roundtrip>", "line": 0,
                 "rule_id": "VBA_RT000", "severity": "info",
                 "category": "roundtrip",
-                "message": f"Round-trip verification crashed: {exc}",
+                "message": f"Round-trip verification unavailable: {availability_reason()}",
             })
-
-    issues = normalize_issues(raw_issues)
-
+        else:
+            # Round-trip every input file individually so the per-file
+            # error attribution stays correct.
+            for filename, content in files:
+                rt_issues = verify_compile(
+                    _text(content),
+                    host=(host or "excel"),
+                )
+                # Re-attribute the file name (verify_compile uses the
+                # injected component name by default).
+                for i in rt_issues:
+                    i["file"] = filename
+                issues.extend(rt_issues)
+    except Exception as exc:  # pragma: no cover — defence-in-depth
+        issues.append({
+            "file": "<roundtrip>", "line": 0,
+            "rule_id": "VBA_RT000", "severity": "info",
+            "category": "roundtrip",
+            "message": f"Round-trip verification crashed: {exc}",
+        })
+    return issues
+
+
+def _result(issues: list[dict], n_files: int, strict: bool) -> PrecheckResult:
     if not strict:
         # Drop warnings + info from the gating set; keep them in the
         # report so the caller can still see them.
@@ -347,6 +760,28 @@ def precheck(
     )
 
 
+def _merge_runs(runs, n_files: int, strict: bool) -> PrecheckResult:
+    """One result from per-configuration (label, issues) runs. An issue
+    reported in several configurations appears once, tagged with all
+    of them; an issue reported twice in one run stays twice."""
+    merged: dict[tuple, dict] = {}
+    summaries = []
+    for label, issues in runs:
+        seen: dict[tuple, int] = {}
+        for issue in issues:
+            key = tuple(sorted((k, repr(v)) for k, v in issue.items()))
+            n = seen[key] = seen.get(key, 0) + 1
+            entry = merged.get((key, n))
+            if entry is None:
+                entry = merged[(key, n)] = dict(issue, configurations=[])
+            entry["configurations"].append(label)
+        single = _result(issues, n_files, strict)
+        summaries.append({"name": label, "score": single.score, "compile_safe": single.compile_safe})
+    result = _result(list(merged.values()), n_files, strict)
+    result.configurations = summaries
+    return result
+
+
 def precheck_source(
     source: str,
     *,
@@ -363,6 +798,8 @@ def precheck_source(
     if defines:
         for k, v in defines.items():
             config.definitions[k.upper()] = v
+    if host == "auto":
+        host = detect_host([(name, source)])
     if host:
         _load_host_model(config, host)
     if model_path:
@@ -370,12 +807,12 @@ def precheck_source(
 
     analyzer = Analyzer(config)
     lexer = Lexer(source)
-    tokens = list(lexer.tokenize())
+    tokens = lexer.tokenize_buffer()
     for lex_err in lexer.errors:
         analyzer.errors.append(lex_err.to_dict(filename=name))
 
     pp = Preprocessor(tokens, config.definitions)
-    processed = list(pp.process())
+    processed = pp.process_buffer()
     parser = VBAParser(processed, filename=name)
     module_node = parser.parse_module()
     module_node.filename = name
@@ -395,4 +832,4 @@ def precheck_source(
     )
 
 
-__all__ = ["precheck", "precheck_source", "PrecheckResult"]
+__all__ = ["precheck", "precheck_matrix", "precheck_source", "PrecheckResult"]
@@ -1,6 +1,7 @@
-import json
 import os
 
+from .model_layers import LayeredModel, get_layer
+
 class Config:
     def __init__(self):
         # Default conditional-compilation constants reflect a modern
@@ -13,11 +14,10 @@ class Config:
             'WIN16': False,
             'MAC': False,
         }
-        self.object_model = {
-            "globals": {},
-            "classes": {},
-            "enums": {}
-        }
+        # Read-only stack of model layers. The bundled layers are shared
+        # process-wide (see model_layers.get_layer); per-call models are
+        # pushed on top as overlays.
+        self.object_model = LayeredModel()
         self.load_standard_model()
 
     def parse_defines(self, define_str):
@@ -53,52 +53,54 @@ class Config:
             print(f"Warning: Standard model not found at {std_model_path}")
 
     def load_model(self, filepath):
-        """Loads an external JSON object model and merges it."""
-        with open(filepath, 'r') as f:
-            data = json.load(f)
+        """Layers an external JSON object model on top of the ones
+        already loaded. Later layers win lookups; a class declared by
+        several layers resolves with all their members merged. Models
+        the file `extends` are loaded below it first, unless already
+        present.
+        """
+        self._load_layer(filepath, set())
 
-        if not isinstance(data, dict):
-            raise ValueError("Model must be a JSON object.")
+    def _load_layer(self, filepath, pending):
+        # Base models named by `extends` (the bundled Office hosts extend
+        # `office_core.json`) go below the layer, each loaded once.
+        layer = get_layer(filepath)
+        pending.add(os.path.realpath(filepath))
+        if layer.extends:
+            loaded = {os.path.realpath(below.path) for below in self.object_model.layers if below.path}
+            for base in layer.extends:
+                base_path = os.path.join(os.path.dirname(os.path.abspath(filepath)), base)
+                if os.path.realpath(base_path) not in loaded | pending:
+                    self._load_layer(base_path, pending)
+        self.object_model.push(layer)
 
-        valid_sections = {"globals", "classes", "enums", "references"}
-        if not any(k in data for k in valid_sections):
-            raise ValueError(f"Model file must contain at least one of the following sections: {', '.join(valid_sections)}")
+    def get_global(self, name):
+        return self.object_model["globals"].get(name.lower())
 
-        # Merge Globals (Key Normalization)
-        if "globals" in data:
-            for name, defn in data["globals"].items():
-                self.object_model["globals"][name.lower()] = defn
+    def get_class(self, name):
+        return self.object_model["classes"].get(name.lower())
 
-        # Merge Classes (Key Normalization)
-        if "classes" in data:
-            for cls_name, cls_def in data["classes"].items():
-                lower_name = cls_name.lower()
-                if lower_name in self.object_model["classes"]:
-                    # Merge members
-                    if "members" in cls_def:
-                        existing_members = self.object_model["classes"][lower_name].get("members", {})
-                        existing_members.update(cls_def["members"])
-                        self.object_model["classes"][lower_name]["members"] = existing_members
-                else:
-                    self.object_model["classes"][lower_name] = cls_def
+    def get_class_members(self, name):
+        """Case-insensitive member index of class `name`: lower-cased
+        member name → (type, kind, definition). None for unknown classes."""
+        return self.object_model["classes"].member_index(name.lower())
 
-        # Merge References
-        if "references" in data:
-            if "references" not in self.object_model:
-                    self.object_model["references"] = []
-            existing_names = {r["name"] for r in self.object_model["references"]}
-            for ref in data["references"]:
-                if ref["name"] not in existing_names:
-                    self.object_model["references"].append(ref)
-                    existing_names.add(ref["name"])
+    def model_source(self, section, name):
+        """Name of the model layer (`std_model`, `excel`, `vba_model`, …)
+        that supplies `name` in `section`, or None."""
+        key = name if section == "references" else name.lower()
+        return self.object_model.source(section, key)
 
-        # Merge Enums (Key Normalization)
-        if "enums" in data:
-            for enum_name, members in data["enums"].items():
-                self.object_model["enums"][enum_name.lower()] = members
+    def member_source(self, class_name, member_name):
+        """Name of the model layer that supplied member `member_name`
+        of class `class_name`, or None."""
+        return self.object_model["classes"].member_source(class_name.lower(), member_name.lower())
 
-    def get_global(self, name):
-        return self.object_model["globals"].get(name.lower())
+    def get_enum_members(self, name):
+        """Lower-cased member name → value for enum `name`, or None."""
+        return self.object_model["enums"].members(name.lower())
 
-    def get_class(self, name):
-        return self.object_model["classes"].get(name.lower())
+    def find_enum_member(self, name):
+        """(enum name, value) of the model enum member called `name`,
+        or None. Case-insensitive; backed by a reverse index."""
+        return self.object_model["enums"].find_member(name.lower())
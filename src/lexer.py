@@ -1,4 +1,8 @@
+import mmap
 import re
+from array import array
+from bisect import bisect_left, bisect_right
+from functools import lru_cache
 
 
 # VBA accepts a wide variety of date / time literal formats and
@@ -137,12 +141,39 @@ _MONTH_NAME_TO_NUM = {
 }
 
 
+# Canonical keys for case-insensitive comparison. VBA names and
+# keywords are compared without regard to case everywhere, so the
+# lower-casing is done once here rather than at every comparison in the
+# parser and analyzer. The memo is an LRU: spellings come from the code
+# being analysed, and a long-lived worker must not keep every one of
+# them for good.
+KEY_CACHE_SIZE = 1 << 15
+
+
+@lru_cache(maxsize=KEY_CACHE_SIZE)
+def identifier_key(text):
+    """`text` lower-cased, memoised per spelling."""
+    return text.lower()
+
+
+# Kinds whose key is lower-cased; for literals and comments it is the
+# value itself (no keyword or operator can equal one either way).
+_KEYED = frozenset({'IDENTIFIER', 'BRACKET_IDENTIFIER', 'PREPROCESSOR', 'OPERATOR'})
+
+
 class Token:
+    # Slotted: a module lexes to tens of thousands of these, and they
+    # are only ever read after creation.
+    __slots__ = ("type", "value", "line", "column", "key")
+
     def __init__(self, type, value, line, column):
         self.type = type
         self.value = value
         self.line = line
         self.column = column
+        # Compare `key` against lower-case literals (`tok.key == 'end'`)
+        # instead of calling `value.lower()`.
+        self.key = identifier_key(value) if type in _KEYED else value
 
     def __repr__(self):
         return f"Token({self.type}, {repr(self.value)}, Line:{self.line})"
@@ -171,7 +202,289 @@ class LexerError:
         }
 
 
+# Token patterns, tried in order (first alternative wins). The order
+# puts the most frequent tokens first — identifiers, operators and
+# newlines are ~90% of a typical module — so most positions match on
+# the first few alternatives; the comments note which orderings are
+# load-bearing. Whitespace is not a token of its own: every pattern is
+# matched after an optional run of blanks (see `_MASTER_PAT`), so
+# indentation and the gaps between tokens cost no extra match.
+# Identifiers may carry the legacy String type-suffix `$` directly
+# appended (`Mid$`, `Left$`, `Trim$`, `Format$`, …). Bracket-quoted
+# identifiers (`[A1]`, `[Sheet1!A1]`) are VBA's foreign-name escape
+# used heavily in Excel/host integration.
+_TOKEN_SPECS = [
+    # Line continuation — `_` must be preceded by whitespace, but
+    # VBA tolerates trailing whitespace (and an inline `'` comment
+    # is technically permitted before the newline; we keep it
+    # simple and only swallow whitespace). The look-behind sees the
+    # blanks the shared prefix consumed. Must precede IDENTIFIER,
+    # which would otherwise take the `_`.
+    ('LINE_CONTINUATION', r'(?<=[ \t])_[ \t]*(?:\r\n?|\n)'),
+    # Identifier may carry a legacy single-character type suffix:
+    # $ → String, % → Integer, @ → Currency.
+    # &, !, # are already used as operators / preprocessor / date
+    # markers and stay tokenised separately to keep disambiguation
+    # simple — the analyzer's _normalize_identifier is permissive
+    # about the suffixes it strips.
+    ('IDENTIFIER', r'[a-zA-Z_]\w*[$%@]?'),
+    # `.` and `&` only when they cannot start a literal (`.5E3`, `&HFF`,
+    # `&O17`); those fall through to FLOAT / HEX / OCTAL below, with the
+    # plain operator as the last resort.
+    ('OPERATOR', r'<>|<=|>=|:=|[+\-*/^=<>(),:\\!]|\.(?!\d)|&(?![HO])'),
+    # CRLF, LF and a lone CR (classic Mac) all end a line, the way a
+    # file read in universal-newline mode sees them; the NEWLINE row
+    # sits on the last character of the line end.
+    ('NEWLINE', r'\r\n?|\n'),
+    ('COMMENT', r"'[^\r\n]*"),
+    ('STRING', r'"(?:""|[^"])*"'),
+    # DATELITERAL must come before PREPROCESSOR — both start with `#`
+    # and the regex engine takes the first match in the alternation,
+    # so PREPROCESSOR's `#[a-zA-Z_]\w*` would otherwise eat
+    # `#January` from `#January 1, 2020#` and leave a stray `#`.
+    ('DATELITERAL', r'\#[^#\r\n]+\#'),
+    # VBA file-number argument used by I/O statements:
+    #   Open path For Binary As #1
+    #   Print #1, "x" / Put #1, , buf / Close #1
+    # Numeric file-numbers start with `#<digit>+`; lexically
+    # absent variants (`#fileVar`) already match PREPROCESSOR.
+    ('FILENUMBER', r'#\d+'),
+    ('PREPROCESSOR', r'#[a-zA-Z_]\w*'),
+    # Numeric literals may carry a trailing legacy type-suffix:
+    # & Long, % Integer, # Double, ! Single, @ Currency, $ String
+    # (rarely on numeric, but harmless to allow).
+    ('HEX', r'&H[0-9A-Fa-f]+[&%@!#]?'),
+    ('OCTAL', r'&O[0-7]+[&%@!#]?'),
+    ('FLOAT', r'(?:(?:\d+\.\d*|\.\d+|\d+)[eEdD][+\-]?\d+|\d+\.\d+)[#!@]?'),
+    ('INTEGER', r'\d+[&%@!#]?'),
+    ('OPERATOR', r'[&.]'),
+    ('BRACKET_IDENTIFIER', r'\[[^\]\r\n]*\]'),
+    # Never a blank: the prefix already took those, and giving one
+    # back must not turn it into an error.
+    ('MISMATCH', r'[^ \t\n]'),
+]
+
+# Compiled once at import; every Lexer shares it. Group `i` is
+# `_TOKEN_SPECS[i - 1]`; the trailing group only matches blanks at the
+# very end of the input.
+_MASTER_PAT = re.compile(
+    r'[ \t]*(?:' + '|'.join('(%s)' % pattern for _, pattern in _TOKEN_SPECS) + r')|([ \t]+)',
+    re.IGNORECASE,
+)
+
+# The same pattern for bytes sources (a mapped file, see
+# `Lexer.from_file`). Sources are latin-1, one byte per character, so
+# offsets carry over unchanged; only `\w` needs spelling out, as bytes
+# patterns give it the ASCII meaning and str patterns the Unicode one.
+_LATIN1_WORD = '[%s]' % ''.join(re.escape(chr(b)) for b in range(256) if re.match(r'\w', chr(b)))
+
+
+def latin1_bytes_pattern(pattern):
+    """The compiled str regex `pattern` for latin-1 bytes, matching
+    what it matches in the decoded text: `\\w` and `\\b` are spelled out,
+    and only the `re.IGNORECASE` flag carries over."""
+    source = pattern.pattern.replace(r'\b', r'(?:(?<!\w)(?=\w)|(?<=\w)(?!\w))')
+    return re.compile(
+        source.replace(r'\w', _LATIN1_WORD).encode('latin-1'),
+        pattern.flags & re.IGNORECASE,
+    )
+
+
+_MASTER_PAT_BYTES = latin1_bytes_pattern(_MASTER_PAT)
+
+# Token kinds as small ints, for `TokenBuffer.kinds`. Code 0 is EOF,
+# which no pattern produces.
+TOKEN_KINDS = ('EOF', *dict.fromkeys(kind for kind, _ in _TOKEN_SPECS if kind != 'MISMATCH'))
+KIND_CODES = {kind: code for code, kind in enumerate(TOKEN_KINDS)}
+
+# Dispatch table indexed by `match.lastindex`: the kind code for groups
+# stored as-is, 0 for the few that need handling.
+_SPECIAL = {'LINE_CONTINUATION', 'NEWLINE', 'DATELITERAL', 'PREPROCESSOR', 'MISMATCH'}
+_EMIT = (0, *[0 if kind in _SPECIAL else KIND_CODES[kind] for kind, _ in _TOKEN_SPECS], 0)
+_GROUP = {kind: i for i, (kind, _) in enumerate(_TOKEN_SPECS, 1) if kind in _SPECIAL}
+_NEWLINE = _GROUP['NEWLINE']
+_LINE_CONTINUATION = _GROUP['LINE_CONTINUATION']
+_DATELITERAL = _GROUP['DATELITERAL']
+_PREPROCESSOR = _GROUP['PREPROCESSOR']
+_MISMATCH = _GROUP['MISMATCH']
+_NEWLINE_CODE = KIND_CODES['NEWLINE']
+_DATELITERAL_CODE = KIND_CODES['DATELITERAL']
+_PREPROCESSOR_CODE = KIND_CODES['PREPROCESSOR']
+
+
+class TokenBuffer:
+    """A lexed module stored column-wise.
+
+    One row per token: its kind code (`TOKEN_KINDS`), the start / end
+    offsets of its text in `source` and its line — the kinds in a
+    `bytearray` (whose `append` is the cheapest in the lexer's loop),
+    the rest in typed `array`s: 13 bytes a token, where a `Token` with
+    its value string costs around ten times that. `bases[line]` is the offset just before
+    that line starts, so columns are `start - bases[line]`; a NEWLINE
+    row's text is the `\\n` that ends the line and it always sits in
+    column 1 of the next.
+
+    Values are sliced from `source` on demand — and decoded as latin-1
+    when `source` is bytes (a mapped file). Indexing a row returns a
+    fresh `Token`, so code written against token lists (the parser) can
+    take a buffer unchanged; `kind()` / `value()` / `line()` read one
+    column without building one.
+
+    `directives` lists the rows of the PREPROCESSOR tokens, recorded
+    while lexing: the preprocessor only visits those, and a module
+    without any needs no preprocessing at all.
+    """
+
+    __slots__ = ("source", "kinds", "starts", "ends", "lines", "bases", "directives")
+
+    def __init__(self, source, kinds, starts, ends, lines, bases, directives):
+        self.source = source
+        self.kinds = kinds
+        self.starts = starts
+        self.ends = ends
+        self.lines = lines
+        self.bases = bases
+        self.directives = directives
+
+    def __len__(self):
+        return len(self.kinds)
+
+    def __getitem__(self, i):
+        kind = self.kinds[i]
+        line = self.lines[i]
+        if kind == _NEWLINE_CODE:
+            return Token('NEWLINE', '\n', line, 1)
+        start = self.starts[i]
+        value = self.source[start:self.ends[i]]
+        if value.__class__ is not str:
+            value = str(value, 'latin-1')
+        return Token(TOKEN_KINDS[kind], value, line, start - self.bases[line])
+
+    def __iter__(self):
+        return self.iter_rows(0, len(self.kinds))
+
+    def iter_rows(self, first, stop):
+        """Tokens of rows `first` to `stop`, built in one loop."""
+        source = self.source
+        bases = self.bases
+        names = TOKEN_KINDS
+        decoded = isinstance(source, str)
+        for kind, start, end, line in zip(
+            self.kinds[first:stop], self.starts[first:stop], self.ends[first:stop], self.lines[first:stop]
+        ):
+            if kind == _NEWLINE_CODE:
+                yield Token('NEWLINE', '\n', line, 1)
+            elif decoded:
+                yield Token(names[kind], source[start:end], line, start - bases[line])
+            else:
+                yield Token(names[kind], str(source[start:end], 'latin-1'), line, start - bases[line])
+
+    def kind(self, i):
+        return TOKEN_KINDS[self.kinds[i]]
+
+    def value(self, i):
+        value = self.source[self.starts[i]:self.ends[i]]
+        return value if value.__class__ is str else str(value, 'latin-1')
+
+    def line(self, i):
+        return self.lines[i]
+
+    def has_kind(self, kind):
+        return KIND_CODES[kind] in self.kinds
+
+
+class TokenView:
+    """Some rows of a `TokenBuffer` — what the preprocessor leaves
+    active — without copying them.
+
+    The rows are given as ascending, disjoint `(start, stop)` ranges;
+    row `i` of the view is found by bisecting their running offsets,
+    and sequential reads (the parser's) stay in the range of the last
+    one. Indexing returns a fresh `Token`, like the buffer's.
+    """
+
+    __slots__ = ("buffer", "firsts", "offsets", "_k")
+
+    def __init__(self, buffer, ranges):
+        self.buffer = buffer
+        # First buffer row of each range, and the view index it is at;
+        # `offsets` ends with the view's length.
+        self.firsts = array('I', [start for start, _ in ranges] or [0])
+        offsets = array('I', [0])
+        for start, stop in ranges:
+            offsets.append(offsets[-1] + stop - start)
+        if len(offsets) == 1:
+            offsets.append(0)
+        self.offsets = offsets
+        self._k = 0
+
+    @property
+    def ranges(self):
+        offsets = self.offsets
+        return [
+            (first, first + offsets[k + 1] - offsets[k])
+            for k, first in enumerate(self.firsts)
+            if offsets[k + 1] > offsets[k]
+        ]
+
+    def row(self, i):
+        """The buffer row of view index `i`."""
+        offsets = self.offsets
+        k = self._k
+        if not offsets[k] <= i < offsets[k + 1]:
+            if i < 0:
+                i += offsets[-1]
+            if not 0 <= i < offsets[-1]:
+                raise IndexError('TokenView index out of range')
+            k = self._k = bisect_right(offsets, i) - 1
+        return self.firsts[k] + i - offsets[k]
+
+    def __len__(self):
+        return self.offsets[-1]
+
+    def __getitem__(self, i):
+        return self.buffer[self.row(i)]
+
+    def __iter__(self):
+        buffer = self.buffer
+        for start, stop in self.ranges:
+            yield from buffer.iter_rows(start, stop)
+
+    def kind(self, i):
+        return self.buffer.kind(self.row(i))
+
+    def value(self, i):
+        return self.buffer.value(self.row(i))
+
+    def line(self, i):
+        return self.buffer.lines[self.row(i)]
+
+    def has_kind(self, kind):
+        code = KIND_CODES[kind]
+        kinds = self.buffer.kinds
+        return any(code in kinds[start:stop] for start, stop in self.ranges)
+
+
+def _date_literal_error(value, line, column):
+    """VBA_LEX002 for a `#…#` literal whose contents aren't a date / time."""
+    # Strip surrounding `#` and validate the contents.
+    inner = value[1:-1] if len(value) >= 2 else value
+    if _is_valid_vba_date_literal(inner):
+        return None
+    err = LexerError(value, line, column)
+    err.message = (
+        f"Invalid date literal {value!r} at line {line}, "
+        f"column {column}: not a recognised VBA date / time "
+        f"format."
+    )
+    err.rule_id = "VBA_LEX002"
+    return err
+
+
 class Lexer:
+    token_specs = _TOKEN_SPECS
+    master_pat = _MASTER_PAT
+
     def __init__(self, code):
         self.code = code
         self.pos = 0
@@ -179,92 +492,206 @@ class Lexer:
         self.column = 1
         self.errors = []
 
-        # Regex patterns
-        # Identifiers may carry the legacy String type-suffix `$` directly
-        # appended (`Mid$`, `Left$`, `Trim$`, `Format$`, …). Bracket-quoted
-        # identifiers (`[A1]`, `[Sheet1!A1]`) are VBA's foreign-name escape
-        # used heavily in Excel/host integration.
-        self.token_specs = [
-            ('COMMENT', r"'.*"),
-            ('STRING', r'"(""|[^"])*"'),
-            # DATELITERAL must come before PREPROCESSOR — both start with `#`
-            # and the regex engine takes the first match in the alternation,
-            # so PREPROCESSOR's `#[a-zA-Z_]\w*` would otherwise eat
-            # `#January` from `#January 1, 2020#` and leave a stray `#`.
-            ('DATELITERAL', r'\#[^#\r\n]+\#'),
-            # VBA file-number argument used by I/O statements:
-            #   Open path For Binary As #1
-            #   Print #1, "x" / Put #1, , buf / Close #1
-            # Numeric file-numbers start with `#<digit>+`; lexically
-            # absent variants (`#fileVar`) already match PREPROCESSOR.
-            ('FILENUMBER', r'#\d+'),
-            ('PREPROCESSOR', r'#[a-zA-Z_]\w*'),
-            # Numeric literals may carry a trailing legacy type-suffix:
-            # & Long, % Integer, # Double, ! Single, @ Currency, $ String
-            # (rarely on numeric, but harmless to allow).
-            ('HEX', r'&H[0-9A-Fa-f]+[&%@!#]?'),
-            ('OCTAL', r'&O[0-7]+[&%@!#]?'),
-            ('FLOAT', r'(?:(?:\d+\.\d*|\.\d+|\d+)[eEdD][+\-]?\d+|\d+\.\d+)[#!@]?'),
-            ('INTEGER', r'\d+[&%@!#]?'),
-            # Line continuation — `_` must be preceded by whitespace, but
-            # VBA tolerates trailing whitespace (and an inline `'` comment
-            # is technically permitted before the newline; we keep it
-            # simple and only swallow whitespace).
-            ('LINE_CONTINUATION', r'[ \t]+_[ \t]*(\r\n|\n)'),
-            ('NEWLINE', r'(\r\n|\n)'), # Removed : from newline
-            ('SKIP', r'[ \t]+'),
-            ('OPERATOR', r'<>|<=|>=|:=|[+\-*/^=&<>\(\)\.,:\\!]'), # Added : \ ! to operator
-            ('BRACKET_IDENTIFIER', r'\[[^\]\r\n]*\]'),
-            # Identifier may carry a legacy single-character type suffix:
-            # $ → String, % → Integer, @ → Currency.
-            # &, !, # are already used as operators / preprocessor / date
-            # markers and stay tokenised separately to keep disambiguation
-            # simple — the analyzer's _normalize_identifier is permissive
-            # about the suffixes it strips.
-            ('IDENTIFIER', r'[a-zA-Z_]\w*[$%@]?'),
-            ('MISMATCH', r'.'),
-        ]
-
-        # Compile regex
-        self.master_pat = re.compile('|'.join('(?P<%s>%s)' % pair for pair in self.token_specs), re.IGNORECASE)
+    @classmethod
+    def from_file(cls, path):
+        """A lexer over the file at `path`, mapped read-only and lexed as
+        latin-1 bytes: nothing is read or decoded up front, and token
+        values are decoded one at a time as they are used."""
+        with open(path, 'rb') as fh:
+            try:
+                code = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                code = b''  # an empty file cannot be mapped
+        return cls(code)
 
     def tokenize(self):
-        for mo in self.master_pat.finditer(self.code):
-            kind = mo.lastgroup
-            value = mo.group()
-
-            if kind == 'LINE_CONTINUATION':
-                self.line += 1
-                self.column = 1
-                continue # Skip it entirely
-            elif kind == 'NEWLINE':
-                self.line += 1
-                self.column = 1
-                yield Token(kind, '\n', self.line, self.column)
-                continue
-            elif kind == 'SKIP':
-                self.column += len(value)
-                continue
-            elif kind == 'MISMATCH':
+        yield from self.tokenize_buffer()
+
+    def tokenize_buffer(self):
+        """Lex the whole module into a `TokenBuffer` (ending in EOF)."""
+        bases = array('q', (0, -1))
+        kinds, starts, ends, lines, directives, _ = self._scan(self.code, 0, 1, -1, bases, self.errors)
+        return TokenBuffer(self.code, kinds, starts, ends, lines, bases, directives)
+
+    def relex(self, buffer, start, end, text):
+        """Replace `code[start:end]` with `text` and re-lex only what the
+        edit touches.
+
+        `buffer` is the lexer's current buffer. Lexing restarts after
+        the last newline before `start` — the start of the logical line,
+        as a continued line has no NEWLINE row — and stops at the first
+        newline past the edit after which the old rows resume, so that
+        the tail is reused with its offsets and lines shifted. Updates
+        `code` and `errors` and returns `(new_buffer, (first, old_stop,
+        new_stop))`: rows `first:new_stop` of the new buffer replace
+        rows `first:old_stop` of the old one.
+        """
+        source = buffer.source
+        if not 0 <= start <= end <= len(source):
+            raise ValueError(f"Edit range {start}:{end} outside a {len(source)}-character module")
+        if not isinstance(source, str):
+            text = text.encode('latin-1')
+        code = source[:start] + text + source[end:]
+        delta = len(text) - (end - start)
+        old_kinds, old_starts, old_lines = buffer.kinds, buffer.starts, buffer.lines
+
+        # Restart after the last NEWLINE row before the edit. A `"` the
+        # lexer could not close scanned on to the end of the module, so
+        # an edit anywhere after one can change how its line lexes:
+        # restart no later than that line.
+        # A lone CR right before the edit may become half of a CRLF, so
+        # its line is lexed again too.
+        probe = start - 1 if source[start - 1:start] in ('\r', b'\r') else start
+        first = _line_start(old_kinds, bisect_left(old_starts, probe))
+        quote = next((e for e in self.errors if e.char == '"'), None)
+        if quote is not None and first and quote.line < old_lines[first - 1]:
+            k = bisect_left(old_lines, quote.line)
+            if old_kinds[k] == _NEWLINE_CODE and old_lines[k] == quote.line:
+                first = k + 1
+            else:
+                first = _line_start(old_kinds, k)
+        if first:
+            line, base = old_lines[first - 1], old_starts[first - 1]
+        else:
+            line, base = 1, -1
+
+        def resumes(offset):
+            # True when the old lexer also started a line at `offset`
+            # (in old coordinates) after the edit.
+            old = offset - delta
+            if old < end:
+                return False
+            k = bisect_left(old_starts, old - 1)
+            return k < len(old_kinds) and old_starts[k] == old - 1 and old_kinds[k] == _NEWLINE_CODE
+
+        bases = buffer.bases[:line + 1]
+        errors = []
+        kinds, starts, ends, lines, directives, resumed = self._scan(code, base + 1, line, base, bases, errors, resumes)
+
+        if resumed:
+            old_stop = bisect_left(old_starts, starts[-1] - delta) + 1
+            old_line = old_lines[old_stop - 1]
+            shift = lines[-1] - old_line
+            tail = slice(old_stop, None)
+            kinds += old_kinds[tail]
+            starts += _shifted(old_starts[tail], delta)
+            ends += _shifted(buffer.ends[tail], delta)
+            lines += _shifted(old_lines[tail], shift)
+            bases += _shifted(buffer.bases[old_line + 1:], delta)
+            self.line += shift
+            errors.extend(_moved(e, shift) for e in self.errors if e.line >= old_line)
+        else:
+            old_stop = len(old_kinds)
+        self.errors = [e for e in self.errors if e.line < line] + errors
+
+        new_stop = first + len(kinds) - (len(old_kinds) - old_stop)
+        self.code = code
+        head = slice(0, first)
+        old_directives = buffer.directives
+        new = TokenBuffer(
+            code,
+            old_kinds[head] + kinds,
+            old_starts[head] + starts,
+            buffer.ends[head] + ends,
+            old_lines[head] + lines,
+            bases,
+            old_directives[:bisect_left(old_directives, first)]
+            + _shifted(directives, first)
+            + _shifted(old_directives[bisect_left(old_directives, old_stop):], new_stop - old_stop),
+        )
+        return new, (first, old_stop, new_stop)
+
+    def _scan(self, code, pos, line, base, bases, errors, resumes=None):
+        """Lex `code` from `pos`, the start of line `line` (`base` being
+        the offset just before it), into fresh columns; line starts are
+        appended to `bases` and lexer errors to `errors`.
+
+        Runs to the end and appends the EOF row — unless `resumes` is
+        given and returns true for the offset after some NEWLINE, where
+        it stops with that NEWLINE as the last row. Returns the four
+        columns, the rows of the PREPROCESSOR tokens and whether it
+        stopped early.
+        """
+        kinds, starts, ends, lines = bytearray(), array('I'), array('I'), array('I')
+        directives = array('I')
+        add_kind, add_start, add_end, add_line = kinds.append, starts.append, ends.append, lines.append
+        emit = _EMIT
+        pattern = self.master_pat if isinstance(code, str) else _MASTER_PAT_BYTES
+        for mo in pattern.finditer(code, pos):
+            idx = mo.lastindex
+            kind = emit[idx]
+            if kind:
+                start, end = mo.span(idx)
+                add_kind(kind)
+                add_start(start)
+                add_end(end)
+                add_line(line)
+            elif idx == _NEWLINE:
+                line += 1
+                base = mo.end() - 1
+                bases.append(base)
+                add_kind(_NEWLINE_CODE)
+                add_start(base)
+                add_end(base + 1)
+                add_line(line)
+                if resumes is not None and resumes(base + 1):
+                    return kinds, starts, ends, lines, directives, True
+            elif idx == _LINE_CONTINUATION:
+                # Skip it entirely; the next token starts a new line.
+                line += 1
+                base = mo.end() - 1
+                bases.append(base)
+            elif idx == _PREPROCESSOR:
+                start, end = mo.span(idx)
+                directives.append(len(kinds))
+                add_kind(_PREPROCESSOR_CODE)
+                add_start(start)
+                add_end(end)
+                add_line(line)
+            elif idx == _MISMATCH:
                 # Don't drop silently: capture so callers can surface the error
                 # instead of silently producing a garbage token stream.
-                self.errors.append(LexerError(value, self.line, self.column))
-                self.column += len(value)
-                continue
-            elif kind == 'DATELITERAL':
-                # Strip surrounding `#` and validate the contents.
-                inner = value[1:-1] if len(value) >= 2 else value
-                if not _is_valid_vba_date_literal(inner):
-                    err = LexerError(value, self.line, self.column)
-                    err.message = (
-                        f"Invalid date literal {value!r} at line {self.line}, "
-                        f"column {self.column}: not a recognised VBA date / time "
-                        f"format."
-                    )
-                    err.rule_id = "VBA_LEX002"
-                    self.errors.append(err)
-
-            yield Token(kind, value, self.line, self.column)
-            self.column += len(value)
-
-        yield Token('EOF', '', self.line, self.column)
+                errors.append(LexerError(_text(mo[idx]), line, mo.start(idx) - base))
+            elif idx == _DATELITERAL:
+                start, end = mo.span(idx)
+                err = _date_literal_error(_text(code[start:end]), line, start - base)
+                if err is not None:
+                    errors.append(err)
+                add_kind(_DATELITERAL_CODE)
+                add_start(start)
+                add_end(end)
+                add_line(line)
+
+        self.line = line
+        self.column = len(code) - base
+        add_kind(0)
+        add_start(len(code))
+        add_end(len(code))
+        add_line(line)
+        return kinds, starts, ends, lines, directives, False
+
+
+def _text(value):
+    return value if isinstance(value, str) else str(value, 'latin-1')
+
+
+def _line_start(kinds, row):
+    """The row just after the last NEWLINE row before `row` (or 0)."""
+    while row and kinds[row - 1] != _NEWLINE_CODE:
+        row -= 1
+    return row
+
+
+def _shifted(column, delta):
+    if not delta:
+        return column
+    return array(column.typecode, [v + delta for v in column])
+
+
+def _moved(err, shift):
+    """`err` moved down `shift` lines (its message names the line)."""
+    if not shift:
+        return err
+    if err.rule_id == "VBA_LEX002":
+        return _date_literal_error(err.char, err.line + shift, err.column)
+    return LexerError(err.char, err.line + shift, err.column)
@@ -3,12 +3,30 @@ import json
 import os
 import sys
 
-from colorama import Fore, Style, init
-
 from . import __version__
-from .api import precheck
 
-init(autoreset=True)
+
+class _NoColor:
+    """Stand-in for colorama's `Fore` / `Style`: every code is empty."""
+
+    def __getattr__(self, name):
+        return ""
+
+
+# Bound by _init_colors() when main() starts.
+Fore = Style = _NoColor()
+
+
+def _init_colors():
+    """Bind `Fore` / `Style`. colorama strips every code from a stream
+    that is not a terminal anyway, so when neither stdout nor stderr is
+    one (CI, pre-commit hooks, pipes) the import is skipped."""
+    global Fore, Style
+    if not (sys.stdout.isatty() or sys.stderr.isatty()):
+        return
+    from colorama import Fore, Style, init
+
+    init(autoreset=True)
 
 
 def _color_for_severity(sev):
@@ -36,7 +54,113 @@ def _emit(quiet, *args, **kwargs):
         print(*args, **kwargs)
 
 
+def _parse_defines(define_str):
+    """Parse `--define 'WIN64=True,VBA7=True'` into a defines dict."""
+    defines = {}
+    if define_str:
+        for pair in define_str.split(","):
+            if "=" in pair:
+                k, v = pair.split("=", 1)
+                low = v.strip().lower()
+                if low == "true":
+                    defines[k.strip().upper()] = True
+                elif low == "false":
+                    defines[k.strip().upper()] = False
+                else:
+                    defines[k.strip().upper()] = v.strip()
+    return defines
+
+
+def _model_main(argv):
+    """`vbalidator model prune|verify|warm|store …` — project-specific
+    pruned models, the compiled-model cache and the bundled `.vbm` stores."""
+    parser = argparse.ArgumentParser(
+        prog="vbalidator model",
+        description="Build and check project-specific pruned object models.",
+    )
+    sub = parser.add_subparsers(dest="command", required=True)
+    prune_p = sub.add_parser(
+        "prune",
+        help="Scan a project and write the minimal model it needs.",
+    )
+    verify_p = sub.add_parser(
+        "verify",
+        help="Exit non-zero when the project uses model symbols a pruned model lacks.",
+    )
+    for sp in (prune_p, verify_p):
+        sp.add_argument("input_path", help="Path to a VBA file or a folder containing them.")
+        sp.add_argument("--host", help="Bundled host model to prune (e.g. excel).")
+        sp.add_argument("--model", help="Custom JSON model to prune as well.")
+        sp.add_argument("--define", help="Conditional compilation constants, e.g. 'WIN64=True,VBA7=True'")
+    prune_p.add_argument(
+        "-o", "--output",
+        default="vba_model.pruned.json",
+        help="Where to write the pruned model (default: vba_model.pruned.json). "
+             "Pass it with --model in CI instead of --host.",
+    )
+    verify_p.add_argument("--pruned", required=True, help="The pruned model to check.")
+    sub.add_parser(
+        "warm",
+        help="Compile every bundled model into the model cache (e.g. while building an image).",
+    )
+    sub.add_parser(
+        "store",
+        help="Build a memory-mapped .vbm store next to every bundled model "
+             "(needs write access to the installed package, e.g. while building an image).",
+    )
+
+    args = parser.parse_args(argv)
+    if args.command == "store":
+        from .model_layers import build_bundled_stores
+
+        stores = build_bundled_stores()
+        print(f"{Fore.CYAN}Model stores  : {Style.RESET_ALL}{stores[0].parent} ({len(stores)} models)")
+        return 0
+    if args.command == "warm":
+        from .model_cache import cache_dir
+        from .model_layers import warm_bundled_models
+
+        root = cache_dir()
+        if root is None:
+            print(Fore.RED + "Error: the model cache is disabled (VBALIDATOR_NO_CACHE).", file=sys.stderr)
+            return 2
+        warmed = warm_bundled_models()
+        print(f"{Fore.CYAN}Model cache   : {Style.RESET_ALL}{root} ({len(warmed)} models)")
+        return 0
+
+    from .model_prune import prune, verify
+
+    if not os.path.exists(args.input_path):
+        print(Fore.RED + f"Error: input path '{args.input_path}' does not exist.", file=sys.stderr)
+        return 2
+    if not args.host and not args.model:
+        print(Fore.RED + "Error: nothing to prune; pass --host and/or --model.", file=sys.stderr)
+        return 2
+    defines = _parse_defines(args.define)
+
+    if args.command == "prune":
+        pruned = prune(args.input_path, args.output, host=args.host, model_path=args.model, defines=defines)
+        counts = ", ".join(f"{len(pruned.get(s, {}))} {s}" for s in ("classes", "globals", "enums"))
+        print(f"{Fore.CYAN}Pruned model  : {Style.RESET_ALL}{args.output} ({counts})")
+        return 0
+
+    missing = verify(args.input_path, args.pruned, host=args.host, model_path=args.model, defines=defines)
+    if not missing:
+        print(f"{Fore.GREEN}{args.pruned} covers every model symbol the project uses.")
+        return 0
+    print(Fore.RED + f"{args.pruned} is missing model symbols the project now uses:", file=sys.stderr)
+    for section, names in missing.items():
+        print(f"  {section}: {', '.join(names)}", file=sys.stderr)
+    print("Re-run `vbalidator model prune` to refresh it.", file=sys.stderr)
+    return 1
+
+
 def main():
+    _init_colors()
+    argv = sys.argv[1:]
+    if len(argv) >= 2 and argv[0] == "model" and argv[1] in ("prune", "verify", "warm", "store"):
+        sys.exit(_model_main(argv[1:]))
+
     parser = argparse.ArgumentParser(
         description="VBAlidator — VBA static analyser & compile-safety prechecker"
     )
@@ -54,6 +178,17 @@ def main():
         "--define",
         help="Conditional compilation constants, e.g. 'WIN64=True,VBA7=True'",
     )
+    parser.add_argument(
+        "--define-matrix",
+        action="append",
+        metavar="DEFINES",
+        help="Analyse once per conditional-compilation configuration, "
+             "e.g. `--define-matrix WIN64=True --define-matrix "
+             "WIN64=False,VBA7=False`. Repeat for each configuration; "
+             "each is applied on top of --define. Files are lexed once "
+             "and only modules whose active code differs are re-parsed. "
+             "Every issue lists the configurations it occurs in.",
+    )
     parser.add_argument(
         "--model",
         help="Path to a custom JSON object model definition file.",
@@ -61,7 +196,7 @@ def main():
     parser.add_argument(
         "--host",
         choices=[
-            "excel", "word", "access", "outlook", "visio",
+            "auto", "excel", "word", "access", "outlook", "visio",
             "mscomctl", "msforms",
             "scripting", "vbscript_regexp", "wscript_shell", "shell_application",
         ],
@@ -78,7 +213,10 @@ def main():
              "`MSForms.X`, or a `.frm` referencing ComctlLib) — explicit "
              "`--host <name>` is rarely needed. Outlook is a minimal "
              "hand-curated stub (the COM/TLB path is GPO-blocked on most "
-             "managed installs).",
+             "managed installs). `--host auto` picks the Office host from "
+             "host-specific identifiers in the code (`ActiveWorkbook`, "
+             "`ActiveDocument`, `DoCmd`, `ActivePage`, …) and loads no host "
+             "model for host-agnostic code.",
     )
     parser.add_argument(
         "--output",
@@ -133,31 +271,33 @@ def main():
         )
         sys.exit(2)
 
-    defines = {}
-    if args.define:
-        for pair in args.define.split(","):
-            if "=" in pair:
-                k, v = pair.split("=", 1)
-                low = v.strip().lower()
-                if low == "true":
-                    defines[k.strip().upper()] = True
-                elif low == "false":
-                    defines[k.strip().upper()] = False
-                else:
-                    defines[k.strip().upper()] = v.strip()
+    defines = _parse_defines(args.define)
 
     _emit(args.quiet, Fore.CYAN + f"VBAlidator: scanning {args.input_path}"
           + (f" (host={args.host})" if args.host else ""))
 
+    from .api import precheck, precheck_matrix
+
     try:
-        result = precheck(
-            args.input_path,
-            host=args.host,
-            model_path=args.model,
-            defines=defines,
-            strict=args.strict,
-            roundtrip=args.roundtrip,
-        )
+        if args.define_matrix:
+            result = precheck_matrix(
+                args.input_path,
+                [_parse_defines(c) for c in args.define_matrix],
+                host=args.host,
+                model_path=args.model,
+                defines=defines,
+                strict=args.strict,
+                roundtrip=args.roundtrip,
+            )
+        else:
+            result = precheck(
+                args.input_path,
+                host=args.host,
+                model_path=args.model,
+                defines=defines,
+                strict=args.strict,
+                roundtrip=args.roundtrip,
+            )
     except Exception as exc:  # surface unexpected pipeline failures
         print(Fore.RED + f"Pipeline error: {exc}", file=sys.stderr)
         import traceback
@@ -173,6 +313,8 @@ def main():
                 f"{sev_color}{issue.get('severity','error').upper()}{Style.RESET_ALL}  "
                 f"{Fore.WHITE}[{issue.get('rule_id','VBA000')}]  "
                 f"{issue.get('message','')}"
+                + (f"  ({'; '.join(issue['configurations'])})"
+                   if len(issue.get("configurations", ())) < len(result.configurations) else "")
             )
 
         s = result.json()["summary"]
@@ -184,6 +326,9 @@ def main():
         print(f"{Fore.CYAN}Info          : {Fore.WHITE}{s['info']}")
         print(f"{Fore.CYAN}Confidence    : {score_color}{result.score} / 100"
               f"  {'(compile-safe)' if result.compile_safe else '(needs fixes)'}")
+        for c in result.configurations:
+            print(f"{Fore.CYAN}  {c['name']}: {_color_for_score(c['score'])}{c['score']} / 100"
+                  f"  {'(compile-safe)' if c['compile_safe'] else '(needs fixes)'}")
 
     # JSON output is always written — the file is the primary product, the
     # stdout summary is decorative. Failure to write the file is a hard
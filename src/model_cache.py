@@ -0,0 +1,363 @@
+"""On-disk cache of compiled object models.
+
+Decoding the bundled host models with `json.load` dominates the
+latency of a small precheck: `models/excel.json` alone is 3.2 MB and
+`Config` used to re-decode it on every call. `load_compiled_model()`
+parses a model file once, normalises it into the shape the analyser
+consumes (lower-cased section keys, case-insensitive duplicate classes
+merged, references de-duplicated) and pickles that result into the
+user cache directory. Later loads read the pickle back instead.
+
+Class definitions are stored as one pickle per class and only
+unpickled the first time a class is looked up (`LazyClasses`): the
+name index is all the analyser needs up front, and a typical module
+touches a few dozen of excel.json's ~1,000 classes.
+
+Cache entries are keyed by the SHA-256 of the model file's bytes plus
+the package version, cache format and pickle protocol, so editing a model or
+upgrading vbalidator invalidates the entry transparently. Anything
+that goes wrong on the cache path — unreadable directory, truncated or
+corrupt pickle, read-only filesystem — falls back to the JSON file,
+which stays the single source of truth.
+
+Environment
+-----------
+`VBALIDATOR_CACHE_DIR`
+    Override the cache location (default: the platform's per-user
+    cache directory, e.g. `~/.cache/vbalidator`).
+`VBALIDATOR_NO_CACHE`
+    Set to `1` to neither read nor write cache entries.
+
+The cache directory is created user-private (mode 0700): entries are
+pickles and must only ever be written by the same user who reads them.
+Because `VBALIDATOR_CACHE_DIR` may point at a directory that already
+exists, an entry is only unpickled when both it and its directory
+belong to the current user and nobody else may write to them; anything
+else is treated as a miss.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import pickle
+import stat
+import sys
+from collections.abc import Mapping
+from pathlib import Path
+
+_PROTOCOL = pickle.HIGHEST_PROTOCOL
+# Bump whenever the pickled layout changes so stale entries miss.
+_FORMAT = 4
+_SECTIONS = ("globals", "classes", "enums", "references", "extends")
+
+
+def cache_dir() -> Path | None:
+    """Return the directory compiled models are cached in, or None when
+    caching is disabled via `VBALIDATOR_NO_CACHE`."""
+    if os.environ.get("VBALIDATOR_NO_CACHE", "").strip() not in ("", "0"):
+        return None
+    override = os.environ.get("VBALIDATOR_CACHE_DIR")
+    if override:
+        return Path(override)
+    if sys.platform == "win32":
+        base = os.environ.get("LOCALAPPDATA") or os.path.expanduser(r"~\AppData\Local")
+        return Path(base) / "vbalidator" / "Cache"
+    if sys.platform == "darwin":
+        return Path.home() / "Library" / "Caches" / "vbalidator"
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+    return Path(base) / "vbalidator"
+
+
+def compile_model(data) -> dict:
+    """Validate a decoded model and normalise it into the compiled form.
+
+    Keys of `globals`, `classes` and `enums` are lower-cased. Classes
+    whose names differ only by case are merged member-wise (later
+    members win), the same way layering two model files merges them.
+    `extends` (base models to load first) is kept as a tuple of names.
+    Raises `ValueError` for anything that is not a model.
+    """
+    if not isinstance(data, dict):
+        raise ValueError("Model must be a JSON object.")
+
+    valid_sections = {"globals", "classes", "enums", "references"}
+    if not any(k in data for k in valid_sections):
+        raise ValueError(f"Model file must contain at least one of the following sections: {', '.join(valid_sections)}")
+
+    compiled = {}
+    if "globals" in data:
+        compiled["globals"] = {name.lower(): defn for name, defn in data["globals"].items()}
+
+    if "classes" in data:
+        classes = {}
+        for cls_name, cls_def in data["classes"].items():
+            lower_name = cls_name.lower()
+            existing = classes.get(lower_name)
+            if existing is None:
+                classes[lower_name] = cls_def
+            elif "members" in cls_def:
+                merged = dict(existing.get("members", {}))
+                merged.update(cls_def["members"])
+                classes[lower_name] = {**existing, "members": merged}
+        compiled["classes"] = classes
+
+    if "references" in data:
+        refs = []
+        seen = set()
+        for ref in data["references"]:
+            if ref["name"] not in seen:
+                refs.append(ref)
+                seen.add(ref["name"])
+        compiled["references"] = refs
+
+    if "enums" in data:
+        compiled["enums"] = {name.lower(): members for name, members in data["enums"].items()}
+
+    if "extends" in data:
+        extends = data["extends"]
+        if not isinstance(extends, list) or not all(isinstance(base, str) for base in extends):
+            raise ValueError("Model `extends` must be a list of model file names.")
+        compiled["extends"] = tuple(extends)
+
+    return compiled
+
+
+class Interner:
+    """Flyweight table for model definitions.
+
+    The generated host models repeat the same small definitions
+    thousands of times — every dispinterface carries `Application` /
+    `Creator` / `Parent` as `{"type": "Variant"}`, identical `args`
+    lists recur across classes, and the Office enums appear in every
+    host. Passing definitions through an `Interner` returns one shared
+    object per distinct value: strings go through `sys.intern`, lists
+    become tuples, and equal dicts / tuples collapse to the first one
+    seen. The results are shared, so callers must treat them as
+    read-only (the analyser never mutates model definitions).
+    """
+
+    __slots__ = ("_table",)
+
+    def __init__(self):
+        self._table = {}
+
+    def __len__(self):
+        return len(self._table)
+
+    def __call__(self, value, _seen=None):
+        t = type(value)
+        if t is str:
+            return sys.intern(value)
+        if t is not dict and t is not list and t is not tuple:
+            return value
+        # `_seen` maps id → canonical for containers already visited in
+        # this pass: a cached model is already shared within its file,
+        # so a whole-section pass only does real work once per object.
+        if _seen is not None:
+            done = _seen.get(id(value))
+            if done is not None:
+                return done[1]
+        if t is dict:
+            items = [(sys.intern(k), self(v, _seen)) for k, v in value.items()]
+            key = (dict, tuple([(k, _identity(v)) for k, v in items]))
+            shared = self._table.get(key)
+            if shared is None:
+                shared = self._table.setdefault(key, dict(items))
+        else:
+            values = tuple([self(v, _seen) for v in value])
+            key = (tuple, tuple([_identity(v) for v in values]))
+            shared = self._table.get(key)
+            if shared is None:
+                shared = self._table.setdefault(key, values)
+        if _seen is not None:
+            _seen[id(value)] = (value, shared)  # keep `value` alive so its id stays unique
+        return shared
+
+    def class_def(self, cls_def):
+        """Intern a class definition member by member. The class and
+        its `members` dict are (nearly always) unique, so only their
+        contents are shared; keeping them out of the table keeps its
+        keys small."""
+        out = {}
+        for key, value in cls_def.items():
+            if key == "members" and type(value) is dict:
+                out["members"] = {sys.intern(name): self(defn) for name, defn in value.items()}
+            else:
+                out[sys.intern(key)] = self(value)
+        return out
+
+    def section(self, section):
+        """Intern every value of a `globals` / `enums` section."""
+        seen = {}
+        return {sys.intern(key): self(value, seen) for key, value in section.items()}
+
+
+def _identity(value):
+    # Children are already canonical, so containers compare by identity;
+    # scalars by (type, value) so that 1, 1.0 and True stay distinct.
+    t = type(value)
+    if t is dict or t is tuple:
+        return id(value)
+    return (t, value)
+
+
+class LazyClasses(Mapping):
+    """The `classes` section of a compiled model, with every class
+    definition kept pickled until it is first looked up.
+
+    Membership, iteration and `len()` only touch the name index; the
+    decoded definition is memoised, so repeated lookups return the same
+    dict. Layers are shared process-wide, and hydrating a class is
+    idempotent, so concurrent first lookups at worst decode twice.
+
+    The blobs are unpickled, so they must be trusted: either pickled in
+    this process by `from_classes`, or read by `_read_cache` from an
+    entry that passed its ownership and permission check.
+    """
+
+    __slots__ = ("_blobs", "_hydrated", "interner")
+
+    def __init__(self, blobs: dict[str, bytes], interner: Interner | None = None):
+        self._blobs = blobs
+        self._hydrated = {}
+        self.interner = interner
+
+    @classmethod
+    def from_classes(cls, classes: dict) -> "LazyClasses":
+        return cls({name: pickle.dumps(defn, protocol=_PROTOCOL) for name, defn in classes.items()})
+
+    def __getitem__(self, key):
+        defn = self._hydrated.get(key)
+        if defn is None:
+            # B301: pickled in-process or read from an ownership-checked entry.
+            defn = pickle.loads(self._blobs[key])  # nosec B301
+            if self.interner is not None:
+                defn = self.interner.class_def(defn)
+            defn = self._hydrated.setdefault(key, defn)
+        return defn
+
+    def __contains__(self, key):
+        return key in self._blobs
+
+    def __iter__(self):
+        return iter(self._blobs)
+
+    def __len__(self):
+        return len(self._blobs)
+
+    @property
+    def hydrated(self) -> int:
+        """Number of classes decoded so far."""
+        return len(self._hydrated)
+
+
+def _cache_key(raw: bytes) -> str:
+    from . import __version__
+
+    h = hashlib.sha256()
+    h.update(f"vbalidator-{__version__}-f{_FORMAT}-p{_PROTOCOL}\0".encode())
+    h.update(raw)
+    return h.hexdigest()
+
+
+def _cache_path(filepath, key: str) -> Path | None:
+    root = cache_dir()
+    if root is None:
+        return None
+    stem = Path(filepath).stem
+    return root / "models" / f"{stem}-{key[:40]}.pickle"
+
+
+def _private(st: os.stat_result) -> bool:
+    """True when `st` belongs to the current user and neither its group
+    nor anyone else may write to it."""
+    getuid = getattr(os, "getuid", None)
+    if getuid is None:
+        # Windows: no POSIX owners; the default location lives in the
+        # per-user profile, which its ACL already keeps private.
+        return True
+    return st.st_uid == getuid() and not st.st_mode & (stat.S_IWGRP | stat.S_IWOTH)
+
+
+def _read_cache(path: Path):
+    try:
+        with open(path, "rb") as fh:
+            # Checked on the open file, so it cannot be swapped after
+            # the check; a planted or shared entry is never unpickled.
+            if not (_private(os.fstat(fh.fileno())) and _private(os.stat(path.parent))):
+                return None
+            # B301: the entry and its directory are user-private (checked above).
+            compiled = pickle.load(fh)  # nosec B301
+    except Exception:
+        # Missing, truncated, written by an incompatible interpreter, …
+        # — every failure means "recompile from JSON".
+        return None
+    if not isinstance(compiled, dict) or not set(compiled) <= set(_SECTIONS):
+        return None
+    if "classes" in compiled:
+        if not isinstance(compiled["classes"], dict):
+            return None
+        compiled["classes"] = LazyClasses(compiled["classes"])
+    return compiled
+
+
+def _write_cache(path: Path, compiled: dict) -> None:
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True, mode=0o700)
+        if not _private(os.stat(path.parent)):
+            return  # `_read_cache` would never trust what is written here
+        import tempfile  # write path only; keeps it off the cache-hit start-up
+
+        fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=".tmp-", suffix=".pickle")
+        try:
+            with os.fdopen(fd, "wb") as fh:
+                if "classes" in compiled:
+                    compiled = {**compiled, "classes": compiled["classes"]._blobs}
+                pickle.dump(compiled, fh, protocol=_PROTOCOL)
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+    except OSError:
+        # Read-only home, full disk, … — the cache is an optimisation,
+        # never a reason to fail the analysis.
+        pass
+
+
+def load_compiled_model(filepath, interner: Interner | None = None, *, with_key: bool = False):
+    """Return the compiled form of the model file at `filepath`,
+    served from the on-disk cache when a fresh entry exists. The
+    `classes` section is a `LazyClasses` mapping. With an `interner`,
+    globals and enums are interned right away and each class as it is
+    hydrated. With `with_key`, return `(key, compiled)` instead, where
+    `key` is the content hash the cache entry is filed under."""
+    with open(filepath, "rb") as fh:
+        raw = fh.read()
+
+    key = _cache_key(raw)
+    path = _cache_path(filepath, key)
+    compiled = _read_cache(path) if path is not None else None
+    if compiled is None:
+        compiled = compile_model(json.loads(raw))
+        if "classes" in compiled:
+            compiled["classes"] = LazyClasses.from_classes(compiled["classes"])
+        if path is not None:
+            # Written interned, so the pickle shares repeats within the
+            # file and reads back smaller and faster.
+            local = Interner()
+            _write_cache(path, {
+                name: local.section(value) if name in ("globals", "enums") else value
+                for name, value in compiled.items()
+            })
+
+    if interner is not None:
+        for section in ("globals", "enums"):
+            if section in compiled:
+                compiled[section] = interner.section(compiled[section])
+        if "classes" in compiled:
+            compiled["classes"].interner = interner
+    return (key, compiled) if with_key else compiled
+
+
+__all__ = ["Interner", "LazyClasses", "cache_dir", "compile_model", "load_compiled_model"]
@@ -0,0 +1,509 @@
+"""Immutable object-model layers and the read-only view `Config` builds
+from them.
+
+A `ModelLayer` is one compiled model file (std_model, excel, mscomctl,
+a project's `vba_model.json`, …). Layers are never mutated once built,
+so the bundled ones are loaded at most once per process and shared by
+every `Config` through the registry below — an agent worker running
+thousands of prechecks decodes `excel.json` once, not once per call.
+
+`LayeredModel` stacks layers and answers the same questions the old
+merged `object_model` dict did (`["globals"]`, `.get("classes", {})`,
+`"references" in …`) by walking the stack top-down. Per-call models
+(`model_path=`, an auto-detected `vba_model.json`) are pushed as an
+overlay on top of the shared layers instead of being merged into them.
+"""
+from __future__ import annotations
+
+import os
+import threading
+import time
+from collections.abc import Mapping
+from pathlib import Path
+
+from .model_cache import Interner, load_compiled_model
+from .model_store import MTIME_SLACK_NS, fresh_store_for, is_store, open_store, write_store
+
+_PACKAGE_DIR = Path(__file__).resolve().parent
+
+
+class ModelLayer:
+    """One compiled model file. Treat every attribute as read-only."""
+
+    def __init__(self, name, compiled, path=None, fingerprint=None):
+        self.name = name
+        self.path = path
+        # Content hash of the file the layer was loaded from (the key
+        # its compiled-cache entry or `.vbm` store is filed under):
+        # equal fingerprints mean equal contents, so derived data (e.g.
+        # the analyser's model scope) can be shared between separately
+        # loaded copies. None for layers built in memory.
+        self.fingerprint = fingerprint
+        self.globals = compiled.get("globals", {})
+        self.classes = compiled.get("classes", {})
+        self.enums = compiled.get("enums", {})
+        # None (not []) when the file has no `references` section, so
+        # the view can keep the "section only exists when some layer
+        # declared it" behaviour of the old merged dict.
+        self.references = compiled.get("references")
+        # Base model files (relative to `path`) to load below this one.
+        self.extends = compiled.get("extends", ())
+        self._member_indexes = {}
+        self._enum_maps = {}
+        self._enum_reverse = None
+
+    def enum_members(self, enum_key):
+        """Lower-cased member name → value for this layer's enum `enum_key`."""
+        members = self._enum_maps.get(enum_key)
+        if members is None:
+            members = {}
+            for name, value in self.enums[enum_key].items():
+                members.setdefault(name.lower(), value)
+            members = self._enum_maps.setdefault(enum_key, members)
+        return members
+
+    def enum_member_names(self, enum_key):
+        """Member names of this layer's enum `enum_key`, as declared. A
+        `.vbm` store lists them without decoding the enum's record."""
+        member_names = getattr(self.enums, "member_names", None)
+        if member_names is not None:
+            return member_names(enum_key)
+        return self.enums[enum_key]
+
+    def enum_member_index(self):
+        """Reverse index over every enum of this layer: lower-cased member
+        name → (enum key, value). The first enum declaring a name wins."""
+        index = self._enum_reverse
+        if index is None:
+            index = {}
+            for enum_key, members in self.enums.items():
+                for name, value in members.items():
+                    index.setdefault(name.lower(), (enum_key, value))
+            self._enum_reverse = index
+        return index
+
+    def member_index(self, class_key):
+        """Member index of this layer's class `class_key` (see
+        `build_member_index`), built on first use and shared by every
+        view the layer is part of."""
+        index = self._member_indexes.get(class_key)
+        if index is None:
+            index = self._member_indexes.setdefault(class_key, build_member_index(self.classes[class_key]))
+        return index
+
+    def __repr__(self):
+        return f"ModelLayer({self.name!r})"
+
+
+_PROCEDURE_KINDS = frozenset(("Sub", "Function", "Property", "Event"))
+
+
+def build_member_index(cls_def) -> dict:
+    """Map each lower-cased member name of `cls_def` to the
+    `(type, kind, definition)` a member-chain hop resolves to.
+
+    Host models commonly encode the *kind* in `type` (Sub / Function /
+    Property) and the actual return type in `returns`; such members
+    resolve to `returns` (or Variant when absent) with kind
+    'Procedure', everything else to its `type` with kind 'Expression'.
+    When member names collide case-insensitively the first one wins,
+    as the linear scan this replaces did.
+    """
+    index = {}
+    for name, m_def in cls_def.get("members", {}).items():
+        key = name.lower()
+        if key in index:
+            continue
+        raw_type = m_def.get("type", "Variant")
+        if raw_type in _PROCEDURE_KINDS:
+            index[key] = (m_def.get("returns") or "Variant", "Procedure", m_def)
+        else:
+            index[key] = (raw_type, "Expression", m_def)
+    return index
+
+
+# Flip off to measure the un-interned footprint (tools/bench_model_memory.py).
+INTERN_MODELS = True
+
+
+def load_layer(filepath, interner: Interner | None = None) -> ModelLayer:
+    """Build a fresh, unshared layer for `filepath`.
+
+    A `.vbm` store (given directly, or a fresh sibling of a `.json`
+    model) is memory-mapped; anything else goes through the compiled
+    cache. Definitions are interned through `interner` (a fresh one
+    per call by default, so repeats within the file are shared).
+    """
+    if interner is None and INTERN_MODELS:
+        interner = Interner()
+    store = filepath if is_store(filepath) else fresh_store_for(filepath)
+    if store:
+        fingerprint, compiled = open_store(store, interner, with_key=True)
+    else:
+        fingerprint, compiled = load_compiled_model(filepath, interner, with_key=True)
+    return ModelLayer(Path(filepath).stem, compiled, path=str(filepath), fingerprint=fingerprint)
+
+
+_REGISTRY: dict[tuple, ModelLayer] = {}
+_REGISTRY_LOCK = threading.Lock()
+# Shared by every bundled layer, so definitions repeated across hosts
+# (the Office library in excel/word/visio, VBA/stdole everywhere) are
+# held once per process. Per-call overlays get their own table so a
+# long-running process doesn't accumulate their definitions.
+_SHARED_INTERNER = Interner()
+
+
+def _is_bundled(path: str) -> bool:
+    try:
+        return Path(path).is_relative_to(_PACKAGE_DIR)
+    except ValueError:  # pragma: no cover — different drives on Windows
+        return False
+
+
+def get_layer(filepath) -> ModelLayer:
+    """Return the layer for `filepath`.
+
+    Bundled models (std_model + `models/*.json`) ship with the package
+    and are immutable for the life of the process, so they come from
+    the process-wide registry. Any other file is a per-call overlay and
+    is loaded fresh every time (still through the on-disk compiled
+    cache, whose content-hash key keeps edits visible).
+    """
+    path = os.path.realpath(filepath)
+    if not _is_bundled(path):
+        return load_layer(path)
+    st = os.stat(path)
+    key = (path, st.st_mtime_ns, st.st_size)
+    layer = _REGISTRY.get(key)
+    if layer is None:
+        with _REGISTRY_LOCK:
+            layer = _REGISTRY.get(key)
+            if layer is None:
+                layer = load_layer(path, _SHARED_INTERNER if INTERN_MODELS else None)
+                for stale in [k for k in _REGISTRY if k[0] == path]:
+                    del _REGISTRY[stale]
+                _REGISTRY[key] = layer
+    return layer
+
+
+def clear_registry() -> None:
+    """Forget every shared layer (tests, long-lived hosts after an upgrade)."""
+    global _SHARED_INTERNER
+    with _REGISTRY_LOCK:
+        _REGISTRY.clear()
+        _SHARED_INTERNER = Interner()
+
+
+
+def bundled_model_paths() -> list[Path]:
+    """`std_model.json` and every bundled `models/*.json`."""
+    return [_PACKAGE_DIR / "std_model.json", *sorted((_PACKAGE_DIR / "models").glob("*.json"))]
+
+
+def warm_bundled_models() -> list[Path]:
+    """Compile every bundled model into the on-disk cache (a no-op for
+    entries that are already fresh) and return the files covered. Run
+    once at install / image-build time so the first analysis never
+    decodes JSON."""
+    paths = bundled_model_paths()
+    for path in paths:
+        load_compiled_model(path)
+    return paths
+
+
+def build_bundled_stores() -> list[Path]:
+    """Write a `.vbm` store next to every bundled model and return the
+    stores. Run once at install / image-build time (it writes into the
+    package directory) so every worker maps the bundled models instead
+    of decoding them."""
+    paths = bundled_model_paths()
+    # Stores written right after the models were installed couldn't be
+    # validated by mtime alone; wait until they can.
+    wait_ns = max(os.stat(path).st_mtime_ns for path in paths) + MTIME_SLACK_NS - time.time_ns()
+    if wait_ns > 0:
+        time.sleep(min(wait_ns, MTIME_SLACK_NS) / 1e9)
+    return [write_store(path) for path in paths]
+
+_MISSING = object()
+
+
+class _Chain(Mapping):
+    """Read-only lookup of one section across `layers` (ordered top →
+    bottom); the first layer holding a key wins. Iteration follows load
+    order (bottom layer first), matching the insertion order of the old
+    merged dict."""
+
+    section = "globals"
+    # A `ModelUsage` (see model_prune) notified of every key hit, or None.
+    usage = None
+
+    def __init__(self, layers):
+        self._layers = layers
+        self._maps = [getattr(layer, self.section) for layer in layers] or [{}]
+
+    def _note(self, key):
+        if self.usage is not None:
+            self.usage.note(self.section, key)
+
+    def source(self, key):
+        """Name of the layer that supplies `key`, or None."""
+        for layer, m in zip(self._layers, self._maps):
+            if key in m:
+                return layer.name
+        return None
+
+    def sources(self, key):
+        """Names of every layer declaring `key`, in load order."""
+        return tuple(layer.name for layer, m in zip(reversed(self._layers), reversed(self._maps)) if key in m)
+
+    def keys_with_source(self):
+        """Iterate `(key, layer name)` in load order without decoding
+        any value (lazy class definitions stay pickled)."""
+        return ((key, layer.name) for key, layer in self.keys_with_layer())
+
+    def keys_with_layer(self):
+        """Like `keys_with_source`, but yield the supplying layer itself."""
+        if len(self._layers) == 1:
+            layer = self._layers[0]
+            return ((key, layer) for key in self._maps[0])
+        owner = {}
+        for layer, m in zip(reversed(self._layers), reversed(self._maps)):
+            for key in m:
+                owner[key] = layer
+        return iter(owner.items())
+
+    def __getitem__(self, key):
+        for m in self._maps:
+            if key in m:
+                self._note(key)
+                return m[key]
+        raise KeyError(key)
+
+    def get(self, key, default=None):
+        for m in self._maps:
+            if key in m:
+                self._note(key)
+                return m[key]
+        return default
+
+    def __contains__(self, key):
+        for m in self._maps:
+            if key in m:
+                self._note(key)
+                return True
+        return False
+
+    def __iter__(self):
+        if len(self._maps) == 1:
+            return iter(self._maps[0])
+        keys = {}
+        for m in reversed(self._maps):
+            keys.update(dict.fromkeys(m))
+        return iter(keys)
+
+    def __len__(self):
+        if len(self._maps) == 1:
+            return len(self._maps[0])
+        return sum(1 for _ in self)
+
+    def __bool__(self):
+        return any(self._maps)
+
+
+class _ClassChain(_Chain):
+    """Like `_Chain`, but a class declared by several layers resolves to
+    the lowest declaration with every layer's `members` merged on top —
+    the semantics `Config.load_model` always had, computed on demand
+    into a view-local cache instead of by mutating shared dicts."""
+
+    section = "classes"
+
+    def __init__(self, layers):
+        super().__init__(layers)
+        self._merged = {}
+        self._indexes = {}
+
+    def member_index(self, key):
+        """Case-insensitive member index of class `key`, or None when no
+        layer declares it. A class owned by a single layer reuses that
+        layer's shared index; a merged class gets a view-local one."""
+        index = self._indexes.get(key)
+        if index is None:
+            owners = [layer for layer in self._layers if key in layer.classes]
+            if not owners:
+                return None
+            if len(owners) == 1:
+                index = owners[0].member_index(key)
+            else:
+                index = build_member_index(self[key])
+            self._indexes[key] = index
+        self._note(key)
+        return index
+
+    def member_source(self, key, member):
+        """Name of the layer that supplied member `member` (lower-cased)
+        of class `key`, or None when the class has no such member."""
+        index = self.member_index(key)
+        hit = index.get(member) if index else None
+        if hit is None:
+            return None
+        for layer in self._layers:
+            if key in layer.classes:
+                own = layer.member_index(key).get(member)
+                if own is not None and own[2] is hit[2]:
+                    return layer.name
+        return None
+
+    def __getitem__(self, key):
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def get(self, key, default=None):
+        merged = self._merged.get(key, _MISSING)
+        if merged is not _MISSING:
+            self._note(key)
+            return merged
+        defs = [m[key] for m in self._maps if key in m]
+        if not defs:
+            return default
+        self._note(key)
+        if len(defs) == 1:
+            return defs[0]
+        base = defs[-1]
+        members = None
+        for upper in reversed(defs[:-1]):
+            if "members" in upper:
+                if members is None:
+                    members = dict(base.get("members", {}))
+                members.update(upper["members"])
+        merged = base if members is None else {**base, "members": members}
+        self._merged[key] = merged
+        return merged
+
+
+class _EnumChain(_Chain):
+    """`_Chain` over the `enums` sections, plus the case-insensitive
+    member lookups the analyser needs. Both reuse the per-layer indexes,
+    so they are built once per process for the bundled models."""
+
+    section = "enums"
+
+    def members(self, key):
+        """Lower-cased member map of enum `key` as declared by the top-most
+        layer that has it, or None when no layer does."""
+        for layer in self._layers:
+            if key in layer.enums:
+                self._note(key)
+                return layer.enum_members(key)
+        return None
+
+    def member_names(self, key):
+        """Member names of enum `key` as declared by the top-most layer
+        that has it (see `ModelLayer.enum_member_names`), or None."""
+        for layer in self._layers:
+            if key in layer.enums:
+                return layer.enum_member_names(key)
+        return None
+
+    def find_member(self, name):
+        """(enum key, value) of the enum member called `name` (lower-cased),
+        or None. Upper layers win, like every other lookup."""
+        for layer in self._layers:
+            hit = layer.enum_member_index().get(name)
+            if hit is not None:
+                self._note(hit[0])
+                return hit
+        return None
+
+
+class LayeredModel(Mapping):
+    """Read-only stack of `ModelLayer`s, shaped like the old merged
+    `object_model` dict: sections are `globals`, `classes`, `enums`
+    and — once any layer declares them — `references`.
+
+    Every section also answers *where* a symbol came from:
+    `model.source("classes", "range")` names the layer that supplies a
+    key, `model["classes"].member_source("range", "value")` the layer a
+    member hit came from.
+    """
+
+    def __init__(self, layers=()):
+        self._layers = list(layers)
+        self._usage = None
+        self._rebuild()
+
+    def record_usage(self, usage) -> None:
+        """Notify `usage` (a `model_prune.ModelUsage`) of every later
+        globals / classes / enums hit; None stops recording."""
+        self._usage = usage
+        if usage is not None:
+            usage.layers = self.layers
+        for section in ("globals", "classes", "enums"):
+            self._sections[section].usage = usage
+
+    @property
+    def layers(self) -> tuple:
+        return tuple(self._layers)
+
+    @property
+    def fingerprint(self) -> tuple:
+        """Identifies the layer stack: two views over layers with the
+        same names and fingerprints (content hashes), in the same order,
+        answer every lookup identically and credit every hit to the same
+        layer."""
+        return tuple(
+            (layer.name, layer.fingerprint) if layer.fingerprint else layer
+            for layer in self._layers
+        )
+
+    def push(self, layer: ModelLayer) -> None:
+        """Put `layer` on top of the stack (it wins every lookup)."""
+        self._layers.append(layer)
+        self._rebuild()
+
+    def _rebuild(self):
+        top_down = self._layers[::-1]
+        sections = {
+            "globals": _Chain([layer for layer in top_down if layer.globals]),
+            "classes": _ClassChain([layer for layer in top_down if layer.classes]),
+            "enums": _EnumChain([layer for layer in top_down if layer.enums]),
+        }
+        if any(layer.references is not None for layer in self._layers):
+            refs = []
+            ref_sources = {}
+            for layer in self._layers:
+                for ref in layer.references or ():
+                    if ref["name"] not in ref_sources:
+                        refs.append(ref)
+                        ref_sources[ref["name"]] = layer.name
+            sections["references"] = tuple(refs)
+            self._ref_sources = ref_sources
+        else:
+            self._ref_sources = {}
+        self._sections = sections
+        if self._usage is not None:
+            self.record_usage(self._usage)
+
+    def source(self, section, key):
+        """Name of the layer that supplies `key` in `section` (for
+        `references`, the first layer declaring the library), or None."""
+        if section == "references":
+            return self._ref_sources.get(key)
+        return self._sections[section].source(key)
+
+    def __getitem__(self, section):
+        return self._sections[section]
+
+    def __iter__(self):
+        return iter(self._sections)
+
+    def __len__(self):
+        return len(self._sections)
+
+
+__all__ = [
+    "ModelLayer", "LayeredModel", "build_member_index", "bundled_model_paths", "get_layer", "load_layer",
+    "build_bundled_stores", "clear_registry", "warm_bundled_models",
+]
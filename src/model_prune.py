@@ -0,0 +1,166 @@
+"""Project-specific model pruning (`vbalidator model prune|verify`).
+
+Most projects touch a small fraction of a host model: a typical Excel
+add-in resolves a few dozen of `excel.json`'s ~1,000 classes. `prune`
+scans a project once against the full model, records every model
+class, global and enum the analyser actually resolved, and writes a
+minimal JSON model holding just those definitions. CI jobs then run
+with `--model pruned.json` instead of `--host excel`.
+
+Granularity is per symbol: a kept class keeps all of its members, a
+kept enum all of its values, so small edits inside already-used
+classes never need a re-prune. `verify` re-scans the project against
+the full model and reports every symbol the project now resolves that
+the pruned model lacks.
+
+Only the layers passed as sources (the `--host` model and an optional
+`--model`, plus the base models they extend) are pruned. `std_model.json` and the auto-layered companion
+stubs are always loaded anyway and are never copied into the output.
+"""
+from __future__ import annotations
+
+import json
+import os
+from pathlib import Path
+
+_SECTIONS = ("globals", "classes", "enums")
+
+
+class ModelUsage:
+    """Collects the model symbols one analysis resolved.
+
+    Attached by `Analyzer.record_model_usage()` *after* the analyser has
+    seeded its global scope, so only real resolutions are recorded.
+    Keys are the lower-cased names the compiled model uses.
+    """
+
+    def __init__(self):
+        self.globals = set()
+        self.classes = set()
+        self.enums = set()
+        self.enum_items = set()
+        self.references = set()
+        self.layers = ()
+
+    def note_symbol(self, key, sym):
+        """A global-scope symbol seeded from the model was resolved."""
+        kind = sym["kind"]
+        if kind == "Class":
+            self.classes.add(key)
+        elif kind == "Enum":
+            self.enums.add(key)
+        elif kind == "EnumItem":
+            self.enum_items.add(key)
+        elif kind == "Library":
+            self.references.add(key)
+        else:
+            self.globals.add(key)
+
+    def note(self, section, key):
+        """The object model answered a lookup of `key` in `section`."""
+        getattr(self, section).add(key)
+
+
+def _same_file(a, b) -> bool:
+    return os.path.realpath(a) == os.path.realpath(b)
+
+
+def build_pruned_model(usage: ModelUsage, sources) -> dict:
+    """Return the minimal model covering `usage`, drawn from the layers
+    whose file is one of `sources` (compiled, lower-cased keys)."""
+    layers = [layer for layer in usage.layers if layer.path and any(_same_file(layer.path, s) for s in sources)]
+    pruned = {"globals": {}, "classes": {}, "enums": {}}
+    references = []
+    for layer in layers:  # bottom-up: upper layers win, classes merge
+        for key in sorted(usage.globals):
+            if key in layer.globals:
+                pruned["globals"][key] = layer.globals[key]
+        for key in sorted(usage.classes):
+            if key in layer.classes:
+                cls_def = layer.classes[key]
+                existing = pruned["classes"].get(key)
+                if existing is None:
+                    pruned["classes"][key] = cls_def
+                elif "members" in cls_def:
+                    pruned["classes"][key] = {
+                        **existing,
+                        "members": {**existing.get("members", {}), **cls_def["members"]},
+                    }
+        enum_keys = set(usage.enums)
+        index = layer.enum_member_index() if layer.enums else {}
+        for item in usage.enum_items:
+            hit = index.get(item)
+            if hit is not None:
+                enum_keys.add(hit[0])
+        for key in sorted(enum_keys):
+            if key in layer.enums:
+                pruned["enums"][key] = layer.enums[key]
+        for ref in layer.references or ():
+            if ref["name"] not in {r["name"] for r in references}:
+                references.append(ref)
+    if references:
+        pruned["references"] = references
+    return {section: values for section, values in pruned.items() if values}
+
+
+def _scan(input_path, host, model_path, defines):
+    from .api import precheck
+
+    usage = ModelUsage()
+    result = precheck(input_path, host=host, model_path=model_path, defines=defines, model_usage=usage)
+    return usage, result
+
+
+def _sources(host, model_path):
+    from .model_layers import get_layer
+
+    sources = []
+    if host:
+        sources.append(Path(__file__).resolve().parent / "models" / f"{host.lower()}.json")
+    if model_path:
+        sources.append(Path(model_path))
+    # A source's base models (`extends`, e.g. office_core.json under the
+    # bundled hosts) are part of what it provides.
+    for source in sources:  # grows while iterating: bases of bases
+        if source.is_file():
+            for base in get_layer(source).extends:
+                if source.parent / base not in sources:
+                    sources.append(source.parent / base)
+    return sources
+
+
+def prune(input_path, output, *, host=None, model_path=None, defines=None) -> dict:
+    """Scan `input_path` and write its pruned model to `output`.
+    Returns the pruned model."""
+    usage, _ = _scan(input_path, host, model_path, defines)
+    sources = _sources(host, model_path)
+    pruned = build_pruned_model(usage, sources)
+    origin = ", ".join(Path(s).name for s in sources)
+    doc = {"_doc": f"Pruned from {origin} by `vbalidator model prune`; regenerate after `model verify` fails."}
+    with open(output, "w", encoding="utf-8") as fh:
+        json.dump({**doc, **pruned}, fh, indent=1, sort_keys=False)
+    return pruned
+
+
+def verify(input_path, pruned_path, *, host=None, model_path=None, defines=None) -> dict:
+    """Scan `input_path` against the full model and return, per section,
+    the symbols it resolves that `pruned_path` does not provide (empty
+    dict when the pruned model is still sufficient)."""
+    from .model_layers import load_layer
+
+    usage, _ = _scan(input_path, host, model_path, defines)
+    needed = build_pruned_model(usage, _sources(host, model_path))
+    have = load_layer(pruned_path)
+    missing = {}
+    for section in _SECTIONS:
+        gap = sorted(set(needed.get(section, {})) - set(getattr(have, section)))
+        if gap:
+            missing[section] = gap
+    have_refs = {r["name"] for r in have.references or ()}
+    gap = sorted(r["name"] for r in needed.get("references", ()) if r["name"] not in have_refs)
+    if gap:
+        missing["references"] = gap
+    return missing
+
+
+__all__ = ["ModelUsage", "build_pruned_model", "prune", "verify"]
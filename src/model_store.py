@@ -0,0 +1,324 @@
+"""Indexed, memory-mapped object-model store (`.vbm`).
+
+The compiled cache (`model_cache.py`) still gives every worker process
+its own decoded copy of the models it loads. A `.vbm` store is the
+alternative for deployments running many workers side by side: one
+binary file per model, opened with a read-only `mmap`, so every
+process maps the same page-cache pages and a lookup decodes only the
+record it asks for.
+
+Layout (little-endian)::
+
+    magic  b"VBMSTORE"
+    u32    header length
+    header JSON — format version, the source JSON's size, mtime and
+           SHA-256, `references`, and per section: record count, index
+           offset, sorted-order offset (`enums` also: the span of its
+           member-name table)
+    data   string table: section keys followed by their JSON records,
+           then the enum member-name table (one JSON list of name lists,
+           in entry order)
+    index  per section, `count` × (key_off, key_len, val_off, val_len)
+           in the source file's order, then `count` × u32 entry numbers
+           sorted by key for binary search
+
+Keys are stored already normalised (lower-cased, case-duplicates
+merged) by `compile_model`. Records are JSON rather than pickle: a
+store may be shared between users, and decoding it must never execute
+code.
+
+The JSON model stays the source of truth. `write_store()` (and
+`tools/build_model_store.py`) produce a store next to it; when
+`Config.load_model()` is given a `.json` whose sibling `.vbm` was built
+from exactly those bytes, the store is used instead. Freshness is
+checked against the size and mtime recorded at build time; only when
+those don't settle it is the JSON read and hashed. A `.vbm` path can
+also be passed directly (`--model my_model.vbm`).
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import mmap
+import os
+import struct
+from collections.abc import Mapping
+from pathlib import Path
+
+from .model_cache import compile_model
+
+MAGIC = b"VBMSTORE"
+STORE_SUFFIX = ".vbm"
+_FORMAT = 2
+_HEADER_LEN = struct.Struct("<I")
+_ENTRY = struct.Struct("<IIII")
+_ORDER = struct.Struct("<I")
+_STORE_SECTIONS = ("globals", "classes", "enums")
+# A source mtime is trusted only when the store was written at least
+# this long after it: an edit made within the same timestamp tick
+# (2 s on FAT) could otherwise leave size and mtime unchanged.
+MTIME_SLACK_NS = 2_000_000_000
+_decode_record = json.JSONDecoder().decode
+
+
+def is_store(filepath) -> bool:
+    """True when `filepath` starts with the `.vbm` magic."""
+    try:
+        with open(filepath, "rb") as fh:
+            return fh.read(len(MAGIC)) == MAGIC
+    except OSError:
+        return False
+
+
+def write_store(json_path, out_path=None) -> Path:
+    """Compile the JSON model at `json_path` into a `.vbm` store.
+
+    Writes next to the source (`<stem>.vbm`) unless `out_path` is
+    given, atomically, and returns the path written.
+    """
+    json_path = Path(json_path)
+    out_path = Path(out_path) if out_path else json_path.with_suffix(STORE_SUFFIX)
+    mtime_ns = os.stat(json_path).st_mtime_ns
+    raw = json_path.read_bytes()
+    compiled = compile_model(json.loads(raw))
+
+    data = bytearray()
+    sections = {}
+    tables = []
+    for name in _STORE_SECTIONS:
+        entries = []
+        for key, value in compiled.get(name, {}).items():
+            key_b = key.encode("utf-8")
+            val_b = json.dumps(value, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+            entries.append((key_b, val_b))
+        tables.append((name, entries))
+
+    # Data region first (its offset depends on the header length, which
+    # depends on the index offsets) — lay everything out relative to the
+    # start of the data region, then shift once the header is sized.
+    rel_entries = {}
+    for name, entries in tables:
+        rel = []
+        for key_b, val_b in entries:
+            key_off = len(data)
+            data += key_b
+            val_off = len(data)
+            data += val_b
+            rel.append((key_off, len(key_b), val_off, len(val_b)))
+        rel_entries[name] = rel
+    # Member names of every enum, so a scope can list them without
+    # decoding each enum's record.
+    names_b = json.dumps(
+        [list(members) for members in compiled.get("enums", {}).values()], separators=(",", ":"), ensure_ascii=False,
+    ).encode("utf-8")
+    names_rel = len(data)
+    data += names_b
+
+    index_rel = len(data)
+    layout = {}
+    for name, entries in tables:
+        count = len(entries)
+        layout[name] = (index_rel, index_rel + count * _ENTRY.size, count)
+        index_rel += count * (_ENTRY.size + _ORDER.size)
+
+    def _header(base):
+        for name, (idx, order, count) in layout.items():
+            sections[name] = {"count": count, "index": base + idx, "order": base + order}
+        sections["enums"]["names"] = [base + names_rel, len(names_b)]
+        return json.dumps({
+            "format": _FORMAT,
+            "source": {"size": len(raw), "mtime_ns": mtime_ns, "sha256": hashlib.sha256(raw).hexdigest()},
+            "sections": sections,
+            "references": compiled.get("references"),
+            "extends": list(compiled.get("extends", ())),
+        }, separators=(",", ":")).encode("utf-8")
+
+    # The header encodes absolute offsets, so its length can change with
+    # the base it is computed for; iterate until it is stable.
+    base = len(MAGIC) + _HEADER_LEN.size
+    header = _header(base)
+    while len(MAGIC) + _HEADER_LEN.size + len(header) != base:
+        base = len(MAGIC) + _HEADER_LEN.size + len(header)
+        header = _header(base)
+    if base + index_rel > 0xFFFFFFFF:
+        raise ValueError(f"Model too large for the {STORE_SUFFIX} format: {json_path}")
+
+    out = bytearray(MAGIC)
+    out += _HEADER_LEN.pack(len(header))
+    out += header
+    out += data
+    for name, entries in tables:
+        rel = rel_entries[name]
+        for key_off, key_len, val_off, val_len in rel:
+            out += _ENTRY.pack(base + key_off, key_len, base + val_off, val_len)
+        for i in sorted(range(len(rel)), key=lambda i: entries[i][0]):
+            out += _ORDER.pack(i)
+
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    import tempfile  # write path only; keeps it off the store-hit start-up
+
+    fd, tmp = tempfile.mkstemp(dir=out_path.parent, prefix=".tmp-", suffix=STORE_SUFFIX)
+    try:
+        with os.fdopen(fd, "wb") as fh:
+            fh.write(out)
+        os.replace(tmp, out_path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+    return out_path
+
+
+class StoreSection(Mapping):
+    """One section of an open store. Lookups binary-search the sorted
+    index and decode a single record; decoded records are memoised.
+    Iteration yields keys in the source file's order and remembers
+    their entry numbers, so a lookup of a key seen while iterating
+    skips the binary search."""
+
+    __slots__ = ("_mm", "_count", "_index", "_order", "_decoded", "_positions", "_intern", "_names_at", "_names")
+
+    def __init__(self, mm, count, index, order, intern=None, names=None):
+        self._mm = mm
+        self._count = count
+        self._index = index
+        self._order = order
+        self._decoded = {}
+        self._positions = {}
+        # Applied to each decoded record (see model_cache.Interner).
+        self._intern = intern
+        # (offset, length) of the member-name table (`enums` only).
+        self._names_at = names
+        self._names = None
+
+    def _entry(self, i):
+        return _ENTRY.unpack_from(self._mm, self._index + i * _ENTRY.size)
+
+    def _find(self, key):
+        """Entry number of `key`, or -1."""
+        if not isinstance(key, str):
+            return -1
+        target = key.encode("utf-8")
+        mm = self._mm
+        lo, hi = 0, self._count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            i = _ORDER.unpack_from(mm, self._order + mid * _ORDER.size)[0]
+            key_off, key_len, _, _ = self._entry(i)
+            probe = mm[key_off:key_off + key_len]
+            if probe == target:
+                return i
+            if probe < target:
+                lo = mid + 1
+            else:
+                hi = mid
+        return -1
+
+    def __getitem__(self, key):
+        value = self._decoded.get(key)
+        if value is None:
+            i = self._positions.get(key)
+            if i is None:
+                i = self._find(key)
+                if i < 0:
+                    raise KeyError(key)
+            _, _, val_off, val_len = self._entry(i)
+            value = _decode_record(self._mm[val_off:val_off + val_len].decode("utf-8"))
+            if self._intern is not None:
+                value = self._intern(value)
+            value = self._decoded.setdefault(key, value)
+        return value
+
+    def __contains__(self, key):
+        return key in self._positions or self._find(key) >= 0
+
+    def member_names(self, key):
+        """Member names of the enum `key`, in declaration order, read
+        from the name table instead of decoding the enum's record."""
+        if self._names_at is None:
+            return list(self[key])
+        i = self._positions.get(key)
+        if i is None:
+            i = self._find(key)
+            if i < 0:
+                raise KeyError(key)
+        names = self._names
+        if names is None:
+            offset, length = self._names_at
+            names = self._names = _decode_record(self._mm[offset:offset + length].decode("utf-8"))
+        return names[i]
+
+    def __iter__(self):
+        mm = self._mm
+        positions = self._positions
+        for i, (key_off, key_len, _, _) in enumerate(_ENTRY.iter_unpack(mm[self._index:self._order])):
+            key = mm[key_off:key_off + key_len].decode("utf-8")
+            positions[key] = i
+            yield key
+
+    def __len__(self):
+        return self._count
+
+
+def _read_header(fh):
+    if fh.read(len(MAGIC)) != MAGIC:
+        raise ValueError(f"Not a {STORE_SUFFIX} model store: {fh.name}")
+    (length,) = _HEADER_LEN.unpack(fh.read(_HEADER_LEN.size))
+    header = json.loads(fh.read(length))
+    if header.get("format") != _FORMAT:
+        raise ValueError(f"Unsupported {STORE_SUFFIX} format {header.get('format')!r}: {fh.name}")
+    return header
+
+
+def open_store(filepath, interner=None, *, with_key: bool = False):
+    """Map the store at `filepath` read-only and return its sections in
+    the shape `load_compiled_model()` returns. Records decoded later
+    go through `interner` (a `model_cache.Interner`) when given. With
+    `with_key`, return `(key, compiled)` instead, where `key` names the
+    store's content: its format and the source JSON's SHA-256."""
+    with open(filepath, "rb") as fh:
+        header = _read_header(fh)
+        mm = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+    compiled = {}
+    for name, sec in header["sections"].items():
+        if sec["count"]:
+            intern = None
+            if interner is not None:
+                intern = interner.class_def if name == "classes" else interner
+            compiled[name] = StoreSection(mm, sec["count"], sec["index"], sec["order"], intern, sec.get("names"))
+    if header.get("references") is not None:
+        compiled["references"] = header["references"]
+    if header.get("extends"):
+        compiled["extends"] = tuple(header["extends"])
+    if with_key:
+        return f"vbm{header['format']}-{header['source']['sha256']}", compiled
+    return compiled
+
+
+def fresh_store_for(json_path) -> Path | None:
+    """The `.vbm` sibling of `json_path` if it was built from the
+    file's current bytes, else None.
+
+    A JSON file whose size and mtime are the ones recorded at build
+    time is taken as unchanged without being read; the content hash is
+    only compared when the mtime differs (e.g. a fresh checkout) or is
+    too close to the store's own to rule out a same-tick edit."""
+    json_path = Path(json_path)
+    store = json_path.with_suffix(STORE_SUFFIX)
+    try:
+        with open(store, "rb") as fh:
+            source = _read_header(fh)["source"]
+            built_ns = os.fstat(fh.fileno()).st_mtime_ns
+        st = os.stat(json_path)
+        if st.st_size != source["size"]:
+            return None
+        if st.st_mtime_ns == source["mtime_ns"] and built_ns - st.st_mtime_ns >= MTIME_SLACK_NS:
+            return store
+        digest = hashlib.sha256(json_path.read_bytes()).hexdigest()
+    except (OSError, ValueError, KeyError, struct.error):
+        return None
+    return store if digest == source["sha256"] else None
+
+
+__all__ = [
+    "MAGIC", "MTIME_SLACK_NS", "STORE_SUFFIX", "StoreSection", "fresh_store_for", "is_store", "open_store", "write_store",
+]
@@ -1,4 +1,4 @@
-from .lexer import Token
+from .lexer import Token, identifier_key
 
 class Node:
     pass
@@ -167,6 +167,32 @@ class FormParser:
             
         return controls
 
+def _end_markers(*markers):
+    """Precompile `parse_block` end markers ("Next", "End If", …) into the
+    lookup sets it checks each statement against: keys that end the block
+    on their own, and the `X` keys of the `End X` pairs that do."""
+    keys = [identifier_key(marker).split() for marker in markers]
+    return (
+        frozenset(parts[0] for parts in keys if len(parts) == 1),
+        frozenset(parts[1] for parts in keys if len(parts) == 2 and parts[0] == 'end'),
+    )
+
+
+_PROCEDURE_ENDS = {kind: _end_markers(f"End {kind}", "End") for kind in ('sub', 'function', 'property')}
+_WEND_ENDS = _end_markers("Wend")
+_WITH_ENDS = _end_markers("End With")
+_IF_ARM_ENDS = _end_markers("Else", "ElseIf", "End If")
+_ELSE_ENDS = _end_markers("End If")
+_NEXT_ENDS = _end_markers("Next")
+_LOOP_ENDS = _end_markers("Loop")
+_CASE_ENDS = _end_markers("Case", "End Select")
+
+# Block terminators that are syntax errors wherever the enclosing block
+# does not expect them.
+_STRAY_TERMINATORS = frozenset({'next', 'loop', 'else', 'elseif', 'wend'})
+_STRAY_ENDS = frozenset({'if', 'select', 'with', 'function', 'sub', 'property'})
+
+
 class VBAParser:
     def __init__(self, tokens, filename="Unknown"):
         self.tokens = tokens
@@ -174,6 +200,12 @@ class VBAParser:
         self.pos = 0
         self.current_token = None
         self.errors = []  # collected syntax errors (dicts)
+        # Tokens are only ever read in order, one ahead of the current
+        # one, so they are pulled from an iterator: a `TokenBuffer` or
+        # `TokenView` then builds each `Token` in its bulk loop rather
+        # than through a random-access lookup per token.
+        self._rest = iter(tokens)
+        self._next = next(self._rest, None)
         self.advance()
 
     def _record_syntax_error(self, message, line=None, rule_id="VBA_SYN001"):
@@ -186,21 +218,24 @@ class VBAParser:
         })
 
     def advance(self):
-        if self.pos < len(self.tokens):
-            self.current_token = self.tokens[self.pos]
+        token = self._next
+        if token is not None:
+            self.current_token = token
+            self._next = next(self._rest, None)
             self.pos += 1
         else:
             self.current_token = Token('EOF', '', -1, -1)
 
     def peek(self):
-        if self.pos < len(self.tokens):
-            return self.tokens[self.pos]
+        token = self._next
+        if token is not None:
+            return token
         return Token('EOF', '', -1, -1)
 
     def consume(self, type_name=None, value=None):
         if type_name and self.current_token.type != type_name:
             return False
-        if value and self.current_token.value.lower() != value.lower():
+        if value and self.current_token.key != identifier_key(value):
             return False
         self.advance()
         return True
@@ -208,58 +243,35 @@ class VBAParser:
     def match(self, type_name=None, value=None):
         if type_name and self.current_token.type != type_name:
             return False
-        if value and self.current_token.value.lower() != value.lower():
+        if value and self.current_token.key != identifier_key(value):
             return False
         return True
 
+    # The parser's own keyword / operator tests: `key` is already in
+    # `Token.key` form (lower-case), so no per-call normalisation.
+    def _at(self, key, type_name='IDENTIFIER'):
+        token = self.current_token
+        return token.key == key and token.type == type_name
+
+    def _take(self, key, type_name='IDENTIFIER'):
+        token = self.current_token
+        if token.key == key and token.type == type_name:
+            self.advance()
+            return True
+        return False
+
     def parse_module(self):
         module = ModuleNode("Unknown")
-        
-        while self.current_token.type != 'EOF':
-            if self.match('IDENTIFIER', 'Attribute'):
-                self.parse_attribute(module)
-            elif self.match('IDENTIFIER', 'VERSION'):
-                # `.cls` / `.frm` file header — `VERSION 1.0 CLASS`
-                # appears before the Attribute block and isn't a
-                # language construct.
-                self.consume_statement()
-            elif self.match('IDENTIFIER', 'BEGIN'):
-                # `.cls` BEGIN…END attribute block — consume every line
-                # until a matching `END`. Cannot use consume_statement
-                # because each property line ends with NEWLINE not `:`.
-                self._consume_begin_end_block()
-            elif self.match('IDENTIFIER', 'Option'):
-                self._parse_option(module)
-            elif self.match('IDENTIFIER', 'Implements'):
-                self._parse_implements(module)
-            elif self.current_token.type == 'IDENTIFIER' and self.current_token.value.lower() in (
-                'defbool', 'defbyte', 'defint', 'deflng', 'deflnglng', 'deflngptr',
-                'defcur', 'defsng', 'defdbl', 'defdate', 'defstr', 'defobj', 'defvar',
-            ):
-                self._parse_def_type(module)
-            elif self.match('IDENTIFIER', 'Public') or self.match('IDENTIFIER', 'Private') or self.match('IDENTIFIER', 'Friend') or self.match('IDENTIFIER', 'Dim') or self.match('IDENTIFIER', 'Const') or self.match('IDENTIFIER', 'Global'):
-                self.parse_declaration(module)
-            elif self.match('IDENTIFIER', 'Sub') or self.match('IDENTIFIER', 'Function') or self.match('IDENTIFIER', 'Property'):
-                self.procedures_parse(module, 'Public') 
-            elif self.match('IDENTIFIER', 'Type'):
-                self.parse_udt(module)
-            elif self.match('IDENTIFIER', 'Event'):
-                # Handle implicit public Event
-                self.consume() # Event
-                event_name = "Unknown"
-                if self.current_token.type == 'IDENTIFIER':
-                    event_name = self.current_token.value
-                    self.advance()
-
-                proc = ProcedureNode(event_name, 'Event', scope='Public')
-                if self.match('OPERATOR', '('):
-                    self.parse_arg_list(proc)
-                self.consume_statement()
-                module.procedures.append(proc)
+        statements = self._MODULE_STATEMENTS
 
-            elif self.match('IDENTIFIER', 'Enum'):
-                self.parse_enum(module, 'Public')
-            elif self.match('NEWLINE'):
+        while self.current_token.type != 'EOF':
+            tok = self.current_token
+            # One table lookup on the statement's leading keyword instead
+            # of matching it against every keyword in turn.
+            handler = statements.get(tok.key) if tok.type == 'IDENTIFIER' else None
+            if handler is not None:
+                handler(self, module)
+            elif tok.type == 'NEWLINE':
                 self.advance()
             else:
                 # P3.5 — anything reaching this branch is a token at
@@ -273,6 +285,20 @@ class VBAParser:
 
         return module
 
+    def _parse_event(self, module):
+        # Handle implicit public Event
+        self.consume() # Event
+        event_name = "Unknown"
+        if self.current_token.type == 'IDENTIFIER':
+            event_name = self.current_token.value
+            self.advance()
+
+        proc = ProcedureNode(event_name, 'Event', scope='Public')
+        if self._at('(', 'OPERATOR'):
+            self.parse_arg_list(proc)
+        self.consume_statement()
+        module.procedures.append(proc)
+
     def _consume_begin_end_block(self):
         """Skip a `.cls` / `.frm` BEGIN…END attribute block.
 
@@ -291,10 +317,10 @@ class VBAParser:
         self.advance()  # consume BEGIN
         depth = 1
         while self.current_token.type != 'EOF' and depth > 0:
-            if self.match('IDENTIFIER', 'BEGIN'):
+            if self._at('begin'):
                 depth += 1
                 self.advance()
-            elif self.match('IDENTIFIER', 'END'):
+            elif self._at('end'):
                 depth -= 1
                 self.advance()
             else:
@@ -315,7 +341,7 @@ class VBAParser:
         # Don't double-report on tokens that are part of a control flow
         # form parsed elsewhere (End / Loop / Wend / Next at module
         # level just unwind into the catch-all branch).
-        if tok.type == 'IDENTIFIER' and tok.value.lower() in (
+        if tok.type == 'IDENTIFIER' and tok.key in (
             'end', 'loop', 'wend', 'next', 'else', 'elseif', 'case',
         ):
             return
@@ -341,7 +367,7 @@ class VBAParser:
 
     def _parse_def_type(self, module):
         """Parse `DefInt A-K, X` etc. and update module.def_type_map."""
-        keyword = self.current_token.value.lower()
+        keyword = self.current_token.key
         target_type = self._DEFTYPE_TO_TYPE.get(keyword, 'Variant')
         self.advance()  # consume DefXxx
 
@@ -350,7 +376,7 @@ class VBAParser:
                 first = self.current_token.value[0].lower()
                 last = first
                 self.advance()
-                if self.match('OPERATOR', '-'):
+                if self._at('-', 'OPERATOR'):
                     self.advance()
                     if self.current_token.type == 'IDENTIFIER' and len(self.current_token.value) >= 1:
                         last = self.current_token.value[0].lower()
@@ -361,7 +387,7 @@ class VBAParser:
                     hi = max(ord(first), ord(last))
                     for code in range(lo, hi + 1):
                         module.def_type_map[chr(code)] = target_type
-            elif self.match('OPERATOR', ','):
+            elif self._at(',', 'OPERATOR'):
                 self.advance()
             else:
                 self.advance()
@@ -373,13 +399,13 @@ class VBAParser:
         if self.current_token.type != 'IDENTIFIER':
             self.consume_statement()
             return
-        kind = self.current_token.value.lower()
+        kind = self.current_token.key
         self.advance()
         if kind == 'explicit':
             module.options['explicit'] = True
         elif kind == 'compare':
             if self.current_token.type == 'IDENTIFIER':
-                module.options['compare'] = self.current_token.value.lower()
+                module.options['compare'] = self.current_token.key
                 self.advance()
         elif kind == 'base':
             if self.current_token.type == 'INTEGER':
@@ -394,7 +420,7 @@ class VBAParser:
                 self.advance()
         elif kind == 'private':
             # `Option Private Module`
-            if self.match('IDENTIFIER', 'Module'):
+            if self._at('module'):
                 self.advance()
                 module.options['private_module'] = True
         self.consume_statement()
@@ -406,7 +432,7 @@ class VBAParser:
         while self.current_token.type == 'IDENTIFIER':
             parts.append(self.current_token.value)
             self.advance()
-            if self.match('OPERATOR', '.'):
+            if self._at('.', 'OPERATOR'):
                 parts.append('.')
                 self.advance()
             else:
@@ -424,14 +450,14 @@ class VBAParser:
             self.advance()
 
     def parse_attribute(self, module):
-        self.consume('IDENTIFIER', 'Attribute')
+        self._take('attribute')
         
         attr_name = "Unknown"
         if self.current_token.type == 'IDENTIFIER':
             attr_name = self.current_token.value
             self.advance()
             
-        self.consume('OPERATOR', '=')
+        self._take('=', 'OPERATOR')
         
         attr_value = "Unknown"
         if self.current_token.type == 'STRING':
@@ -454,7 +480,7 @@ class VBAParser:
         
         # Handle Event
         # [Public|Private|Friend] Event Name(...)
-        if self.match('IDENTIFIER', 'Event'):
+        if self._at('event'):
             self.advance()
             event_name = "Unknown"
             if self.current_token.type == 'IDENTIFIER':
@@ -463,7 +489,7 @@ class VBAParser:
 
             proc = ProcedureNode(event_name, 'Event', scope=scope)
 
-            if self.match('OPERATOR', '('):
+            if self._at('(', 'OPERATOR'):
                 self.parse_arg_list(proc)
 
             self.consume_statement()
@@ -472,21 +498,21 @@ class VBAParser:
 
         # Handle Declare
         # [Public|Private] Declare [PtrSafe] Sub/Function ...
-        if self.match('IDENTIFIER', 'Declare'):
+        if self._at('declare'):
             declare_line = self.current_token.line
             self.advance() # consume Declare
 
             # Optional PtrSafe — required on 64-bit Office hosts.
             is_ptrsafe = False
-            if self.match('IDENTIFIER', 'PtrSafe'):
+            if self._at('ptrsafe'):
                 self.advance()
                 is_ptrsafe = True
 
             proc_type = "Sub"
-            if self.match('IDENTIFIER', 'Function'):
+            if self._at('function'):
                 proc_type = "Function"
                 self.advance()
-            elif self.match('IDENTIFIER', 'Sub'):
+            elif self._at('sub'):
                 self.advance()
 
             proc_name = "Unknown"
@@ -496,7 +522,7 @@ class VBAParser:
 
             # Lib "..."
             lib_name = None
-            if self.match('IDENTIFIER', 'Lib'):
+            if self._at('lib'):
                 self.advance()
                 if self.current_token.type == 'STRING':
                     lib_name = self.current_token.value
@@ -504,7 +530,7 @@ class VBAParser:
 
             # Alias "..."
             alias_name = None
-            if self.match('IDENTIFIER', 'Alias'):
+            if self._at('alias'):
                 self.advance()
                 if self.current_token.type == 'STRING':
                     alias_name = self.current_token.value
@@ -519,11 +545,11 @@ class VBAParser:
             proc.declare_line = declare_line  # used for diagnostics
 
             # Args (...)
-            if self.match('OPERATOR', '('):
+            if self._at('(', 'OPERATOR'):
                 self.parse_arg_list(proc)
 
             # Return type
-            if self.match('IDENTIFIER', 'As'):
+            if self._at('as'):
                 self.advance()
                 proc.return_type = self.parse_type_signature()
 
@@ -531,29 +557,29 @@ class VBAParser:
             module.procedures.append(proc)
             return
 
-        if self.match('IDENTIFIER', 'Sub') or self.match('IDENTIFIER', 'Function') or self.match('IDENTIFIER', 'Property'):
+        if self._at('sub') or self._at('function') or self._at('property'):
             self.procedures_parse(module, scope)
             return
 
         # Handle 'Type' (Public Type ...)
-        if self.match('IDENTIFIER', 'Type'):
+        if self._at('type'):
             self.parse_udt(module, scope=scope)
             return
 
         # Handle 'Enum' (Public Enum ...)
-        if self.match('IDENTIFIER', 'Enum'):
+        if self._at('enum'):
             self.parse_enum(module, scope=scope)
             return
 
         # Check if Const
         is_const = False
         if scope.lower() in ('public', 'private', 'global', 'friend'):
-             if self.match('IDENTIFIER', 'Const'):
+             if self._at('const'):
                  is_const = True
                  self.advance()
 
         # Check if WithEvents
-        if self.match('IDENTIFIER', 'WithEvents'):
+        if self._at('withevents'):
             self.advance()
 
         # Dim x [(dims)] As Type [= init]
@@ -567,27 +593,27 @@ class VBAParser:
                 # `cells(0).val` resolves to the real member type instead
                 # of degrading to Variant.
                 is_array = False
-                if self.match('OPERATOR', '('):
+                if self._at('(', 'OPERATOR'):
                     is_array = True
-                    while self.current_token.type != 'EOF' and not self.match('OPERATOR', ')'):
+                    while self.current_token.type != 'EOF' and not self._at(')', 'OPERATOR'):
                         self.advance()
-                    self.consume('OPERATOR', ')')
+                    self._take(')', 'OPERATOR')
 
                 var_type = 'Variant'
-                if self.match('IDENTIFIER', 'As'):
+                if self._at('as'):
                     self.advance()
                     var_type = self.parse_type_signature()
 
                 if is_array:
                     var_type += "()"
 
-                if self.match('OPERATOR', '='):
-                     while self.current_token.type not in ('NEWLINE', 'EOF') and not self.match('OPERATOR', ','):
+                if self._at('=', 'OPERATOR'):
+                     while self.current_token.type not in ('NEWLINE', 'EOF') and not self._at(',', 'OPERATOR'):
                          self.advance()
 
                 module.variables.append(VariableNode(var_name, var_type, scope, is_const=is_const))
             
-            if self.match('OPERATOR', ','):
+            if self._at(',', 'OPERATOR'):
                 self.advance()
                 continue
             else:
@@ -597,14 +623,14 @@ class VBAParser:
 
     def parse_type_signature(self):
         # Ignore 'New' keyword if present
-        if self.match('IDENTIFIER', 'New'):
+        if self._at('new'):
             self.advance()
 
         type_parts = []
         while self.current_token.type == 'IDENTIFIER':
             type_parts.append(self.current_token.value)
             self.advance()
-            if self.match('OPERATOR', '.'):
+            if self._at('.', 'OPERATOR'):
                 self.advance()
                 type_parts.append('.')
             else:
@@ -615,7 +641,7 @@ class VBAParser:
         proc_type = self.current_token.value 
         self.advance()
         
-        if self.match('IDENTIFIER', 'Get') or self.match('IDENTIFIER', 'Let') or self.match('IDENTIFIER', 'Set'):
+        if self._at('get') or self._at('let') or self._at('set'):
             proc_type += " " + self.current_token.value
             self.advance()
             
@@ -627,10 +653,10 @@ class VBAParser:
         proc = ProcedureNode(proc_name, proc_type, scope=scope)
         
         # Args
-        if self.match('OPERATOR', '('):
+        if self._at('(', 'OPERATOR'):
             self.parse_arg_list(proc)
             
-        if self.match('IDENTIFIER', 'As'):
+        if self._at('as'):
             self.advance()
             proc.return_type = self.parse_type_signature()
             
@@ -638,16 +664,16 @@ class VBAParser:
         
         # Parse Body Block
         end_marker = proc_type.split()[0].lower() # Sub, Function, Property
-        proc.body = self.parse_block(end_markers=[f"End {end_marker}", "End"])
+        proc.body = self.parse_block(_PROCEDURE_ENDS.get(end_marker) or _end_markers(f"End {end_marker}", "End"))
 
         # Ensure we consumed End Sub/Function/Property. AI generators
         # occasionally close a Function with `End Sub` (or vice versa);
         # VBE rejects this at compile time. Surface it as VBA350 so the
         # mismatch is caught before VBE ever sees it.
-        if self.match('IDENTIFIER', 'End'):
+        if self._at('end'):
              end_line = self.current_token.line
              self.advance()
-             actual = self.current_token.value.lower() if self.current_token.type == 'IDENTIFIER' else None
+             actual = self.current_token.key if self.current_token.type == 'IDENTIFIER' else None
              if actual == end_marker:
                  self.advance()
              elif actual in ('sub', 'function', 'property'):
@@ -671,128 +697,77 @@ class VBAParser:
         module.procedures.append(proc)
 
     def parse_block(self, end_markers):
-        """Recursively parses statements until an end marker is found."""
+        """Recursively parses statements until an end marker is found.
+
+        `end_markers` is a pair of key sets built by `_end_markers`: the
+        keywords that end the block on their own (`Next`, `Else`, …) and
+        the `X` of each `End X` that does.
+        """
         nodes = []
-        
-        while self.current_token.type != 'EOF':
-            # Check for End Markers
-            if self.current_token.type == 'IDENTIFIER' and self.current_token.value.lower() == 'end':
-                # Peek to see what kind of End it is
-                peek = self.peek()
-                combined = f"End {peek.value}".lower()
-                
-                # Check if it matches an expected marker
-                for marker in end_markers:
-                    if marker.lower() == combined:
-                        return nodes
-                    if marker.lower() == 'end': # Naked End (e.g. End Select vs End) - unlikely for blocks except maybe Sub
-                         pass
+        singles, ends = end_markers
+        statements = self._BLOCK_STATEMENTS
 
-            # Also check for intermediate markers (Else, ElseIf, Loop, Next) provided in end_markers
-            # For "Next", it might be "Next i", so we need to be careful.
-            if self.current_token.type == 'IDENTIFIER':
-                val = self.current_token.value.lower()
-                # Check directly if the current token matches a marker (e.g. "Loop", "Next", "Else")
-                for marker in end_markers:
-                    parts = marker.lower().split()
-                    if parts[0] != val:
-                        continue
-                    # Multi-word markers ("End If", "End With", ...) are handled
-                    # by the dedicated `End` branch above which requires the full
-                    # two-token form. Don't prefix-match them here — that would
-                    # consume the standalone `End` *statement* (the program
-                    # terminator) and trap callers in an infinite loop when the
-                    # If/With body contains one.
-                    if len(parts) > 1:
-                        continue
-                    # Potential match.
-                    # If marker is "Next", and we have "Next i", it's a match.
-                    # If marker is "Else", and we have "Else", it's a match.
+        while self.current_token.type != 'EOF':
+            tok = self.current_token
+            if tok.type == 'IDENTIFIER':
+                val = tok.key
+                # Multi-word markers ("End If", "End With", ...) need the
+                # full two-token form. Matching only their `End` would
+                # consume the standalone `End` *statement* (the program
+                # terminator) and trap callers in an infinite loop when
+                # the If/With body contains one.
+                if val == 'end' and self.peek().key in ends:
+                    return nodes
+                # "Next" also ends the block as "Next i".
+                if val in singles:
                     return nodes
 
                 # VALIDATION: Check for unexpected block terminators
-                if val in ('next', 'loop', 'else', 'elseif', 'wend'):
+                if val in _STRAY_TERMINATORS:
                     # Found a block keyword that was NOT in end_markers -> Unexpected
                     self._record_syntax_error(
-                        f"Syntax Error: Unexpected '{self.current_token.value}'."
+                        f"Syntax Error: Unexpected '{tok.value}'."
                     )
                     # We consume it to avoid infinite loop, but it's an error
                     self.consume_statement()
                     continue
 
                 if val == 'end':
-                    peek_val = self.peek().value.lower()
-                    if peek_val in ('if', 'select', 'with', 'function', 'sub', 'property'):
+                    peek = self.peek()
+                    if peek.key in _STRAY_ENDS:
                         # Found End X that was NOT in end_markers -> Unexpected
                         self._record_syntax_error(
-                            f"Syntax Error: Unexpected 'End {self.peek().value}'."
+                            f"Syntax Error: Unexpected 'End {peek.value}'."
                         )
                         self.advance() # End
                         self.advance() # X
                         self.consume_statement()
                         continue
 
-            # Parse Statements
-            if self.match('IDENTIFIER', 'With'):
-                nodes.append(self.parse_with())
-            
-            elif self.match('IDENTIFIER', 'If'):
-                stmt = self.parse_if_stmt()
-                if stmt: nodes.append(stmt)
-            
-            elif self.match('IDENTIFIER', 'For'):
-                nodes.append(self.parse_for())
-            
-            elif self.match('IDENTIFIER', 'Do'):
-                nodes.append(self.parse_do())
-                
-            elif self.match('IDENTIFIER', 'Select'):
-                nodes.append(self.parse_select())
-
-            elif self.match('IDENTIFIER', 'While'):
-                 nodes.append(self.parse_while())
+                # Parse Statements
+                handler = statements.get(val)
+                if handler is not None:
+                    handler(self, nodes)
+                    continue
 
-            elif self.match('IDENTIFIER', 'Dim') or self.match('IDENTIFIER', 'Static'):
-                stmt = self.collect_statement()
+            # Normal Statement
+            stmt = self.collect_statement()
+            if stmt:
                 nodes.append(StatementNode(stmt))
-
-            elif self._matches_module_only_keyword():
-                # P3.5 — `Type`, `Enum`, `Declare`, `Option`, `Implements`
-                # and the `DefXxx` family are module-level-only in VBA.
-                # Flag once and consume the line so the procedure body
-                # keeps parsing.
-                self._record_proc_level_module_only(nodes)
-
-            elif self.match('IDENTIFIER', 'ReDim'):
-                nodes.append(self.parse_redim())
-
-            elif self.match('IDENTIFIER', 'Erase'):
-                nodes.append(self.parse_erase())
-
-            elif self.match('IDENTIFIER', 'Attribute'):
-                # Ignore attribute statements inside blocks
-                self.consume('IDENTIFIER', 'Attribute')
-                self.consume_statement()
-                
             else:
-                # Normal Statement
-                stmt = self.collect_statement()
-                if stmt:
-                    nodes.append(StatementNode(stmt))
-                else:
-                    if self.current_token.type == 'NEWLINE':
-                        self.advance()
+                if self.current_token.type == 'NEWLINE':
+                    self.advance()
 
         return nodes
 
     def parse_while(self):
         line = self.current_token.line
-        self.consume('IDENTIFIER', 'While')
+        self._take('while')
         condition_tokens = self.collect_statement()  # Everything until newline
 
-        body = self.parse_block(end_markers=["Wend"])
+        body = self.parse_block(_WEND_ENDS)
 
-        self.consume('IDENTIFIER', 'Wend')
+        self._take('wend')
         self.consume_statement()
 
         return DoNode(
@@ -804,17 +779,17 @@ class VBAParser:
         )
 
     def parse_with(self):
-        self.consume('IDENTIFIER', 'With')
+        self._take('with')
         expr_tokens = []
         while self.current_token.type not in ('NEWLINE', 'EOF'):
             expr_tokens.append(self.current_token)
             self.advance()
         self.consume_statement()
         
-        body = self.parse_block(end_markers=["End With"])
+        body = self.parse_block(_WITH_ENDS)
         
-        self.consume('IDENTIFIER', 'End')
-        self.consume('IDENTIFIER', 'With')
+        self._take('end')
+        self._take('with')
         self.consume_statement()
         
         return WithNode(expr_tokens, body)
@@ -823,17 +798,17 @@ class VBAParser:
         # If <condition> Then <newline> [Block]
         # If <condition> Then <statement> [Else <statement>] [newline] [Single Line]
         
-        self.consume('IDENTIFIER', 'If')
+        self._take('if')
         
         # Scavenge tokens until 'Then'
         condition_tokens = []
         while self.current_token.type != 'EOF':
-            if self.match('IDENTIFIER', 'Then'):
+            if self._at('then'):
                 break
             condition_tokens.append(self.current_token)
             self.advance()
             
-        if not self.match('IDENTIFIER', 'Then'):
+        if not self._at('then'):
              # Syntax Error: Missing Then
              self._record_syntax_error(
                  "Syntax Error: Missing 'Then' after If condition."
@@ -841,7 +816,7 @@ class VBAParser:
              self.consume_statement() # Recover
              return None
              
-        self.consume('IDENTIFIER', 'Then')
+        self._take('then')
         
         # Check for single line vs block
         if self.current_token.type == 'NEWLINE' or self.current_token.type == 'COMMENT':
@@ -850,7 +825,7 @@ class VBAParser:
              
              # Parse True Block
              # We stop at Else, ElseIf, or End If
-             true_block = self.parse_block(end_markers=["Else", "ElseIf", "End If"])
+             true_block = self.parse_block(_IF_ARM_ENDS)
              
              else_blocks = []
              else_block = None
@@ -858,31 +833,31 @@ class VBAParser:
              while True:
                  tok = self.current_token
                  if tok.type == 'IDENTIFIER':
-                     val = tok.value.lower()
+                     val = tok.key
                      
                      if val == 'elseif':
                          self.advance()
                          # Parse condition Then
                          elseif_cond = []
-                         while not self.match('IDENTIFIER', 'Then') and self.current_token.type != 'EOF':
+                         while not self._at('then') and self.current_token.type != 'EOF':
                              elseif_cond.append(self.current_token)
                              self.advance()
-                         self.consume('IDENTIFIER', 'Then')
+                         self._take('then')
                          self.consume_statement()
                          
-                         block = self.parse_block(end_markers=["Else", "ElseIf", "End If"])
+                         block = self.parse_block(_IF_ARM_ENDS)
                          else_blocks.append((elseif_cond, block))
                      
                      elif val == 'else':
                          self.advance()
                          self.consume_statement()
-                         else_block = self.parse_block(end_markers=["End If"])
+                         else_block = self.parse_block(_ELSE_ENDS)
                          # Do not break here. Let loop consume End If.
                          pass
                      
                      elif val == 'end':
                          peek = self.peek()
-                         if peek.value.lower() == 'if':
+                         if peek.key == 'if':
                              self.advance() # End
                              self.advance() # If
                              self.consume_statement()
@@ -903,7 +878,7 @@ class VBAParser:
              # analyzer walks the condition and each body statement.
              true_block = self._collect_inline_block(stop_on_else=True)
              else_block = None
-             if self.match('IDENTIFIER', 'Else'):
+             if self._at('else'):
                  self.advance()
                  else_block = self._collect_inline_block(stop_on_else=False)
 
@@ -921,11 +896,11 @@ class VBAParser:
         """
         block = []
         while self.current_token.type not in ('NEWLINE', 'EOF'):
-            if stop_on_else and self.match('IDENTIFIER', 'Else'):
+            if stop_on_else and self._at('else'):
                 break
             stmt_tokens = []
             while self.current_token.type not in ('NEWLINE', 'EOF'):
-                if stop_on_else and self.match('IDENTIFIER', 'Else'):
+                if stop_on_else and self._at('else'):
                     break
                 if self.current_token.type == 'OPERATOR' and self.current_token.value == ':':
                     stmt_tokens.append(self.current_token)
@@ -941,13 +916,13 @@ class VBAParser:
 
     def parse_for(self):
         line = self.current_token.line
-        self.consume('IDENTIFIER', 'For')
+        self._take('for')
 
         kind = 'counter'
         var_token = None
         header_tokens = []
 
-        if self.match('IDENTIFIER', 'Each'):
+        if self._at('each'):
             kind = 'each'
             self.advance()  # consume 'Each'
             if self.current_token.type == 'IDENTIFIER':
@@ -964,9 +939,9 @@ class VBAParser:
             self.advance()
         self.consume_statement()
 
-        body = self.parse_block(end_markers=["Next"])
+        body = self.parse_block(_NEXT_ENDS)
 
-        self.consume('IDENTIFIER', 'Next')
+        self._take('next')
         # Optional variable name after Next (`Next i`).
         if self.current_token.type == 'IDENTIFIER':
             self.advance()
@@ -982,12 +957,12 @@ class VBAParser:
 
     def parse_do(self):
         line = self.current_token.line
-        self.consume('IDENTIFIER', 'Do')
+        self._take('do')
 
         # Optional top-tested condition: Do While <cond>  /  Do Until <cond>
         condition_tokens = []
         condition_position = 'none'
-        if self.match('IDENTIFIER', 'While') or self.match('IDENTIFIER', 'Until'):
+        if self._at('while') or self._at('until'):
             self.advance()  # consume While/Until
             condition_position = 'top'
             while self.current_token.type not in ('NEWLINE', 'EOF'):
@@ -999,11 +974,11 @@ class VBAParser:
                 self.advance()
         self.consume_statement()
 
-        body = self.parse_block(end_markers=["Loop"])
+        body = self.parse_block(_LOOP_ENDS)
 
-        self.consume('IDENTIFIER', 'Loop')
+        self._take('loop')
         # Optional bottom-tested condition: Loop While <cond>  /  Loop Until <cond>
-        if self.match('IDENTIFIER', 'While') or self.match('IDENTIFIER', 'Until'):
+        if self._at('while') or self._at('until'):
             self.advance()
             if condition_position == 'none':
                 condition_position = 'bottom'
@@ -1025,8 +1000,8 @@ class VBAParser:
 
     def parse_select(self):
         line = self.current_token.line
-        self.consume('IDENTIFIER', 'Select')
-        self.consume('IDENTIFIER', 'Case')
+        self._take('select')
+        self._take('case')
 
         # Capture the selector expression up to NEWLINE.
         expr_tokens = []
@@ -1043,17 +1018,17 @@ class VBAParser:
                 continue
 
             # End of select?
-            if self.match('IDENTIFIER', 'End'):
-                peek_val = self.peek().value.lower() if self.peek() else ''
+            if self._at('end'):
+                peek_val = self.peek().key if self.peek() else ''
                 if peek_val == 'select':
                     break
 
-            if self.match('IDENTIFIER', 'Case'):
+            if self._at('case'):
                 self.advance()
                 is_else = False
                 header_tokens = []
 
-                if self.match('IDENTIFIER', 'Else'):
+                if self._at('else'):
                     is_else = True
                     self.advance()
                 else:
@@ -1063,7 +1038,7 @@ class VBAParser:
                 self.consume_statement()
 
                 # Body of this case ends at the next Case / End Select.
-                case_body = self.parse_block(end_markers=["Case", "End Select"])
+                case_body = self.parse_block(_CASE_ENDS)
                 cases.append(CaseClauseNode(header_tokens, case_body, is_else=is_else))
             else:
                 # Defensive: avoid infinite loop on malformed select.
@@ -1072,35 +1047,18 @@ class VBAParser:
                 )
                 self.consume_statement()
 
-        self.consume('IDENTIFIER', 'End')
-        self.consume('IDENTIFIER', 'Select')
+        self._take('end')
+        self._take('select')
         self.consume_statement()
 
         return SelectNode(expr_tokens=expr_tokens, cases=cases, line=line)
 
     # ---- P3.5 — module-only keyword detection at procedure level ----
-    # Keywords that VBA only accepts at module level. We add the `DefXxx`
-    # family at runtime via prefix match.
-    _MODULE_ONLY_KEYWORDS = {
+    # Keywords that VBA only accepts at module level, the `DefXxx` family
+    # included.
+    _MODULE_ONLY_KEYWORDS = frozenset({
         'type', 'enum', 'declare', 'option', 'implements',
-    }
-
-    def _matches_module_only_keyword(self) -> bool:
-        if self.current_token.type != 'IDENTIFIER':
-            return False
-        low = self.current_token.value.lower()
-        if low in self._MODULE_ONLY_KEYWORDS:
-            return True
-        # `DefBool`, `DefInt`, `DefStr`, … — all start with `def` and
-        # are 6+ chars; differentiate from local variable names like
-        # `defaultValue` by requiring the 4th character to be uppercase
-        # in the original source (DefInt vs default*) — too fragile,
-        # we use a hardcoded set instead.
-        return low in {
-            'defbool', 'defbyte', 'defint', 'deflng', 'deflnglng',
-            'deflngptr', 'defcur', 'defsng', 'defdbl', 'defdate',
-            'defstr', 'defobj', 'defvar',
-        }
+    }) | frozenset(_DEFTYPE_TO_TYPE)
 
     def _record_proc_level_module_only(self, nodes):
         tok = self.current_token
@@ -1126,10 +1084,10 @@ class VBAParser:
         """ReDim [Preserve] target1(dims) [As Type] [, target2(...) ...]"""
         line = self.current_token.line
         raw_tokens = []
-        self.consume('IDENTIFIER', 'ReDim')
+        self._take('redim')
 
         preserve = False
-        if self.match('IDENTIFIER', 'Preserve'):
+        if self._at('preserve'):
             preserve = True
             raw_tokens.append(self.current_token)
             self.advance()
@@ -1146,7 +1104,7 @@ class VBAParser:
             # `With X` block. We preserve the leading `.` in chain_tokens
             # so the analyzer can substitute the with-stack anchor.
             leading_dot = None
-            if self.match('OPERATOR', '.'):
+            if self._at('.', 'OPERATOR'):
                 leading_dot = self.current_token
                 raw_tokens.append(leading_dot)
                 self.advance()
@@ -1165,7 +1123,7 @@ class VBAParser:
             # ReDim targets (`ReDim This.scopes(1 To N)`) via the same
             # member-walker that powers P2.6 member-chain typing.
             chain_tokens = [leading_dot, name_token] if leading_dot else [name_token]
-            while self.match('OPERATOR', '.'):
+            while self._at('.', 'OPERATOR'):
                 dot_tok = self.current_token
                 raw_tokens.append(dot_tok)
                 chain_tokens.append(dot_tok)
@@ -1178,7 +1136,7 @@ class VBAParser:
 
             # Dimension expression in parens
             dim_tokens = []
-            if self.match('OPERATOR', '('):
+            if self._at('(', 'OPERATOR'):
                 paren_depth = 0
                 while self.current_token.type not in ('NEWLINE', 'EOF'):
                     raw_tokens.append(self.current_token)
@@ -1198,7 +1156,7 @@ class VBAParser:
 
             # Optional 'As Type'
             as_type = None
-            if self.match('IDENTIFIER', 'As'):
+            if self._at('as'):
                 raw_tokens.append(self.current_token)
                 self.advance()
                 # Capture type signature (best-effort, until comma/newline)
@@ -1213,7 +1171,7 @@ class VBAParser:
             targets.append((name_token, dim_tokens, as_type, chain_tokens))
 
             # Comma → next target on same statement
-            if self.match('OPERATOR', ','):
+            if self._at(',', 'OPERATOR'):
                 raw_tokens.append(self.current_token)
                 self.advance()
                 continue
@@ -1228,7 +1186,7 @@ class VBAParser:
         """Erase target1, target2, ..."""
         line = self.current_token.line
         raw_tokens = []
-        self.consume('IDENTIFIER', 'Erase')
+        self._take('erase')
 
         targets = []  # Either Token (bare name) or list[Token] (dotted chain).
         while self.current_token.type not in ('NEWLINE', 'EOF'):
@@ -1247,7 +1205,7 @@ class VBAParser:
                 # length 1, which keeps the existing single-name code path
                 # working unchanged.
                 chain = [first_tok]
-                while self.match('OPERATOR', '.'):
+                while self._at('.', 'OPERATOR'):
                     dot_tok = self.current_token
                     raw_tokens.append(dot_tok)
                     chain.append(dot_tok)
@@ -1262,7 +1220,7 @@ class VBAParser:
                 raw_tokens.append(self.current_token)
                 self.advance()
 
-            if self.match('OPERATOR', ','):
+            if self._at(',', 'OPERATOR'):
                 raw_tokens.append(self.current_token)
                 self.advance()
                 continue
@@ -1289,14 +1247,14 @@ class VBAParser:
         return tokens
 
     def parse_arg_list(self, proc):
-        self.consume('OPERATOR', '(')
-        while not self.match('OPERATOR', ')') and self.current_token.type != 'EOF':
+        self._take('(', 'OPERATOR')
+        while not self._at(')', 'OPERATOR') and self.current_token.type != 'EOF':
             is_optional = False
             is_paramarray = False
             mechanism = 'ByRef'
 
-            while self.match('IDENTIFIER', 'Optional') or self.match('IDENTIFIER', 'ByVal') or self.match('IDENTIFIER', 'ByRef') or self.match('IDENTIFIER', 'ParamArray'):
-                val = self.current_token.value.lower()
+            while self._at('optional') or self._at('byval') or self._at('byref') or self._at('paramarray'):
+                val = self.current_token.key
                 if val == 'optional': is_optional = True
                 if val == 'paramarray':
                     is_paramarray = True
@@ -1311,27 +1269,27 @@ class VBAParser:
 
                 is_array = False
                 # Check for array parens on name: arr()
-                if self.match('OPERATOR', '('):
+                if self._at('(', 'OPERATOR'):
                         self.advance()
-                        self.consume('OPERATOR', ')')
+                        self._take(')', 'OPERATOR')
                         is_array = True
 
                 arg_type = 'Variant'
-                if self.match('IDENTIFIER', 'As'):
+                if self._at('as'):
                     self.advance()
                     arg_type = self.parse_type_signature()
                 
                 # Check for array parens on type (rare but supported by my parser previously)
-                if self.match('OPERATOR', '('):
+                if self._at('(', 'OPERATOR'):
                         self.advance()
-                        self.consume('OPERATOR', ')')
+                        self._take(')', 'OPERATOR')
                         is_array = True
 
                 if is_array and not arg_type.endswith('()'):
                      arg_type += "()"
 
                 # Handle Default Value (= ...)
-                if self.match('OPERATOR', '='):
+                if self._at('=', 'OPERATOR'):
                     self.advance()
                     # Skip until ',' or ')'
                     while self.current_token.type != 'EOF':
@@ -1341,14 +1299,14 @@ class VBAParser:
 
                 proc.args.append(VariableNode(arg_name, arg_type, 'Local', is_optional=is_optional, is_paramarray=is_paramarray, mechanism=mechanism))
             
-            if self.match('OPERATOR', ','):
+            if self._at(',', 'OPERATOR'):
                 self.advance()
-            elif self.current_token.type != 'EOF' and not self.match('OPERATOR', ')'):
+            elif self.current_token.type != 'EOF' and not self._at(')', 'OPERATOR'):
                     self.advance()
-        self.consume('OPERATOR', ')')
+        self._take(')', 'OPERATOR')
 
     def parse_udt(self, module, scope='Public'):        
-        self.consume('IDENTIFIER', 'Type')
+        self._take('type')
         type_name = self.current_token.value
         self.advance()
         self.consume_statement()
@@ -1357,7 +1315,7 @@ class VBAParser:
         
         while self.current_token.type != 'EOF':
             # Check for End Type
-            if self.match('IDENTIFIER', 'End') and self.peek().value.lower() == 'type':
+            if self._at('end') and self.peek().key == 'type':
                 self.advance() # End
                 self.advance() # Type
                 self.consume_statement()
@@ -1372,27 +1330,27 @@ class VBAParser:
                 # not after. Capturing it here lets the element type carry
                 # forward into deep member-chains like `r.cells(0).val`.
                 is_array = False
-                if self.match('OPERATOR', '('):
+                if self._at('(', 'OPERATOR'):
                     is_array = True
-                    while not self.match('OPERATOR', ')') and self.current_token.type != 'EOF':
+                    while not self._at(')', 'OPERATOR') and self.current_token.type != 'EOF':
                         self.advance()
-                    self.consume('OPERATOR', ')')
+                    self._take(')', 'OPERATOR')
 
                 var_type = 'Variant'
-                if self.match('IDENTIFIER', 'As'):
+                if self._at('as'):
                     self.advance()
                     var_type = self.parse_type_signature()
 
                 if is_array:
                     var_type += "()"
 
-                if self.match('OPERATOR', '*'):
+                if self._at('*', 'OPERATOR'):
                     self.advance()
                     self.advance()
 
                 udt.members.append(VariableNode(var_name, var_type, 'Public'))
             
-            if self.match('OPERATOR', ':'):
+            if self._at(':', 'OPERATOR'):
                 self.advance()
             else:
                 self.consume_statement()
@@ -1400,7 +1358,7 @@ class VBAParser:
         module.types[type_name] = udt
 
     def parse_enum(self, module, scope='Public'):
-        self.consume('IDENTIFIER', 'Enum')
+        self._take('enum')
         enum_name = self.current_token.value
         self.advance()
         self.consume_statement()
@@ -1410,7 +1368,7 @@ class VBAParser:
         udt = TypeNode(enum_name, scope, is_enum=True) # Reuse TypeNode for simplicity
 
         while self.current_token.type != 'EOF':
-            if self.match('IDENTIFIER', 'End') and self.peek().value.lower() == 'enum':
+            if self._at('end') and self.peek().key == 'enum':
                 self.advance()
                 self.advance()
                 self.consume_statement()
@@ -1429,17 +1387,65 @@ class VBAParser:
                 module.variables.append(var)
                 udt.members.append(var)
 
-                if self.match('OPERATOR', '='):
+                if self._at('=', 'OPERATOR'):
                     self.advance()
                     # Skip value
                     while self.current_token.type not in ('NEWLINE', 'EOF', 'COMMENT'):
-                        if self.match('OPERATOR', ':'):
+                        if self._at(':', 'OPERATOR'):
                             break
                         self.advance()
 
-            if self.match('OPERATOR', ':'):
+            if self._at(':', 'OPERATOR'):
                 self.advance()
             else:
                 self.consume_statement()
 
         module.types[enum_name] = udt
+
+    def _parse_block_attribute(self, nodes):
+        # Ignore attribute statements inside blocks
+        self._take('attribute')
+        self.consume_statement()
+
+    def _parse_block_if(self, nodes):
+        stmt = self.parse_if_stmt()
+        if stmt: nodes.append(stmt)
+
+    # Statement-leading keyword (`Token.key`) -> handler, so each
+    # statement is classified with one dict lookup. Module handlers take
+    # the ModuleNode, block handlers the list of nodes being built.
+    _MODULE_STATEMENTS = {
+        'attribute': parse_attribute,
+        # `.cls` / `.frm` file header — `VERSION 1.0 CLASS` appears
+        # before the Attribute block and isn't a language construct.
+        'version': lambda self, module: self.consume_statement(),
+        # `.cls` BEGIN…END attribute block — consume every line until a
+        # matching `END`. Cannot use consume_statement because each
+        # property line ends with NEWLINE not `:`.
+        'begin': lambda self, module: self._consume_begin_end_block(),
+        'option': _parse_option,
+        'implements': _parse_implements,
+        **dict.fromkeys(_DEFTYPE_TO_TYPE, _parse_def_type),
+        **dict.fromkeys(('public', 'private', 'friend', 'dim', 'const', 'global'), parse_declaration),
+        **dict.fromkeys(('sub', 'function', 'property'), lambda self, module: self.procedures_parse(module, 'Public')),
+        'type': parse_udt,
+        'event': _parse_event,
+        'enum': lambda self, module: self.parse_enum(module, 'Public'),
+    }
+
+    _BLOCK_STATEMENTS = {
+        'with': lambda self, nodes: nodes.append(self.parse_with()),
+        'if': _parse_block_if,
+        'for': lambda self, nodes: nodes.append(self.parse_for()),
+        'do': lambda self, nodes: nodes.append(self.parse_do()),
+        'select': lambda self, nodes: nodes.append(self.parse_select()),
+        'while': lambda self, nodes: nodes.append(self.parse_while()),
+        **dict.fromkeys(('dim', 'static'), lambda self, nodes: nodes.append(StatementNode(self.collect_statement()))),
+        # P3.5 — `Type`, `Enum`, `Declare`, `Option`, `Implements` and
+        # the `DefXxx` family are module-level-only in VBA. Flag once and
+        # consume the line so the procedure body keeps parsing.
+        **dict.fromkeys(_MODULE_ONLY_KEYWORDS, _record_proc_level_module_only),
+        'redim': lambda self, nodes: nodes.append(self.parse_redim()),
+        'erase': lambda self, nodes: nodes.append(self.parse_erase()),
+        'attribute': _parse_block_attribute,
+    }
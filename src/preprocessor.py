@@ -3,16 +3,26 @@
 Filters the token stream based on `#If` / `#ElseIf` / `#Else` /
 `#End If` and `#Const` directives. Symbol lookup is case-insensitive
 (matching VBA's behaviour) and undefined identifiers evaluate to False
-/ Empty.
+/ Empty. A `#Const` is private to its module, as in VBA.
 
 Expression evaluation is sandboxed: we parse the directive expression
 through Python's `ast` module and walk only a strict whitelist of
 nodes (BoolOp, UnaryOp, Compare, Name, Constant). `eval()` is *not*
 used — bandit B307 would rightly flag it as a code-execution risk
 even with a stripped globals dict.
+
+Each distinct directive expression is parsed once into a `_Predicate`
+(spellings that differ only in case count as one; the 1,024 most
+recently used are kept), which memoises its result per combination of
+the defines it reads; the same `#If VBA7 Then` guard repeated across a
+Win32 API module costs a dict lookup after the first one.
 """
 import ast
 import operator
+from collections import ChainMap
+from functools import lru_cache
+
+from .lexer import KIND_CODES, TokenBuffer, TokenView
 
 
 class SafeDict(dict):
@@ -102,167 +112,272 @@ def _safe_eval(node, env: SafeDict):
     raise _UnsupportedExpression(type(node).__name__)
 
 
+_EVAL_ERRORS = (_UnsupportedExpression, SyntaxError, ValueError, TypeError)
+
+
+# Directive tokens whose normalised form is not their key itself. VBA
+# `=` becomes `==`, `<>` becomes `!=`, And/Or/Not become the Python
+# keywords and True/False the Python constants, in any spelling.
+_WORDS = {
+    'and': ' and ', 'or': ' or ', 'not': ' not ',
+    'true': 'True', 'false': 'False',
+}
+_SYMBOLS = {'=': ' == ', '<>': ' != '}
+
+
+def _fragment(token):
+    """`token` as it appears in the Python form of a directive
+    expression. Only its `key` is used, so spellings that differ in
+    case normalise alike; identifiers are upper-cased, which also keeps
+    them clear of Python's lower-case keywords."""
+    key = token.key
+    if token.type == 'IDENTIFIER':
+        return _WORDS.get(key) or key.upper()
+    return _SYMBOLS.get(key, key)
+
+
+# Distinct define-value combinations memoised per predicate; beyond it
+# results are still computed, just not kept.
+_MAX_RESULTS = 64
+
+
+class _Predicate:
+    """A directive expression parsed once.
+
+    `names` are the upper-cased defines the expression reads; results
+    are memoised per tuple of their values (up to `_MAX_RESULTS` of
+    them), so re-evaluating under the same defines is a dict lookup.
+    An expression that does not parse is always False.
+    """
+
+    __slots__ = ('tree', 'names', 'results')
+
+    def __init__(self, fragments):
+        self.tree = None
+        self.names = ()
+        self.results = {}
+        expr_str = "".join(fragments).strip()
+        if not expr_str:
+            return
+        try:
+            self.tree = ast.parse(expr_str, mode="eval").body
+        except (SyntaxError, ValueError):
+            return
+        self.names = tuple(sorted({
+            node.id.upper() for node in ast.walk(self.tree) if isinstance(node, ast.Name)
+        }))
+
+    def __call__(self, env: SafeDict):
+        if self.tree is None:
+            return False
+        values = tuple([env.get(name, False) for name in self.names])
+        try:
+            return self.results[values]
+        except KeyError:
+            pass
+        except TypeError:
+            # An unhashable define value; evaluate without memoising.
+            values = None
+        try:
+            result = bool(_safe_eval(self.tree, env))
+        except _EVAL_ERRORS:
+            result = False
+        if values is not None and len(self.results) < _MAX_RESULTS:
+            self.results[values] = result
+        return result
+
+
+# Process-wide but bounded: a long-lived worker sees directives from
+# every input it is given, and only the common guards need to stay.
+@lru_cache(maxsize=1024)
+def _compiled(fragments):
+    return _Predicate(fragments)
+
+
+def _predicate(tokens):
+    return _compiled(tuple([_fragment(t) for t in tokens]))
+
+
+_NEWLINE_CODE = KIND_CODES['NEWLINE']
+
+# Directives `_directive` acts on; any other `#name` token is kept.
+_DIRECTIVES = frozenset({'#if', '#elseif', '#else', '#end', '#const'})
+
+
 class Preprocessor:
     def __init__(self, tokens, defines):
+        # `active_ranges` indexes into the tokens; any other iterable
+        # (e.g. `Lexer.tokenize()`) is materialised once here.
+        if not hasattr(tokens, "__getitem__"):
+            tokens = list(tokens)
         self.tokens = tokens
-        self.defines = defines
+        # `#Const` writes land in a layer private to this module; the
+        # shared `defines` below it are only read, so modules never see
+        # each other's constants and can be preprocessed concurrently.
+        self.defines = ChainMap({}, defines)
         self.stack = [{"active": True, "taken": False}] # Root scope
+        # Upper-cased snapshot of `defines`, rebuilt after a `#Const`.
+        self._env = None
 
     def evaluate(self, tokens):
-        # Convert tokens to a Python-parseable expression. VBA `=` becomes
-        # `==`, `<>` becomes `!=`, And/Or/Not stay (they are already
-        # Python keywords once lower-cased).
-        expr = []
-        for t in tokens:
-            val = t.value
-            low = val.lower()
-            if low == 'and':
-                val = ' and '
-            elif low == 'or':
-                val = ' or '
-            elif low == 'not':
-                val = ' not '
-            elif val == '=':
-                val = ' == '
-            elif val == '<>':
-                val = ' != '
-            expr.append(val)
-
-        expr_str = "".join(expr).strip()
-        if not expr_str:
-            return False
-
-        env = SafeDict(self.defines)
-
-        try:
-            parsed = ast.parse(expr_str, mode="eval")
-            return bool(_safe_eval(parsed.body, env))
-        except (_UnsupportedExpression, SyntaxError, ValueError, TypeError):
-            return False
+        env = self._env
+        if env is None:
+            env = self._env = SafeDict(self.defines)
+        return _predicate(tokens)(env)
 
     def process(self):
-        iterator = iter(self.tokens)
-        current_token = next(iterator, None)
-
-        while current_token:
-            if current_token.type == 'PREPROCESSOR':
-                directive = current_token.value.lower()
-
-                # Handle #If
-                if directive == '#if':
-                    # Collect condition until 'Then' or Newline
-                    cond_tokens = []
-                    current_token = next(iterator, None)
-                    while current_token and current_token.type not in ('NEWLINE', 'EOF'):
-                        if current_token.value.lower() == 'then':
-                            current_token = next(iterator, None) # Skip Then
-                            break
-                        cond_tokens.append(current_token)
-                        current_token = next(iterator, None)
-
-                    # Evaluate
-                    parent = self.stack[-1]
-                    if parent["active"]:
-                        result = self.evaluate(cond_tokens)
-                        self.stack.append({"active": result, "taken": result})
-                    else:
-                        self.stack.append({"active": False, "taken": True}) # Parent inactive, so this is inactive
-
-                # Handle #ElseIf
-                elif directive == '#elseif':
-                    cond_tokens = []
-                    current_token = next(iterator, None)
-                    while current_token and current_token.type not in ('NEWLINE', 'EOF'):
-                         if current_token.value.lower() == 'then':
-                            current_token = next(iterator, None)
-                            break
-                         cond_tokens.append(current_token)
-                         current_token = next(iterator, None)
-
-                    current_scope = self.stack[-1]
-                    parent = self.stack[-2] # Parent of current #If
-
-                    if parent["active"] and not current_scope["taken"]:
-                        result = self.evaluate(cond_tokens)
-                        current_scope["active"] = result
-                        if result: current_scope["taken"] = True
-                    else:
-                        current_scope["active"] = False
-
-                # Handle #Else
-                elif directive == '#else':
-                    current_scope = self.stack[-1]
-                    parent = self.stack[-2]
-
-                    if parent["active"] and not current_scope["taken"]:
-                        current_scope["active"] = True
-                        current_scope["taken"] = True
-                    else:
-                        current_scope["active"] = False
-
-                    current_token = next(iterator, None) # Consume newline if present?
-
-                # Handle #End If
-                elif directive == '#end':
-                    # Check next token for 'if'
-                    next_tok = next(iterator, None)
-                    if next_tok and next_tok.value.lower() == 'if':
-                         self.stack.pop()
-                         current_token = next(iterator, None)
-                    else:
-                         # Just #End? Unlikely in preprocessor, usually #End If.
-                         # Treat as pop anyway? Or error?
-                         # Assume it's #End If
-                         self.stack.pop()
-                         current_token = next_tok
-
-                # Handle #Const
-                elif directive == '#const':
-                    # #Const Identifier = Expression
-                    # We need to parse identifier
-                    current_token = next(iterator, None)
-                    if current_token and current_token.type == 'IDENTIFIER':
-                         const_name = current_token.value
-                         current_token = next(iterator, None)
-                         if current_token and current_token.value == '=':
-                              current_token = next(iterator, None)
-                              # Parse expression until Newline
-                              expr_tokens = []
-                              while current_token and current_token.type not in ('NEWLINE', 'EOF'):
-                                   expr_tokens.append(current_token)
-                                   current_token = next(iterator, None)
-
-                              # Evaluate and assign ONLY if active
-                              if self.stack[-1]["active"]:
-                                   val = self.evaluate(expr_tokens)
-                                   self.defines[const_name.upper()] = val
-                         else:
-                              # Syntax error in #Const, skip line
-                              while current_token and current_token.type not in ('NEWLINE', 'EOF'):
-                                   current_token = next(iterator, None)
-                    else:
-                         # Syntax error
-                         while current_token and current_token.type not in ('NEWLINE', 'EOF'):
-                              current_token = next(iterator, None)
+        tokens = self.tokens
+        for start, stop in self.active_ranges():
+            for row in range(start, stop):
+                yield tokens[row]
+
+    def process_buffer(self):
+        """Filter a `TokenBuffer` without copying it: the result is a
+        `TokenView` of the active rows. A module without directives has
+        nothing to filter and comes back as is."""
+        tokens = self.tokens
+        if not tokens.directives:
+            return tokens
+        return TokenView(tokens, self.active_ranges())
+
+    def active_ranges(self):
+        """The rows that survive preprocessing, as ascending `(start,
+        stop)` ranges over `tokens`.
+
+        Only the directive rows are visited. Rows between two directives
+        are kept whole when the current branch is active; otherwise
+        only their NEWLINE rows are, so that the parser still sees the
+        line structure.
+        """
+        tokens = self.tokens
+        if isinstance(tokens, TokenBuffer):
+            kinds = tokens.kinds
+            directives = tokens.directives
+        else:
+            kinds = bytes(_NEWLINE_CODE if t.type == 'NEWLINE' else 0 for t in tokens)
+            directives = [row for row, t in enumerate(tokens) if t.type == 'PREPROCESSOR']
+        newline = bytes((_NEWLINE_CODE,))
+        ranges = []
+
+        def add(start, stop):
+            if ranges and ranges[-1][1] == start:
+                ranges[-1][1] = stop
+            else:
+                ranges.append([start, stop])
+
+        def keep(start, stop):
+            if start >= stop:
+                return
+            if self.stack[-1]["active"]:
+                add(start, stop)
+                return
+            # If inactive, we still keep newlines to preserve line numbers
+            row = kinds.find(newline, start, stop)
+            while row != -1:
+                add(row, row + 1)
+                row = kinds.find(newline, row + 1, stop)
+
+        pos = 0
+        for row in directives:
+            if row < pos:
+                continue  # consumed by the directive before it
+            keep(pos, row)
+            directive = tokens[row].key
+            if directive in _DIRECTIVES:
+                pos = self._directive(row, directive)
+            else:
+                # Unknown directive (`Print #f, …` with a variable file
+                # number): the token stays, whatever the branch.
+                add(row, row + 1)
+                pos = row + 1
+        keep(pos, len(tokens))
+        return [(start, stop) for start, stop in ranges]
+
+    def _directive(self, row, directive):
+        """Apply `directive` (a key in `_DIRECTIVES`) at `row`; returns
+        the first row after the tokens it consumed. Its line's NEWLINE
+        is left to the caller."""
+        tokens = self.tokens
+        n = len(tokens)
+        pos = row + 1
+        current_token = tokens[pos] if pos < n else None
+
+        # Handle #If / #ElseIf
+        if directive == '#if' or directive == '#elseif':
+            # Collect condition until 'Then' or Newline
+            cond_tokens = []
+            while current_token and current_token.type not in ('NEWLINE', 'EOF'):
+                if current_token.key == 'then':
+                    pos += 1 # Skip Then
+                    break
+                cond_tokens.append(current_token)
+                pos += 1
+                current_token = tokens[pos] if pos < n else None
+
+            if directive == '#if':
+                # Evaluate
+                parent = self.stack[-1]
+                if parent["active"]:
+                    result = self.evaluate(cond_tokens)
+                    self.stack.append({"active": result, "taken": result})
+                else:
+                    self.stack.append({"active": False, "taken": True}) # Parent inactive, so this is inactive
+            else:
+                current_scope = self.stack[-1]
+                parent = self.stack[-2] # Parent of current #If
 
+                if parent["active"] and not current_scope["taken"]:
+                    result = self.evaluate(cond_tokens)
+                    current_scope["active"] = result
+                    if result: current_scope["taken"] = True
                 else:
-                    # Unknown directive, ignore or yield?
-                    yield current_token
-                    current_token = next(iterator, None)
+                    current_scope["active"] = False
 
-                # Directives themselves are consumed.
-                # If we are at a newline, yield it to keep line count?
-                if current_token and current_token.type == 'NEWLINE':
-                    yield current_token
-                    current_token = next(iterator, None)
+        # Handle #Else
+        elif directive == '#else':
+            current_scope = self.stack[-1]
+            parent = self.stack[-2]
 
+            if parent["active"] and not current_scope["taken"]:
+                current_scope["active"] = True
+                current_scope["taken"] = True
             else:
-                # Normal token
-                if self.stack[-1]["active"]:
-                    yield current_token
-                else:
-                    # If inactive, we still yield newlines to preserve line numbers
-                    if current_token.type == 'NEWLINE':
-                        yield current_token
-
-                current_token = next(iterator, None)
+                current_scope["active"] = False
+
+        # Handle #End If
+        elif directive == '#end':
+            # Just #End? Unlikely in preprocessor, usually #End If.
+            # Assume it's #End If either way.
+            self.stack.pop()
+            if current_token and current_token.key == 'if':
+                pos += 1
+
+        # Handle #Const
+        elif directive == '#const':
+            # #Const Identifier = Expression
+            if current_token and current_token.type == 'IDENTIFIER':
+                const_name = current_token.value
+                pos += 1
+                current_token = tokens[pos] if pos < n else None
+                if current_token and current_token.value == '=':
+                    # Parse expression until Newline
+                    expr_tokens = []
+                    pos += 1
+                    current_token = tokens[pos] if pos < n else None
+                    while current_token and current_token.type not in ('NEWLINE', 'EOF'):
+                        expr_tokens.append(current_token)
+                        pos += 1
+                        current_token = tokens[pos] if pos < n else None
+
+                    # Evaluate and assign ONLY if active
+                    if self.stack[-1]["active"]:
+                        val = self.evaluate(expr_tokens)
+                        self.defines[const_name.upper()] = val
+                        self._env = None
+                    return pos
+            # Syntax error in #Const, skip line
+            while current_token and current_token.type not in ('NEWLINE', 'EOF'):
+                pos += 1
+                current_token = tokens[pos] if pos < n else None
+
+        return pos
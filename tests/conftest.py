@@ -102,13 +102,13 @@ def run_pipeline_on_files(
                 code_content = content[match.start():]
 
         lexer = Lexer(code_content)
-        tokens = list(lexer.tokenize())
+        tokens = lexer.tokenize_buffer()
         for lex_err in lexer.errors:
             analyzer.errors.append(lex_err.to_dict(filename=path.name))
             lexer_errors.append(lex_err)
 
         pp = Preprocessor(tokens, config.definitions)
-        processed_tokens = list(pp.process())
+        processed_tokens = pp.process_buffer()
 
         parser = VBAParser(processed_tokens, filename=path.name)
         module_node = parser.parse_module()
@@ -133,12 +133,12 @@ def run_pipeline_on_source(code: str, module_type: str = "Module") -> AnalysisRe
     analyzer = Analyzer(config)
 
     lexer = Lexer(code)
-    tokens = list(lexer.tokenize())
+    tokens = lexer.tokenize_buffer()
     for lex_err in lexer.errors:
         analyzer.errors.append(lex_err.to_dict(filename="<inline>"))
 
     pp = Preprocessor(tokens, config.definitions)
-    processed_tokens = list(pp.process())
+    processed_tokens = pp.process_buffer()
 
     parser = VBAParser(processed_tokens, filename="<inline>")
     module_node = parser.parse_module()
@@ -151,6 +151,17 @@ def run_pipeline_on_source(code: str, module_type: str = "Module") -> AnalysisRe
     return AnalysisResult(errors=list(analyzer.analyze()), lexer_errors=list(lexer.errors))
 
 
+@pytest.fixture(scope="session", autouse=True)
+def _isolated_model_cache(tmp_path_factory):
+    """Point the compiled-model cache at a per-session temp dir so the
+    suite never reads or pollutes the developer's real cache."""
+    mp = pytest.MonkeyPatch()
+    mp.setenv("VBALIDATOR_CACHE_DIR", str(tmp_path_factory.mktemp("model-cache")))
+    mp.delenv("VBALIDATOR_NO_CACHE", raising=False)
+    yield
+    mp.undo()
+
+
 @pytest.fixture
 def run_source():
     """Pytest fixture exposing run_pipeline_on_source as a callable."""
@@ -113,3 +113,13 @@ def test_awesome_vba_within_baseline(project, run_files):
         f"baseline {ceiling} ({reason}). Sample messages: "
         f"{[e.get('message','') for e in hard_errors[:5]]!r}"
     )
+
+
+@pytest.mark.parametrize("project", PROJECTS, ids=[p.name for p in PROJECTS])
+def test_auto_host_matches_curated_host(project):
+    """`--host auto` picks the host `HOSTS` curates for each project —
+    in particular none for the host-agnostic Win32 corpora."""
+    from src.api import _iter_input_files, detect_host
+
+    with _iter_input_files(project) as (files, _, _):
+        assert detect_host(files) == HOSTS.get(project.name)
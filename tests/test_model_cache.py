@@ -0,0 +1,174 @@
+"""Tests for the compiled on-disk model cache (`src/model_cache.py`)."""
+from __future__ import annotations
+
+import json
+import os
+from pathlib import Path
+
+import pytest
+
+from src import model_cache
+from src.config import Config
+from src.model_cache import Interner, LazyClasses, compile_model, load_compiled_model
+
+
+@pytest.fixture
+def cache_root(tmp_path, monkeypatch):
+    root = tmp_path / "cache"
+    monkeypatch.setenv("VBALIDATOR_CACHE_DIR", str(root))
+    return root
+
+
+def _model(extra_member: str = "Run") -> dict:
+    return {
+        "globals": {"MyGlobal": {"type": "Long"}},
+        "classes": {
+            "Widget": {"type": "Class", "members": {"Spin": {"type": "Sub"}}},
+            "WIDGET": {"members": {extra_member: {"type": "Sub"}}},
+        },
+        "enums": {"MyEnum": {"meFirst": 1}},
+        "references": [{"name": "Lib"}, {"name": "Lib"}],
+    }
+
+
+def _write_model(path: Path, extra_member: str = "Run") -> Path:
+    path.write_text(json.dumps(_model(extra_member)))
+    return path
+
+
+def test_compile_model_normalises_keys_and_merges_case_duplicates():
+    compiled = compile_model(_model())
+    assert set(compiled["globals"]) == {"myglobal"}
+    assert set(compiled["enums"]) == {"myenum"}
+    assert set(compiled["classes"]["widget"]["members"]) == {"Spin", "Run"}
+    assert [r["name"] for r in compiled["references"]] == ["Lib"]
+
+
+def test_compile_model_rejects_non_models():
+    with pytest.raises(ValueError):
+        compile_model([])
+    with pytest.raises(ValueError):
+        compile_model({"nothing": {}})
+
+
+def test_second_load_is_served_from_cache(tmp_path, cache_root, monkeypatch):
+    model = _write_model(tmp_path / "m.json")
+    first = load_compiled_model(model)
+    entries = list((cache_root / "models").glob("m-*.pickle"))
+    assert len(entries) == 1
+
+    def _no_json(*_a, **_k):
+        raise AssertionError("cache hit must not decode JSON")
+
+    monkeypatch.setattr(model_cache.json, "loads", _no_json)
+    assert load_compiled_model(model) == first
+
+
+def test_editing_the_model_invalidates_the_entry(tmp_path, cache_root):
+    model = _write_model(tmp_path / "m.json")
+    load_compiled_model(model)
+    _write_model(model, extra_member="Stop")
+    compiled = load_compiled_model(model)
+    assert "Stop" in compiled["classes"]["widget"]["members"]
+    assert len(list((cache_root / "models").glob("m-*.pickle"))) == 2
+
+
+def test_corrupt_entry_falls_back_to_json(tmp_path, cache_root):
+    model = _write_model(tmp_path / "m.json")
+    expected = load_compiled_model(model)
+    (entry,) = (cache_root / "models").glob("m-*.pickle")
+    entry.write_bytes(b"\x80\x05not a pickle")
+    assert load_compiled_model(model) == expected
+
+
+@pytest.mark.skipif(not hasattr(os, "getuid"), reason="POSIX ownership and modes")
+def test_entries_others_can_write_or_own_are_never_unpickled(tmp_path, cache_root, monkeypatch):
+    model = _write_model(tmp_path / "m.json")
+    load_compiled_model(model)
+    (entry,) = (cache_root / "models").glob("m-*.pickle")
+    decoded, loads = [], json.loads
+    monkeypatch.setattr(model_cache.json, "loads", lambda raw: decoded.append(raw) or loads(raw))
+
+    def _served_from_cache() -> bool:
+        count = len(decoded)
+        load_compiled_model(model)
+        return len(decoded) == count
+
+    assert _served_from_cache()
+    entry.chmod(0o620)
+    assert not _served_from_cache()
+    entry.chmod(0o600)
+    (cache_root / "models").chmod(0o777)
+    assert not _served_from_cache()
+    (cache_root / "models").chmod(0o700)
+    uid = os.getuid()
+    monkeypatch.setattr(model_cache.os, "getuid", lambda: uid + 1)
+    assert not _served_from_cache()
+
+
+def test_no_cache_env_disables_writes(tmp_path, cache_root, monkeypatch):
+    monkeypatch.setenv("VBALIDATOR_NO_CACHE", "1")
+    assert model_cache.cache_dir() is None
+    load_compiled_model(_write_model(tmp_path / "m.json"))
+    assert not cache_root.exists()
+
+
+def test_warm_bundled_models_fills_the_cache(cache_root, monkeypatch):
+    """`vbalidator model warm` (run while building the Docker image)
+    leaves one entry per bundled model, so no later load decodes JSON."""
+    from src.model_layers import warm_bundled_models
+
+    warmed = warm_bundled_models()
+    assert len(list((cache_root / "models").glob("*.pickle"))) == len(warmed)
+    assert {p.name for p in warmed} >= {"std_model.json", "excel.json", "office_core.json"}
+
+    def _no_json(*_a, **_k):
+        raise AssertionError("warmed models must not decode JSON")
+
+    monkeypatch.setattr(model_cache.json, "loads", _no_json)
+    assert warm_bundled_models() == warmed
+
+
+def test_cached_host_model_resolves_like_json(tmp_path, cache_root):
+    """A cold (JSON) and a warm (cache) Config must agree exactly."""
+    path = str(Path(__file__).resolve().parent.parent / "src" / "models" / "scripting.json")
+    cold = Config()
+    cold.load_model(path)
+    warm = Config()
+    warm.load_model(path)
+    assert cold.object_model == warm.object_model
+    assert warm.get_class("Dictionary") is not None
+
+
+def test_class_definitions_hydrate_on_first_lookup(cache_root):
+    path = str(Path(__file__).resolve().parent.parent / "src" / "models" / "excel.json")
+    for _ in range(2):  # cold (JSON) and warm (cache) loads behave alike
+        classes = load_compiled_model(path)["classes"]
+        assert isinstance(classes, LazyClasses)
+        assert "range" in classes and len(classes) > 500
+        assert classes.hydrated == 0
+        rng = classes["range"]
+        assert "Value" in rng["members"]
+        assert classes["range"] is rng
+        assert classes.hydrated == 1
+
+
+def test_interner_shares_equal_definitions():
+    intern = Interner()
+    a = intern.class_def({"members": {"Parent": {"type": "Variant"}, "Add": {"args": [{"name": "x", "type": "Long"}]}}})
+    b = intern.class_def({"members": {"Parent": {"type": "Variant"}, "Add": {"args": [{"name": "x", "type": "Long"}]}}})
+    assert a["members"]["Parent"] is b["members"]["Parent"]
+    assert a["members"]["Add"]["args"] is b["members"]["Add"]["args"]
+    assert isinstance(a["members"]["Add"]["args"], tuple)
+    # Scalars of different types never collapse into each other.
+    assert intern({"v": 1}) is not intern({"v": True})
+
+
+def test_bundled_hosts_share_interned_definitions():
+    models = Path(__file__).resolve().parent.parent / "src" / "models"
+    excel, word = Config(), Config()
+    excel.load_model(str(models / "excel.json"))
+    word.load_model(str(models / "word.json"))
+    excel_enum = excel.object_model.layers[1].enums["msocolortype"]
+    word_enum = word.object_model.layers[1].enums["msocolortype"]
+    assert excel_enum is word_enum
@@ -0,0 +1,276 @@
+"""Tests for the shared model-layer registry and the layered
+`Config.object_model` view (`src/model_layers.py`)."""
+from __future__ import annotations
+
+import json
+import os
+import time
+from pathlib import Path
+
+from src.analyzer import Analyzer
+from src.api import precheck
+from src.config import Config
+from src.model_layers import LayeredModel, ModelLayer
+
+MODELS = Path(__file__).resolve().parent.parent / "src" / "models"
+
+
+def _layer(name, **sections):
+    return ModelLayer(name, sections)
+
+
+def test_bundled_layers_are_shared_between_configs():
+    a, b = Config(), Config()
+    a.load_model(str(MODELS / "excel.json"))
+    b.load_model(str(MODELS / "excel.json"))
+    assert a.object_model.layers[0] is b.object_model.layers[0]  # std_model
+    assert a.object_model.layers[1] is b.object_model.layers[1]  # excel
+
+
+def test_custom_model_is_a_per_call_overlay(tmp_path):
+    model = tmp_path / "vba_model.json"
+    model.write_text(json.dumps({
+        "globals": {"MyOverlayGlobal": {"type": "Long"}},
+        "classes": {"Collection": {"members": {"MyOverlayMember": {"type": "Long"}}}},
+    }))
+    cfg = Config()
+    cfg.load_model(str(model))
+    assert cfg.get_global("MyOverlayGlobal") is not None
+    assert "MyOverlayMember" in cfg.get_class("Collection")["members"]
+
+    fresh = Config()
+    assert fresh.get_global("MyOverlayGlobal") is None
+    assert "MyOverlayMember" not in fresh.get_class("Collection")["members"]
+
+
+def test_class_members_merge_across_layers_without_mutation():
+    base = _layer("base", classes={"widget": {"type": "Class", "members": {"Spin": {"type": "Sub"}}}})
+    top = _layer("top", classes={"widget": {"members": {"Stop": {"type": "Sub"}}}})
+    view = LayeredModel([base, top])
+    merged = view["classes"]["widget"]
+    assert merged["type"] == "Class"
+    assert set(merged["members"]) == {"Spin", "Stop"}
+    assert set(base.classes["widget"]["members"]) == {"Spin"}
+
+
+def test_top_layer_wins_and_iteration_keeps_load_order():
+    base = _layer("base", globals={"a": {"type": "Long"}, "b": {"type": "Long"}})
+    top = _layer("top", globals={"b": {"type": "String"}, "c": {"type": "Long"}})
+    view = LayeredModel([base, top])
+    assert list(view["globals"]) == ["a", "b", "c"]
+    assert view["globals"]["b"]["type"] == "String"
+
+
+def test_references_section_only_exists_when_declared():
+    assert "references" not in LayeredModel([_layer("base", globals={})])
+    view = LayeredModel([
+        _layer("a", references=[{"name": "VBA"}]),
+        _layer("b", references=[{"name": "VBA"}, {"name": "Excel"}]),
+    ])
+    assert [r["name"] for r in view["references"]] == ["VBA", "Excel"]
+
+
+def test_repeated_prechecks_stay_isolated(tmp_path):
+    """An overlay loaded for one call must not leak into the next."""
+    proj = tmp_path / "proj"
+    proj.mkdir()
+    (proj / "M.bas").write_text(
+        'Attribute VB_Name = "M"\nOption Explicit\nSub S()\n    Debug.Print OnlyInOverlay\nEnd Sub\n'
+    )
+    (proj / "vba_model.json").write_text(json.dumps({"globals": {"OnlyInOverlay": {"type": "Long"}}}))
+    assert precheck(proj).compile_safe
+    (proj / "vba_model.json").unlink()
+    assert not precheck(proj).compile_safe
+
+
+def test_member_index_is_case_insensitive_and_shared():
+    a, b = Config(), Config()
+    a.load_model(str(MODELS / "excel.json"))
+    b.load_model(str(MODELS / "excel.json"))
+    index = a.get_class_members("INTERIOR")  # declared by excel.json only
+    assert index is b.get_class_members("interior")
+    assert index["color"][2] is a.get_class("Interior")["members"]["Color"]
+    assert "value" in a.get_class_members("Range")  # std_model + excel merged
+    assert a.get_class_members("NoSuchClass") is None
+
+
+def test_member_index_resolves_kinds_and_merges_layers():
+    base = _layer("base", classes={"widget": {"members": {
+        "Spin": {"type": "Function", "returns": "Long"},
+        "Stop": {"type": "Sub"},
+        "Size": {"type": "Long"},
+        "SIZE": {"type": "String"},
+    }}})
+    top = _layer("top", classes={"widget": {"members": {"Color": {"type": "Long"}}}})
+    index = LayeredModel([base, top])["classes"].member_index("widget")
+    assert index["spin"][:2] == ("Long", "Procedure")
+    assert index["stop"][:2] == ("Variant", "Procedure")
+    assert index["size"][:2] == ("Long", "Expression")  # first declaration wins
+    assert "color" in index
+    assert "color" not in base.member_index("widget")
+
+
+def test_enum_indexes_are_case_insensitive_and_top_layer_wins():
+    base = _layer("base", enums={"shade": {"shDark": 1, "shLight": 2}, "tone": {"tnLow": 0}})
+    top = _layer("top", enums={"shade": {"shDark": 10}})
+    view = LayeredModel([base, top])
+    assert view["enums"].members("shade") == {"shdark": 10}
+    assert view["enums"].members("nope") is None
+    assert view["enums"].find_member("shlight") == ("shade", 2)
+    assert view["enums"].find_member("shdark") == ("shade", 10)
+    assert view["enums"].find_member("tnlow") == ("tone", 0)
+    assert view["enums"].find_member("missing") is None
+
+
+def test_config_enum_lookups():
+    cfg = Config()
+    cfg.load_model(str(MODELS / "excel.json"))
+    assert cfg.find_enum_member("XLNEXT") == ("xlsearchdirection", 1)
+    assert "xlprevious" in cfg.get_enum_members("XlSearchDirection")
+    assert cfg.get_enum_members("NotAnEnum") is None
+
+
+def test_provenance_of_symbols_and_member_hits(tmp_path):
+    model = tmp_path / "vba_model.json"
+    model.write_text(json.dumps({
+        "globals": {"MyOverlayGlobal": {"type": "Long"}},
+        "classes": {"Range": {"members": {"MyOverlayMember": {"type": "Long"}}}},
+        "references": [{"name": "MyLib"}],
+    }))
+    cfg = Config()
+    cfg.load_model(str(MODELS / "excel.json"))
+    cfg.load_model(str(model))
+    assert cfg.model_source("globals", "myoverlayglobal") == "vba_model"
+    assert cfg.model_source("classes", "Interior") == "excel"
+    assert cfg.model_source("references", "MyLib") == "vba_model"
+    assert cfg.object_model["classes"].sources("range") == ("std_model", "excel", "vba_model")
+    assert cfg.member_source("Range", "MyOverlayMember") == "vba_model"
+    assert cfg.member_source("Range", "Interior") == "excel"
+    assert cfg.member_source("Range", "NoSuchMember") is None
+
+    analyzer = Analyzer(cfg)
+    assert analyzer.global_scope.resolve("MyOverlayGlobal")["source"] == "vba_model"
+    assert analyzer.global_scope.resolve("xlPrevious")["source"] == "excel"
+    assert analyzer.global_scope.resolve("WinHttpRequest")["source"] == "std_model"
+
+
+def test_model_scope_is_shared_per_layer_stack(tmp_path):
+    model = tmp_path / "vba_model.json"
+    model.write_text(json.dumps({"globals": {"MyOverlayGlobal": {"type": "Long"}}}))
+
+    def _config():
+        cfg = Config()
+        cfg.load_model(str(MODELS / "excel.json"))
+        cfg.load_model(str(model))  # a fresh, unshared layer each time
+        return cfg
+
+    first, second = Analyzer(_config()), Analyzer(_config())
+    assert first.model_scope is second.model_scope
+    assert first.global_scope is not second.global_scope
+    assert Analyzer(Config()).model_scope is not first.model_scope
+
+    # Project symbols land in the per-analyser overlay and shadow the model.
+    first.global_scope.define("ActiveSheet", "MyModule", "Module")
+    assert first.global_scope.resolve("ActiveSheet")["kind"] == "Module"
+    assert second.global_scope.resolve("ActiveSheet")["source"] == "excel"
+    assert second.global_scope.resolve("xlPrevious") == {
+        "type": "Long", "kind": "EnumItem", "extra": None, "source": "excel",
+    }
+
+
+def test_model_scope_follows_content_not_mtime_or_size(tmp_path):
+    # An edit that keeps the file's size and mtime (coarse-mtime
+    # filesystems, restored timestamps) must not serve the old scope.
+    model = tmp_path / "vba_model.json"
+    model.write_text(json.dumps({"globals": {"OverlayAaa": {"type": "Long"}}}))
+    st = model.stat()
+
+    def _scope():
+        cfg = Config()
+        cfg.load_model(str(model))
+        return Analyzer(cfg).model_scope
+
+    before = _scope()
+    model.write_text(json.dumps({"globals": {"OverlayBbb": {"type": "Long"}}}))
+    os.utime(model, ns=(st.st_atime_ns, st.st_mtime_ns))
+    assert model.stat().st_size == st.st_size
+
+    after = _scope()
+    assert after is not before
+    assert after.resolve("OverlayBbb") and not after.resolve("OverlayAaa")
+
+
+def test_office_hosts_share_the_core_base_layer(tmp_path):
+    excel, word = Config(), Config()
+    excel.load_model(str(MODELS / "excel.json"))
+    word.load_model(str(MODELS / "word.json"))
+    assert [layer.name for layer in excel.object_model.layers] == ["std_model", "office_core", "excel"]
+    assert excel.object_model.layers[1] is word.object_model.layers[1]
+    assert excel.model_source("classes", "CommandBars") == "office_core"
+    assert excel.model_source("classes", "Interior") == "excel"
+
+    both = Config()
+    both.load_model(str(MODELS / "excel.json"))
+    both.load_model(str(MODELS / "word.json"))  # the base is not pushed twice
+    assert [layer.name for layer in both.object_model.layers] == ["std_model", "office_core", "excel", "word"]
+
+    base = tmp_path / "base.json"
+    base.write_text(json.dumps({"extends": ["top.json"], "globals": {"FromBase": {"type": "Long"}}}))
+    top = tmp_path / "top.json"
+    top.write_text(json.dumps({"extends": ["base.json"], "globals": {"FromTop": {"type": "Long"}}}))
+    cfg = Config()
+    cfg.load_model(str(top))  # a cycle loads each file once
+    assert [layer.name for layer in cfg.object_model.layers] == ["std_model", "base", "top"]
+
+
+def test_model_scope_credits_the_layer_it_was_loaded_as(tmp_path):
+    # Same bytes under two names: the symbols agree, their source doesn't.
+    body = json.dumps({"globals": {"SharedOverlayGlobal": {"type": "Long"}}})
+    for name in ("team_a", "team_b"):
+        (tmp_path / f"{name}.json").write_text(body)
+
+    def _scope(name):
+        cfg = Config()
+        cfg.load_model(str(tmp_path / f"{name}.json"))
+        return Analyzer(cfg).model_scope
+
+    a, b = _scope("team_a"), _scope("team_b")
+    assert a is not b
+    assert a.resolve("SharedOverlayGlobal")["source"] == "team_a"
+    assert b.resolve("SharedOverlayGlobal")["source"] == "team_b"
+    assert _scope("team_a") is a
+
+
+def test_concurrent_analyzers_build_one_model_scope(tmp_path, monkeypatch):
+    from concurrent.futures import ThreadPoolExecutor
+    from threading import Barrier
+
+    from src import analyzer
+
+    model = tmp_path / "threaded_model.json"
+    model.write_text(json.dumps({"globals": {"ThreadedGlobal": {"type": "Long"}}}))
+    configs = []
+    for _ in range(8):
+        cfg = Config()
+        cfg.load_model(str(model))
+        configs.append(cfg)
+
+    built = []
+    build = analyzer.ModelScope.__init__
+
+    def _counting_init(self, model):
+        built.append(self)
+        time.sleep(0.05)  # hold the build open while the others arrive
+        build(self, model)
+
+    monkeypatch.setattr(analyzer.ModelScope, "__init__", _counting_init)
+    barrier = Barrier(len(configs))
+
+    def _scope(cfg):
+        barrier.wait()
+        return Analyzer(cfg).model_scope
+
+    with ThreadPoolExecutor(len(configs)) as pool:
+        scopes = list(pool.map(_scope, configs))
+    assert len(built) == 1
+    assert all(scope is scopes[0] for scope in scopes)
@@ -0,0 +1,86 @@
+"""Tests for project-specific model pruning (`vbalidator model prune|verify`)."""
+from __future__ import annotations
+
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+from src.api import precheck
+from src.model_prune import prune, verify
+
+ROOT = Path(__file__).resolve().parent.parent
+
+MODULE = (
+    'Attribute VB_Name = "M"\n'
+    "Option Explicit\n"
+    "Sub S()\n"
+    "    Dim ws As Worksheet\n"
+    "    Dim r As Range\n"
+    "    Set ws = ActiveSheet\n"
+    "    Set r = ws.Cells(1, 1)\n"
+    "    r.Interior.Color = vbRed\n"
+    "    Debug.Print r.Address, XlSearchDirection.xlPrevious\n"
+    "    Dim fd As FileDialog\n"
+    "    fd.Show\n"
+    "End Sub\n"
+)
+
+
+def _project(tmp_path, source=MODULE):
+    proj = tmp_path / "proj"
+    proj.mkdir(exist_ok=True)
+    (proj / "M.bas").write_text(source)
+    return proj
+
+
+def _issues(result):
+    return sorted((i["file"], i["line"], i["rule_id"], i["message"]) for i in result.issues)
+
+
+def test_pruned_model_reproduces_the_full_host_analysis(tmp_path):
+    proj = _project(tmp_path)
+    out = tmp_path / "pruned.json"
+    pruned = prune(proj, out, host="excel")
+
+    assert {"range", "worksheet"} <= set(pruned["classes"])
+    assert "activesheet" in pruned["globals"]
+    assert "xlsearchdirection" in pruned["enums"]
+    assert "filedialog" in pruned["classes"]  # from office_core.json, which excel extends
+    assert len(pruned["classes"]) < 20
+    assert out.stat().st_size < (ROOT / "src" / "models" / "excel.json").stat().st_size // 20
+
+    full = precheck(proj, host="excel")
+    small = precheck(proj, model_path=out)
+    assert _issues(small) == _issues(full)
+    assert small.compile_safe
+
+
+def test_verify_reports_symbols_the_pruned_model_lacks(tmp_path):
+    proj = _project(tmp_path)
+    out = tmp_path / "pruned.json"
+    prune(proj, out, host="excel")
+    assert verify(proj, out, host="excel") == {}
+
+    _project(tmp_path, MODULE.replace("End Sub", "    Debug.Print ActiveWorkbook.Name\nEnd Sub"))
+    missing = verify(proj, out, host="excel")
+    assert missing["globals"] == ["activeworkbook"]
+
+
+def test_cli_model_prune_and_verify(tmp_path):
+    proj = _project(tmp_path)
+    out = tmp_path / "pruned.json"
+    run = subprocess.run(
+        [sys.executable, "-m", "src.main", "model", "prune", str(proj), "--host", "excel", "-o", str(out)],
+        capture_output=True, text=True, check=False, cwd=ROOT,
+    )
+    assert run.returncode == 0, run.stderr
+    assert "range" in json.loads(out.read_text())["classes"]
+
+    _project(tmp_path, MODULE.replace("End Sub", "    ActiveWorkbook.Save\nEnd Sub"))
+    run = subprocess.run(
+        [sys.executable, "-m", "src.main", "model", "verify", str(proj), "--host", "excel", "--pruned", str(out)],
+        capture_output=True, text=True, check=False, cwd=ROOT,
+    )
+    assert run.returncode == 1
+    assert "activeworkbook" in run.stderr
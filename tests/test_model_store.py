@@ -0,0 +1,101 @@
+"""Tests for the memory-mapped `.vbm` model store (`src/model_store.py`)."""
+from __future__ import annotations
+
+import json
+import os
+from pathlib import Path
+
+from src.analyzer import ModelScope
+from src.config import Config
+from src.model_cache import load_compiled_model
+from src.model_layers import LayeredModel, load_layer
+from src.model_store import StoreSection, fresh_store_for, is_store, open_store, write_store
+
+MODELS = Path(__file__).resolve().parent.parent / "src" / "models"
+
+
+def _write_model(path: Path, member: str = "Spin") -> Path:
+    path.write_text(json.dumps({
+        "globals": {"MyGlobal": {"type": "Long"}, "Another": {"type": "String"}},
+        "classes": {"Widget": {"type": "Class", "members": {member: {"type": "Sub"}}}},
+        "enums": {"MyEnum": {"meFirst": 1}},
+        "references": [{"name": "Lib"}],
+    }))
+    return path
+
+
+def test_store_round_trips_a_host_model(tmp_path):
+    store = write_store(MODELS / "scripting.json", tmp_path / "scripting.vbm")
+    assert is_store(store)
+    opened = open_store(store)
+    compiled = load_compiled_model(MODELS / "scripting.json")
+    assert isinstance(opened["classes"], StoreSection)
+    for section in ("globals", "classes", "enums"):
+        assert list(opened[section]) == list(compiled[section])
+        assert dict(opened[section]) == dict(compiled[section])
+    for key in compiled["enums"]:
+        assert opened["enums"].member_names(key) == list(compiled["enums"][key])
+    assert opened.get("references") == compiled.get("references")
+
+
+def test_lookups_miss_cleanly(tmp_path):
+    opened = open_store(write_store(_write_model(tmp_path / "m.json")))
+    assert "nope" not in opened["classes"]
+    assert opened["classes"].get("nope") is None
+    assert opened["globals"]["another"] == {"type": "String"}
+
+
+def test_config_loads_a_store_directly(tmp_path):
+    store = write_store(_write_model(tmp_path / "m.json"), tmp_path / "custom.vbm")
+    cfg = Config()
+    cfg.load_model(str(store))
+    assert cfg.get_global("MyGlobal") == {"type": "Long"}
+    assert "Spin" in cfg.get_class("Widget")["members"]
+
+
+def test_sibling_store_is_used_only_while_fresh(tmp_path):
+    model = _write_model(tmp_path / "m.json")
+    write_store(model)
+    assert fresh_store_for(model) == tmp_path / "m.vbm"
+
+    _write_model(model, member="Stop")  # JSON edited, store not rebuilt
+    assert fresh_store_for(model) is None
+    cfg = Config()
+    cfg.load_model(str(model))
+    assert "Stop" in cfg.get_class("Widget")["members"]
+
+
+def test_recorded_mtime_settles_freshness_without_reading_the_json(tmp_path):
+    model = _write_model(tmp_path / "m.json")
+    old = os.stat(model).st_mtime_ns - 10_000_000_000
+    os.utime(model, ns=(old, old))
+    write_store(model)
+
+    # Same size and mtime: taken as unchanged, so the JSON isn't read.
+    _write_model(model, member="Stop")
+    os.utime(model, ns=(old, old))
+    assert fresh_store_for(model) == tmp_path / "m.vbm"
+
+    # A different mtime falls back to comparing content hashes.
+    os.utime(model, ns=(old + 1, old + 1))
+    assert fresh_store_for(model) is None
+    _write_model(model)
+    os.utime(model, ns=(old + 1, old + 1))
+    assert fresh_store_for(model) == tmp_path / "m.vbm"
+
+
+def test_model_scope_over_a_store_decodes_records_on_demand(tmp_path):
+    json_path = MODELS / "excel.json"
+    store_layer = load_layer(write_store(json_path, tmp_path / "excel.vbm"))
+    from_json = ModelScope(LayeredModel([load_layer(json_path)]))
+    from_store = ModelScope(LayeredModel([store_layer]))
+    sections = [store_layer.globals, store_layer.classes, store_layer.enums]
+    assert not any(section._decoded for section in sections)
+
+    assert from_store.resolve("ActiveSheet") == from_json.resolve("ActiveSheet")
+    assert list(store_layer.globals._decoded) == ["activesheet"]
+    for key in from_json.symbols:
+        assert key in from_store.symbols
+        assert from_store.symbols.get(key) == from_json.symbols[key]
+    assert from_store.symbols.get("no_such_symbol") is None
+    assert "no_such_symbol" not in from_store.symbols
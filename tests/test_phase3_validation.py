@@ -276,6 +276,74 @@ Private Declare Function GetTickCount Lib "kernel32" () As Long
     )
 
 
+def test_directive_predicates_are_shared_and_see_const_updates():
+    """Identical guards compile to one cached predicate, and a `#Const`
+    after the first evaluation is still honoured by the next one."""
+    from src.preprocessor import Preprocessor, _predicate
+
+    code = (
+        "#If Flag Then\na\n#End If\n"
+        "#Const Flag = 1\n"
+        "#If Flag Then\nb\n#End If\n"
+        "#If Flag = (1 Then\nc\n#End If\n"
+    )
+    tokens = list(Lexer(code).tokenize())
+    kept = [t.value for t in Preprocessor(tokens, {}).process() if t.type == "IDENTIFIER"]
+    assert kept == ["b"]
+    guards = [[t for t in Lexer(src).tokenize() if t.type != "EOF"] for src in ("Flag", "FLAG", "flag")]
+    assert _predicate(guards[0]) is _predicate(guards[1]) is _predicate(guards[2])
+    # `True` is a literal in any spelling, not an undefined define.
+    assert Preprocessor([], {}).evaluate([t for t in Lexer("TRUE").tokenize() if t.type != "EOF"])
+
+
+def test_directive_predicate_caches_are_bounded():
+    from src import preprocessor
+    from src.preprocessor import _MAX_RESULTS, _predicate
+
+    for i in range(preprocessor._compiled.cache_info().maxsize + 10):
+        _predicate([t for t in Lexer(f"Guard{i}").tokenize() if t.type != "EOF"])
+    info = preprocessor._compiled.cache_info()
+    assert info.currsize == info.maxsize
+    guard = _predicate([t for t in Lexer("Level > 0").tokenize() if t.type != "EOF"])
+    for level in range(_MAX_RESULTS * 2):
+        assert guard(preprocessor.SafeDict({"LEVEL": level})) is (level > 0)
+    assert len(guard.results) == _MAX_RESULTS
+
+
+def test_const_stays_private_to_its_module(tmp_path):
+    """A `#Const` neither changes the defines it was given nor reaches
+    the modules processed after it, so modules can be preprocessed in
+    parallel."""
+    from concurrent.futures import ThreadPoolExecutor
+
+    from src.api import precheck
+    from src.preprocessor import Preprocessor
+
+    (tmp_path / "A.bas").write_text(
+        'Attribute VB_Name = "A"\n#Const Win64 = False\nSub S(): End Sub\n', encoding="utf-8"
+    )
+    (tmp_path / "B.bas").write_text(
+        'Attribute VB_Name = "B"\n'
+        "#If Win64 Then\n"
+        'Private Declare Function GetTickCount Lib "kernel32" () As Long\n'
+        "#End If\n",
+        encoding="utf-8",
+    )
+    assert any(i["rule_id"] == "VBA300" for i in precheck(tmp_path).issues)
+
+    defines = {"WIN64": True}
+    sources = [f"#Const Win64 = {i % 2}\n#If Win64 Then\nodd{i}\n#End If\n" for i in range(40)]
+
+    def kept(code):
+        tokens = Lexer(code).tokenize_buffer()
+        return [t.value for t in Preprocessor(tokens, defines).process_buffer() if t.type == "IDENTIFIER"]
+
+    with ThreadPoolExecutor(4) as pool:
+        results = list(pool.map(kept, sources))
+    assert results == [[f"odd{i}"] if i % 2 else [] for i in range(40)]
+    assert defines == {"WIN64": True}
+
+
 def test_currency_literal_lex():
     """`50023612.1134@` is a Currency literal, not garbage."""
     code = "x = 50023612.1134@\n"
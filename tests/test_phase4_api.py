@@ -248,6 +248,41 @@ def test_unknown_host_does_not_crash(tmp_path):
     assert result.compile_safe
 
 
+
+def test_auto_host_detects_the_office_host():
+    from src.api import detect_host
+
+    def _files(*bodies):
+        return [(f"M{i}.bas", body) for i, body in enumerate(bodies)]
+
+    assert detect_host(_files("Sub S()\n    ThisWorkbook.Save\nEnd Sub\n")) == "excel"
+    assert detect_host(_files("x = DLookup(\"a\", \"t\")\nDoCmd.OpenForm \"F\"\n")) == "access"
+    assert detect_host(_files("Set p = ActivePage\nSet d = ActiveDocument\n")) == "visio"
+    assert detect_host(_files("Set d = ActiveDocument\n")) == "word"  # tie: listed first
+    # Comments, strings and longer identifiers are not fingerprints.
+    assert detect_host(_files(
+        "' works with ActiveWorkbook too\n"
+        'MsgBox "ActiveDocument"\n'
+        "Dim myDoCmdHelper As Long\n"
+    )) is None
+    assert detect_host(_files("Dim x: Set x = ActiveWorkbook", "ActiveDocument.Save")) == "excel"
+
+
+def test_auto_host_loads_only_the_detected_model(tmp_path):
+    bas = tmp_path / "M.bas"
+    bas.write_text(
+        'Attribute VB_Name = "M"\n'
+        "Option Explicit\n"
+        "Sub S()\n"
+        "    Dim doc As Document\n"
+        "    Set doc = ActiveDocument\n"
+        "    doc.Range.Collapse wdCollapseEnd\n"
+        "End Sub\n",
+    )
+    assert precheck(bas, host="auto").compile_safe
+    assert not precheck(bas).compile_safe
+    assert precheck_source("Sub S()\n    Debug.Print 1\nEnd Sub\n", host="auto").compile_safe
+
 # ---- MSComCtl auto-layer ----------------------------------------------------
 
 
@@ -521,6 +556,130 @@ def test_shell_application_autolayers_without_breaking_excel(tmp_path):
     )
 
 
+
+def test_auto_layer_detection_matches_the_rule_patterns():
+    """The single combined scan finds exactly what each rule's regex
+    finds, overlapping triggers included, honours the `.frm`-only filter
+    and layers in table order."""
+    from src.api import _AUTO_LAYER_RULES, apply_auto_layers, match_auto_layer_rules
+    from src.config import Config
+
+    samples = [
+        'Set d = CreateObject("scripting.DICTIONARY")',
+        "Set sh = CreateObject(\"WScript.Shell.Application\")",
+        "Dim re As VBScript.RegExp ' and MSForms.UserForm",
+        "Dim x As MyScripting.Dictionary, y As ScriptingX.Dictionary",
+        "Begin MSComctlLib.TreeView T1",
+        "",
+    ]
+    for text in samples:
+        expected = {name for name, pat, _, _ in _AUTO_LAYER_RULES if pat.search(text)}
+        assert match_auto_layer_rules(text) == expected
+    assert match_auto_layer_rules(samples[1]) == {"wscript_shell.json", "shell_application.json"}
+
+    files = [("M.bas", samples[4]), ("F.frm", samples[1]), ("C.cls", samples[0])]
+    assert apply_auto_layers(Config(), files) == [
+        "scripting.json", "wscript_shell.json", "shell_application.json",
+    ]
+    files.append(("F2.frm", samples[4]))
+    assert apply_auto_layers(Config(), files)[0] == "mscomctl.json"
+
+
+def test_auto_layers_are_detected_while_reading(tmp_path, monkeypatch):
+    import src.api as api
+
+    (tmp_path / "M.bas").write_text('Set d = CreateObject("Scripting.Dictionary")\r\n')
+    (tmp_path / "C.cls").write_text("Begin MSComctlLib.TreeView T1\n")  # `.frm` only
+    (tmp_path / "F.frm").write_text("Dim re As VBScript.RegExp\r")
+    with api._iter_input_files(tmp_path) as (files, _, auto_layers):
+        assert auto_layers == {"scripting.json", "vbscript_regexp.json"}
+        # Read as in universal-newline mode.
+        assert dict(files)["F.frm"] == "Dim re As VBScript.RegExp\n"
+
+    # A re-read of unchanged files is served from the digest cache.
+    monkeypatch.setattr(api, "_AUTO_LAYER_PAT", None)
+    with api._iter_input_files(tmp_path) as (_, _, again):
+        assert again == auto_layers
+
+
+def test_large_modules_are_lexed_from_a_mapped_file(tmp_path, monkeypatch):
+    """Above `_MAP_MIN_BYTES` a module is mapped rather than read; the
+    report must not change."""
+    import mmap
+
+    import src.api as api
+
+    (tmp_path / "Big.bas").write_bytes(
+        b'Attribute VB_Name = "Big"\r\n'
+        b"Sub S()\r\n"
+        b'    Dim d As Object: Set d = CreateObject("Scripting.Dictionary")\r\n'
+        b"    d.Add \"caf\xe9\", #13/45/2020# ' note\r\n"
+        # Classic Mac line ends: a lone CR still ends the line.
+        b"    ActiveSheet.Calculate ' Workbooks\r"
+        b"    Missing\xe9 = 1 _\r"
+        b"        + 1\r"
+        b"End Sub\r\n"
+    )
+    expected = precheck(tmp_path).issues
+    assert any("Missing\xe9" in i["message"] and i["line"] == 6 for i in expected)
+    with api._iter_input_files(tmp_path) as (files, _, _):
+        text = files[0][1]
+    monkeypatch.setattr(api, "_MAP_MIN_BYTES", 1)
+    with api._iter_input_files(tmp_path) as (files, _, auto_layers):
+        mapped = files[0][1]
+        assert isinstance(mapped, mmap.mmap)
+        assert api.match_auto_layer_rules(mapped) == api.match_auto_layer_rules(text) == {"scripting.json"}
+        assert auto_layers == {"scripting.json"}
+        assert api.host_scores(mapped) == api.host_scores(text) == {"excel": 1}
+    assert mapped.closed
+    assert precheck(tmp_path).issues == expected
+
+
+def test_define_matrix_matches_separate_runs(tmp_path, monkeypatch):
+    """`precheck_matrix` reports, per configuration, exactly what a
+    separate `precheck` run would, and parses a module without `#If`
+    only once."""
+    import src.api as api
+
+    (tmp_path / "Api.bas").write_text(
+        'Attribute VB_Name = "Api"\n'
+        "#If Win64 Then\n"
+        'Private Declare Sub Sleep Lib "kernel32" (ByVal ms As Long)\n'
+        "#Else\n"
+        "Private Sub Sleep(ByVal ms As Long): Missing32 = 1: End Sub\n"
+        "#End If\n"
+        "Public Sub Nap(): Sleep 1: End Sub\n",
+        encoding="utf-8",
+    )
+    (tmp_path / "Main.bas").write_text(
+        'Attribute VB_Name = "Main"\n'
+        "Sub S(): Nap: Typo = 1: End Sub\n",
+        encoding="utf-8",
+    )
+    configurations = [{"WIN64": True}, {"win64": False, "VBA7": False}, {"WIN64": True, "MAC": False}]
+    parsed = []
+    parse_module = api._parse_module
+    monkeypatch.setattr(api, "_parse_module", lambda f, *a: parsed.append(f) or parse_module(f, *a))
+    result = api.precheck_matrix(tmp_path, configurations)
+    assert sorted(parsed) == ["Api.bas", "Api.bas", "Main.bas"]
+
+    labels = [c["name"] for c in result.configurations]
+    assert labels == ["WIN64=True", "WIN64=False,VBA7=False", "WIN64=True,MAC=False"]
+    for label, defines in zip(labels, configurations):
+        alone = precheck(tmp_path, defines=defines)
+        tagged = [dict(i) for i in result.issues if label in i["configurations"]]
+        for issue in tagged:
+            del issue["configurations"]
+        key = lambda i: (i["file"], i["line"], i["message"])
+        assert sorted(tagged, key=key) == sorted(alone.issues, key=key)
+    by_message = {i["message"]: i["configurations"] for i in result.issues}
+    assert by_message["Undefined identifier 'Typo' in 'S'."] == labels
+    assert [m for m in by_message if "PtrSafe" in m] and all(
+        by_message[m] == [labels[0], labels[2]] for m in by_message if "PtrSafe" in m
+    )
+    assert by_message["Undefined identifier 'Missing32' in 'Sleep'."] == [labels[1]]
+    assert result.json()["configurations"] == result.configurations
+
 # ---- CreateObject ProgID type inference -----------------------------------
 
 
@@ -894,6 +1053,24 @@ def test_vbalidator_submodule_imports_resolve():
         importlib.import_module(f"vbalidator.{sub}")
 
 
+def test_vbalidator_import_is_lazy():
+    """`import vbalidator` must not drag in the analysis pipeline — a
+    pre-commit hook pays for every module on every run. Submodules still
+    alias the very `src` module objects once touched."""
+    import subprocess
+    import sys
+    code = (
+        "import sys, vbalidator\n"
+        "heavy = [m for m in ('src.api', 'src.roundtrip', 'src.rules', 'colorama') if m in sys.modules]\n"
+        "assert not heavy, heavy\n"
+        "import vbalidator.rules, src.rules\n"
+        "assert vbalidator.rules is src.rules\n"
+        "assert 'src.roundtrip' not in sys.modules\n"
+    )
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=False)
+    assert out.returncode == 0, out.stderr
+
+
 def test_vbalidator_version_matches_pyproject():
     """`vbalidator.__version__` is the canonical published version and
     must equal `src.__version__`. python-semantic-release writes both."""
@@ -0,0 +1,177 @@
+"""The columnar TokenBuffer the pipeline lexes into."""
+from __future__ import annotations
+
+import random
+
+from src.lexer import Lexer, TokenBuffer, TokenView, identifier_key
+from src.preprocessor import Preprocessor
+
+_CODE = (
+    "Attribute VB_Name = \"M\"\r\n"
+    "Sub S(ByVal n As Long)\r\n"
+    "    Dim d As Date: d = #1/2/2020#  ' a date\r\n"
+    "    Debug.Print Mid$(\"ab\", 1, _\r\n"
+    "        1) & &HFF, .5E3\n"
+    "End Sub"
+)
+
+_DIRECTIVES = (
+    "#Const DEBUG_MODE = 1\n"
+    "#If DEBUG_MODE Then\n"
+    "Sub A()\n"
+    "End Sub\n"
+    "#Else\n"
+    "Sub B()\n"
+    "End Sub\n"
+    "#End If\n"
+)
+
+
+def _rows(tokens):
+    return [(t.type, t.value, t.line, t.column) for t in tokens]
+
+
+def test_buffer_rows_read_back_as_tokens():
+    buf = Lexer(_CODE).tokenize_buffer()
+    assert isinstance(buf, TokenBuffer)
+    by_index = [buf[i] for i in range(len(buf))]
+    assert _rows(buf) == _rows(by_index)
+    assert _rows(buf)[-1] == ("EOF", "", 6, 8)
+    # CRLF line ends still read back as a bare "\n" in column 1.
+    assert ("NEWLINE", "\n", 2, 1) in _rows(buf)
+    assert ("DATELITERAL", "#1/2/2020#", 3, 24) in _rows(buf)
+    # The continuation is dropped and the next token is on line 5.
+    assert ("INTEGER", "1", 5, 9) in _rows(buf)
+    assert [buf.kind(i) for i in range(len(buf))] == [t.type for t in buf]
+    assert [buf.value(i) for i in range(len(buf))] == [t.value for t in buf]
+    assert [buf.line(i) for i in range(len(buf))] == [t.line for t in buf]
+
+
+def test_tokenize_and_buffer_agree_on_errors():
+    code = "x = #13/45/2020#\ny = 1€\n"
+    a, b = Lexer(code), Lexer(code)
+    tokens = list(a.tokenize())
+    buf = b.tokenize_buffer()
+    assert _rows(tokens) == _rows(buf)
+    assert [(e.rule_id, e.line, e.column) for e in a.errors] == [
+        (e.rule_id, e.line, e.column) for e in b.errors
+    ] == [("VBA_LEX002", 1, 5), ("VBA_LEX001", 2, 6)]
+
+
+def test_process_buffer_matches_process():
+    buf = Lexer(_DIRECTIVES).tokenize_buffer()
+    assert list(buf.directives) == [0, 5, 17, 27]
+    expected = _rows(Preprocessor(list(buf), {}).process())
+    filtered = Preprocessor(buf, {}).process_buffer()
+    # A view over the buffer's rows, not a copy of them.
+    assert isinstance(filtered, TokenView) and filtered.buffer is buf
+    assert _rows(filtered) == expected
+    assert _rows(filtered[i] for i in range(len(filtered))) == expected
+    assert _rows([filtered[-1], filtered[3]]) == [expected[-1], expected[3]]
+    # `process()` still takes any token iterable, e.g. a generator.
+    assert _rows(Preprocessor(Lexer(_DIRECTIVES).tokenize(), {}).process()) == expected
+    assert "B" not in [t.value for t in filtered]
+    # The `#Else` branch leaves only its line ends behind.
+    assert filtered.ranges == [(4, 5), (8, 17), (18, 19), (23, 24), (26, 27), (29, 31)]
+
+
+def test_process_buffer_passes_directive_free_modules_through():
+    buf = Lexer(_CODE).tokenize_buffer()
+    assert Preprocessor(buf, {}).process_buffer() is buf
+
+
+def test_tokens_carry_interned_lowercase_keys():
+    buf = Lexer('If MsgBox("Hi") = VbOK Then #If\n').tokenize_buffer()
+    keys = {t.value: t.key for t in buf}
+    assert keys["MsgBox"] == "msgbox"
+    assert keys["MsgBox"] is identifier_key("MsgBox")
+    assert keys["#If"] == "#if"
+    assert keys["="] == "="
+    # Literals keep their spelling.
+    assert keys['"Hi"'] == '"Hi"'
+
+
+# Fragments that exercise everything that is not line-local: line
+# continuations, CRLF, strings left open across lines, and lexer errors
+# whose messages carry line numbers.
+_PIECES = [
+    "Dim x As Long", "x = 1", " _\n", " _\r\n", " _\r", "\n", "\r\n", "\r", '"', '""',
+    '"ab"', "' note", "#If X Then", "#1/2/2020#", "#13/1/2020#", "€",
+    "&H1F", ".5E2", " ", "\t", "Mid$(", ")", "End Sub", "_", "[A1]", ":",
+]
+
+
+def _state(lexer, buf):
+    return (
+        [list(col) for col in (buf.kinds, buf.starts, buf.ends, buf.lines, buf.bases, buf.directives)],
+        [(e.char, e.line, e.column, e.rule_id, e.message) for e in lexer.errors],
+        (lexer.line, lexer.column),
+    )
+
+
+def test_relex_matches_a_full_relex_on_random_edits():
+    rng = random.Random(20240617)
+
+    def fragment(n):
+        return "".join(rng.choice(_PIECES) for _ in range(rng.randint(0, n)))
+
+    for _ in range(300):
+        code = fragment(40)
+        lexer = Lexer(code)
+        buf = lexer.tokenize_buffer()
+        for _ in range(5):
+            start = rng.randint(0, len(code))
+            end = rng.randint(start, min(len(code), start + 8))
+            text = fragment(3)
+            old = buf
+            buf, (first, old_stop, new_stop) = lexer.relex(buf, start, end, text)
+            code = code[:start] + text + code[end:]
+            full = Lexer(code)
+            assert _state(lexer, buf) == _state(full, full.tokenize_buffer()), (code, start, end, text)
+            assert lexer.code == code
+            # Rows outside the reported span are the old ones.
+            assert list(old.kinds[:first]) == list(buf.kinds[:first])
+            assert list(old.kinds[old_stop:]) == list(buf.kinds[new_stop:])
+
+
+def test_relex_touches_only_the_edited_line():
+    code = "Sub A()\n    x = 1\n    y = 2\nEnd Sub\n"
+    lexer = Lexer(code)
+    buf = lexer.tokenize_buffer()
+    start = code.index("1")
+    new, (first, old_stop, new_stop) = lexer.relex(buf, start, start + 1, "1 +\n    z = 3")
+    assert [t.value for t in buf][first:old_stop] == ["x", "=", "1", "\n"]
+    assert [t.value for t in new][first:new_stop] == ["x", "=", "1", "+", "\n", "z", "=", "3", "\n"]
+    assert new[len(new) - 2].line == 6  # `End Sub`'s newline, one line further down
+
+
+def test_from_file_lexes_the_mapped_bytes_like_the_text(tmp_path):
+    path = tmp_path / "M.bas"
+    path.write_bytes(_CODE.replace("Mid$", "Mid\xe9$").encode("latin-1"))
+    mapped = Lexer.from_file(path)
+    buf = mapped.tokenize_buffer()
+    assert not isinstance(buf.source, str)
+    text = path.read_bytes().decode("latin-1")
+    assert _rows(buf) == _rows(Lexer(text).tokenize_buffer())
+    assert "Mid\xe9$" in [buf.value(i) for i in range(len(buf))]
+    (tmp_path / "Empty.bas").write_bytes(b"")
+    assert _rows(Lexer.from_file(tmp_path / "Empty.bas").tokenize_buffer()) == [("EOF", "", 1, 1)]
+
+
+def test_key_memos_stay_bounded_over_fresh_identifiers(tmp_path):
+    """A long-lived worker analyses one project after another; the
+    spelling → key memos must not keep every identifier it has seen."""
+    from src import analyzer, lexer
+    from src.api import precheck
+
+    memos = (lexer.identifier_key, analyzer._normalize_identifier)
+    per_run = lexer.KEY_CACHE_SIZE // 2
+    for run in range(3):
+        names = [f"Fresh{run}_{i}" for i in range(per_run)]
+        body = "".join(f"    {name} = 1\n" for name in names)
+        (tmp_path / "M.bas").write_text(f'Attribute VB_Name = "M"\nSub S()\n{body}End Sub\n')
+        precheck(tmp_path)
+    for memo in memos:
+        info = memo.cache_info()
+        assert info.currsize <= lexer.KEY_CACHE_SIZE == info.maxsize
+    assert lexer.identifier_key.cache_info().currsize == lexer.KEY_CACHE_SIZE
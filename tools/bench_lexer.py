@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""Measure lexer throughput (tokens per second) on a VBA corpus.
+
+    python tools/bench_lexer.py                         # tests/awesome_vba
+    python tools/bench_lexer.py path/to/project --runs 10
+    git show HEAD~1:src/lexer.py > /tmp/old_lexer.py
+    python tools/bench_lexer.py --compare /tmp/old_lexer.py
+
+Every `.bas` / `.cls` / `.frm` under the corpus is read the way
+`precheck` reads it (latin-1) and lexed into what `precheck` consumes
+(a `TokenBuffer`, or a token list for lexers without one), `--runs`
+times; the best run is reported. With `--compare`, another `lexer.py` is
+loaded from that path and timed on the same corpus, and the token
+streams of both are checked to be identical before the speed-up is
+printed.
+"""
+from __future__ import annotations
+
+import argparse
+import importlib.util
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from src import lexer as current  # noqa: E402
+
+_EXTS = {".bas", ".cls", ".frm"}
+
+
+def _corpus(root: Path) -> list[str]:
+    files = sorted(p for p in root.rglob("*") if p.suffix.lower() in _EXTS)
+    return [p.read_text(encoding="latin-1") for p in files]
+
+
+def _load(path: str):
+    spec = importlib.util.spec_from_file_location("_bench_lexer_compare", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _stream(module, sources):
+    return [
+        (t.type, t.value, t.line, t.column)
+        for code in sources for t in module.Lexer(code).tokenize()
+    ]
+
+
+def _lex(lexer):
+    if hasattr(lexer, "tokenize_buffer"):
+        return lexer.tokenize_buffer()
+    return list(lexer.tokenize())
+
+
+def _time(module, sources) -> tuple[float, int]:
+    count = 0
+    start = time.perf_counter()
+    for code in sources:
+        count += len(_lex(module.Lexer(code)))
+    return time.perf_counter() - start, count
+
+
+def _best(modules, sources, runs: int) -> list[tuple[float, int]]:
+    """Best time per module; runs are interleaved so that drift in the
+    machine's speed hits every module alike."""
+    best = [(float("inf"), 0)] * len(modules)
+    for _ in range(runs):
+        best = [min(b, _time(m, sources)) for b, m in zip(best, modules)]
+    return best
+
+
+def main() -> int:
+    p = argparse.ArgumentParser(prog="bench_lexer.py", description=__doc__.splitlines()[0])
+    p.add_argument("corpus", nargs="?", default=str(ROOT / "tests" / "awesome_vba"),
+                   help="Directory of VBA sources (default: tests/awesome_vba).")
+    p.add_argument("--runs", type=int, default=10, help="Timed passes over the corpus (default 10).")
+    p.add_argument("--compare", metavar="LEXER_PY", help="Another lexer.py to time against.")
+    args = p.parse_args()
+
+    sources = _corpus(Path(args.corpus))
+    size = sum(len(code) for code in sources)
+    print(f"corpus   {len(sources)} files, {size / 1e6:.2f} M chars")
+
+    modules = [current]
+    if args.compare:
+        other = _load(args.compare)
+        if _stream(other, sources) != _stream(current, sources):
+            print("token streams differ from the compared lexer", file=sys.stderr)
+            return 1
+        modules.append(other)
+
+    timings = _best(modules, sources, args.runs)
+    seconds, tokens = timings[0]
+    print(f"current  {tokens / seconds / 1e6:6.2f} M tokens/s  ({tokens} tokens, {seconds * 1000:.1f} ms)")
+    if args.compare:
+        other_seconds, _ = timings[1]
+        print(f"compare  {tokens / other_seconds / 1e6:6.2f} M tokens/s  ({other_seconds * 1000:.1f} ms)")
+        print(f"speed-up {other_seconds / seconds:.2f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""Measure the peak RSS of loading each bundled host model, with and
+without definition interning (`model_cache.Interner`).
+
+Every measurement runs in a fresh interpreter. The child loads the
+host on top of std_model, builds an `Analyzer` (which walks every
+global and enum), hydrates every class — the worst case; a real
+precheck touches a few dozen — and reports `ru_maxrss`. The on-disk
+model cache is warmed first, so the numbers exclude JSON decoding.
+
+    python tools/bench_model_memory.py
+    python tools/bench_model_memory.py excel word access
+
+A final row loads excel + word + access into one process, the case
+where cross-host sharing pays off most. Linux / macOS only (`resource`).
+"""
+from __future__ import annotations
+
+import argparse
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+HOSTS = ["excel", "word", "access", "visio", "outlook"]
+
+_CHILD = """
+import resource, sys
+sys.path.insert(0, {root!r})
+from src import model_layers
+from src.analyzer import Analyzer
+from src.config import Config
+model_layers.INTERN_MODELS = {intern}
+config = Config()
+for host in {hosts!r}:
+    config.load_model({root!r} + "/src/models/" + host + ".json")
+Analyzer(config)
+classes = config.object_model["classes"]
+for name in classes:
+    classes[name]
+peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(peak // 1024 if sys.platform != "darwin" else peak // (1024 * 1024))
+"""
+
+
+def _peak_mb(hosts, intern: bool) -> int:
+    code = _CHILD.format(root=str(ROOT), hosts=list(hosts), intern=intern)
+    out = subprocess.run([sys.executable, "-c", code], check=True, capture_output=True, text=True)
+    return int(out.stdout.strip())
+
+
+def main() -> int:
+    p = argparse.ArgumentParser(prog="bench_model_memory.py", description=__doc__.splitlines()[0])
+    p.add_argument("hosts", nargs="*", default=HOSTS, help=f"Hosts to measure (default: {' '.join(HOSTS)}).")
+    args = p.parse_args()
+
+    rows = [[h] for h in args.hosts] + [["excel", "word", "access"]]
+    for hosts in rows:
+        _peak_mb(hosts, True)  # warm the compiled-model cache
+    # Interpreter + imports + std_model: subtracted to show what the
+    # host model itself costs.
+    base = _peak_mb([], False)
+    print(f"baseline (std_model only): {base} MB peak RSS")
+    print(f"{'host':<22} {'plain MB':>9} {'interned MB':>12} {'model saved':>12}")
+    for hosts in rows:
+        plain = _peak_mb(hosts, False)
+        interned = _peak_mb(hosts, True)
+        saved = 1 - (interned - base) / (plain - base) if plain > base else 0.0
+        print(f"{'+'.join(hosts):<22} {plain:>9} {interned:>12} {saved:>12.0%}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
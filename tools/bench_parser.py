@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""Measure parser throughput (AST nodes per second) on a VBA corpus.
+
+    python tools/bench_parser.py                        # stdVBA's src/
+    python tools/bench_parser.py path/to/project --runs 10
+    git show HEAD~1:src/parser.py > /tmp/old_parser.py
+    python tools/bench_parser.py --compare /tmp/old_parser.py
+
+Every `.bas` / `.cls` / `.frm` under the corpus is lexed and
+preprocessed the way `precheck` does it (default defines), once, outside
+the timed region; only `VBAParser.parse_module` is timed, `--runs` times,
+and the best run is reported. Throughput counts every `Node` reachable
+from the module. With `--compare`, another `parser.py` is loaded from
+that path and timed on the same token streams, and the trees and syntax
+errors of both are checked to be identical before the speed-up is
+printed.
+"""
+from __future__ import annotations
+
+import argparse
+import importlib.util
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from src import parser as current  # noqa: E402
+from src.lexer import Lexer, Token  # noqa: E402
+from src.preprocessor import Preprocessor  # noqa: E402
+
+_EXTS = {".bas", ".cls", ".frm"}
+_CORPUS = ROOT / "tests" / "awesome_vba" / "stdVBA-master" / "src"
+
+
+def _corpus(root: Path) -> list[tuple[str, object]]:
+    files = sorted(p for p in root.rglob("*") if p.suffix.lower() in _EXTS)
+    return [
+        (p.name, Preprocessor(Lexer(p.read_text(encoding="latin-1")).tokenize_buffer(), {}).process_buffer())
+        for p in files
+    ]
+
+
+def _load(path: str):
+    # `parser.py` imports `.lexer`, so load it as a sibling inside `src`.
+    spec = importlib.util.spec_from_file_location("src._bench_parser_compare", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _dump(value):
+    """A comparable, class-name-keyed rendering of a parse tree."""
+    if isinstance(value, Token):
+        return (value.type, value.value, value.line, value.column)
+    if isinstance(value, (list, tuple)):
+        return [_dump(v) for v in value]
+    if isinstance(value, dict):
+        return {k: _dump(v) for k, v in value.items()}
+    if hasattr(value, "__dict__"):
+        return (type(value).__name__, {k: _dump(v) for k, v in vars(value).items()})
+    return value
+
+
+def _count(value) -> int:
+    if isinstance(value, (list, tuple)):
+        return sum(_count(v) for v in value)
+    if isinstance(value, dict):
+        return sum(_count(v) for v in value.values())
+    if isinstance(value, Token) or not hasattr(value, "__dict__"):
+        return 0
+    return 1 + sum(_count(v) for v in vars(value).values())
+
+
+def _parse(module, name, tokens):
+    parser = module.VBAParser(tokens, filename=name)
+    return parser.parse_module(), parser.errors
+
+
+def _time(module, corpus) -> tuple[float, int]:
+    trees = []
+    start = time.perf_counter()
+    for name, tokens in corpus:
+        trees.append(_parse(module, name, tokens)[0])
+    seconds = time.perf_counter() - start
+    return seconds, sum(_count(tree) for tree in trees)
+
+
+def _best(modules, corpus, runs: int) -> list[tuple[float, int]]:
+    """Best time per module; runs are interleaved so that drift in the
+    machine's speed hits every module alike."""
+    best = [(float("inf"), 0)] * len(modules)
+    for _ in range(runs):
+        best = [min(b, _time(m, corpus)) for b, m in zip(best, modules)]
+    return best
+
+
+def main() -> int:
+    p = argparse.ArgumentParser(prog="bench_parser.py", description=__doc__.splitlines()[0])
+    p.add_argument("corpus", nargs="?", default=str(_CORPUS),
+                   help="Directory of VBA sources (default: tests/awesome_vba/stdVBA-master/src).")
+    p.add_argument("--runs", type=int, default=10, help="Timed passes over the corpus (default 10).")
+    p.add_argument("--compare", metavar="PARSER_PY", help="Another parser.py to time against.")
+    args = p.parse_args()
+
+    corpus = _corpus(Path(args.corpus))
+    print(f"corpus   {len(corpus)} files, {sum(len(t) for _, t in corpus)} tokens")
+
+    modules = [current]
+    if args.compare:
+        other = _load(args.compare)
+        for name, tokens in corpus:
+            if _dump(_parse(other, name, tokens)) != _dump(_parse(current, name, tokens)):
+                print(f"parse of {name} differs from the compared parser", file=sys.stderr)
+                return 1
+        modules.append(other)
+
+    timings = _best(modules, corpus, args.runs)
+    seconds, nodes = timings[0]
+    print(f"current  {nodes / seconds / 1e3:7.1f} k nodes/s  ({nodes} nodes, {seconds * 1000:.1f} ms)")
+    if args.compare:
+        other_seconds, _ = timings[1]
+        print(f"compare  {nodes / other_seconds / 1e3:7.1f} k nodes/s  ({other_seconds * 1000:.1f} ms)")
+        print(f"speed-up {other_seconds / seconds:.2f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
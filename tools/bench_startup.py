@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""Track the start-up cost of `import vbalidator` and of a CLI run on a
+10-line module — the pre-commit-hook case, where interpreter start,
+imports and model loading dwarf the analysis itself.
+
+    python tools/bench_startup.py
+    python tools/bench_startup.py --runs 20 --budget-ms 250
+
+Reports, best of `--runs` fresh interpreters:
+
+- `python -X importtime` cumulative time of `import vbalidator` and of
+  `from vbalidator import precheck`;
+- wall time of `python -m src.main Module1.bas --quiet` without a host,
+  with `--host auto` and with `--host excel` (compiled-model cache
+  warmed first).
+
+Bytecode is compiled up front, since with PYTHONDONTWRITEBYTECODE set a
+stale `__pycache__` would otherwise be re-compiled on every run. With
+`--budget-ms`, exits 1 when the `--host excel` median exceeds it.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+MODULE = (
+    'Attribute VB_Name = "Module1"\n'
+    "Option Explicit\n"
+    "\n"
+    "Public Sub Main()\n"
+    "    Dim total As Long, i As Long\n"
+    "    For i = 1 To 10\n"
+    "        total = total + i\n"
+    "    Next i\n"
+    "    Debug.Print \"Total: \" & CStr(total)\n"
+    "End Sub\n"
+)
+
+_IMPORTTIME = re.compile(r"import time:\s+\d+ \|\s+(\d+) \| (\S+)")
+
+
+def _import_us(statement: str) -> int:
+    """Cumulative importtime of the package modules `statement` imports
+    directly (nested stdlib imports are included in their totals)."""
+    out = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    )
+    total = 0
+    for line in out.stderr.splitlines():
+        m = _IMPORTTIME.match(line)
+        if m and m.group(2).split(".")[0] in ("vbalidator", "src"):
+            total += int(m.group(1))
+    return total
+
+
+def _wall_ms(argv) -> float:
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-m", "src.main", *argv], cwd=ROOT, capture_output=True, check=False)
+    return (time.perf_counter() - start) * 1000
+
+
+def main() -> int:
+    p = argparse.ArgumentParser(prog="bench_startup.py", description=__doc__.splitlines()[0])
+    p.add_argument("--runs", type=int, default=10, help="Fresh interpreters per measurement (default 10).")
+    p.add_argument("--budget-ms", type=float, help="Fail when the --host excel median wall time exceeds this.")
+    args = p.parse_args()
+
+    subprocess.run([sys.executable, "-m", "compileall", "-q", "src", "vbalidator"], cwd=ROOT, check=True)
+
+    for statement in ("import vbalidator", "from vbalidator import precheck"):
+        best = min(_import_us(statement) for _ in range(args.runs))
+        print(f"importtime {statement!r:36} {best / 1000:8.1f} ms")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        bas = Path(tmp) / "Module1.bas"
+        bas.write_text(MODULE, encoding="latin-1")
+        report = os.path.join(tmp, "report.json")
+        median = None
+        for label, extra in (("no host", []), ("--host auto", ["--host", "auto"]), ("--host excel", ["--host", "excel"])):
+            argv = [str(bas), "--quiet", "--output", report, *extra]
+            _wall_ms(argv)  # warm the compiled-model cache
+            times = [_wall_ms(argv) for _ in range(args.runs)]
+            median = statistics.median(times)
+            print(f"wall       {label:36} {min(times):8.1f} ms best  {median:8.1f} ms median")
+
+    if args.budget_ms is not None and median > args.budget_ms:
+        print(f"over budget: {median:.1f} ms > {args.budget_ms:.1f} ms", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
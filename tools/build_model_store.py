@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""Build `.vbm` model stores from JSON object models.
+
+A `.vbm` store (see `src/model_store.py`) is a memory-mapped, indexed
+copy of a JSON model: worker processes share its pages and decode only
+the records they look up. The JSON files stay the source of truth —
+re-run this script after editing or regenerating a model; a store
+whose source bytes no longer match is ignored at load time.
+
+    python tools/build_model_store.py                  # every bundled model
+    python tools/build_model_store.py my_model.json    # writes my_model.vbm
+    python tools/build_model_store.py a.json -o out/   # into another directory
+"""
+from __future__ import annotations
+
+import argparse
+import logging
+import sys
+from pathlib import Path
+
+# Make `src` importable when run from the repo root.
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from src.model_store import STORE_SUFFIX, write_store  # noqa: E402
+
+LOG = logging.getLogger("vbalidator.build_model_store")
+
+
+def _bundled_models() -> list[Path]:
+    return [ROOT / "src" / "std_model.json", *sorted((ROOT / "src" / "models").glob("*.json"))]
+
+
+def _build_argparser() -> argparse.ArgumentParser:
+    p = argparse.ArgumentParser(
+        prog="build_model_store.py",
+        description="Convert JSON object models into memory-mapped .vbm stores.",
+    )
+    p.add_argument(
+        "models",
+        nargs="*",
+        help="JSON models to convert (default: std_model.json and every src/models/*.json).",
+    )
+    p.add_argument(
+        "-o", "--output-dir",
+        default=None,
+        help="Directory to write the stores into (default: next to each JSON file).",
+    )
+    return p
+
+
+def main() -> int:
+    args = _build_argparser().parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    models = [Path(m) for m in args.models] or _bundled_models()
+    for model in models:
+        out = Path(args.output_dir) / f"{model.stem}{STORE_SUFFIX}" if args.output_dir else None
+        written = write_store(model, out)
+        LOG.info("%s -> %s (%d KB)", model, written, written.stat().st_size // 1024)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""Split the shared Office / VBA type-library definitions out of the
+bundled host models into `src/models/office_core.json`.
+
+`generate_model.py` emits one self-contained model per host, so the
+Office library (CommandBars, FileDialog, the `mso*` enums, …), VBA and
+stdole end up copied into excel.json, word.json and visio.json. This
+script moves every global, class and enum that is identical in all of
+them into one base layer and points each host at it with
+`"extends": ["office_core.json"]`; `Config.load_model()` loads the base
+before the host, so lookups resolve exactly as before.
+
+Run it after regenerating any of the hosts:
+
+    python tools/split_office_core.py
+    python tools/split_office_core.py --check   # exit 1 if out of date
+
+Hosts that already extend the core are folded back together first, so
+the split is recomputed from scratch every time. Access is left
+self-contained: its type library does not reference the Office library,
+so nearly nothing it declares is shared with the other hosts.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+MODELS = Path(__file__).resolve().parent.parent / "src" / "models"
+CORE = "office_core.json"
+HOSTS = ("excel", "word", "visio")
+SECTIONS = ("globals", "classes", "enums")
+_MISSING = object()
+
+
+def _dump(model: dict) -> str:
+    return json.dumps(model, indent=2)
+
+
+def _load(path: Path) -> dict:
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def _unsplit(host: dict, core: dict) -> dict:
+    """Return `host` with the core definitions it extends folded back in
+    (host entries win)."""
+    if CORE not in host.get("extends", ()):
+        return host
+    merged = {}
+    for section in SECTIONS:
+        if section in host or section in core:
+            merged[section] = {**core.get(section, {}), **host.get(section, {})}
+    refs = list(host.get("references", []))
+    names = {r["name"] for r in refs}
+    refs += [r for r in core.get("references", []) if r["name"] not in names]
+    if refs:
+        merged["references"] = refs
+    return merged
+
+
+def split(hosts: dict[str, dict]) -> tuple[dict, dict[str, dict]]:
+    """Return (core model, host models without the core definitions)."""
+    first, *rest = hosts.values()
+    core = {}
+    for section in SECTIONS:
+        # Keys that differ only by case are merged by compile_model() in
+        # file order; keep them in the hosts so that order is preserved.
+        lowered = {}
+        for model in hosts.values():
+            for key in model.get(section, {}):
+                lowered.setdefault(key.lower(), set()).add(key)
+        shared = {
+            key: value for key, value in first.get(section, {}).items()
+            if len(lowered[key.lower()]) == 1
+            and all(other.get(section, {}).get(key, _MISSING) == value for other in rest)
+        }
+        core[section] = shared
+    core_refs = [
+        ref for ref in first.get("references", [])
+        if all(ref in other.get("references", []) for other in rest)
+    ]
+    if core_refs:
+        core["references"] = core_refs
+
+    out = {}
+    for name, model in hosts.items():
+        slim = {"extends": [CORE]}
+        for section in SECTIONS:
+            if section in model:
+                slim[section] = {k: v for k, v in model[section].items() if k not in core[section]}
+        if "references" in model:
+            slim["references"] = model["references"]
+        out[name] = slim
+    return core, out
+
+
+def main() -> int:
+    p = argparse.ArgumentParser(prog="split_office_core.py", description=__doc__.splitlines()[0])
+    p.add_argument("--check", action="store_true", help="Only report whether the split is up to date.")
+    args = p.parse_args()
+
+    core_path = MODELS / CORE
+    old_core = _load(core_path) if core_path.is_file() else {}
+    hosts = {h: _unsplit(_load(MODELS / f"{h}.json"), old_core) for h in HOSTS}
+    core, slim = split(hosts)
+
+    outputs = {core_path: _dump(core)}
+    outputs.update({MODELS / f"{h}.json": _dump(model) for h, model in slim.items()})
+    stale = [path for path, text in outputs.items() if not path.is_file() or path.read_text(encoding="utf-8") != text]
+    if args.check:
+        for path in stale:
+            print(f"out of date: {path.name}", file=sys.stderr)
+        return 1 if stale else 0
+    for path in stale:
+        path.write_text(outputs[path], encoding="utf-8")
+    counts = ", ".join(f"{len(core[s])} {s}" for s in SECTIONS)
+    print(f"{CORE}: {counts}; rewrote {', '.join(p.name for p in stale) or 'nothing'}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
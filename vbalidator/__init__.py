@@ -18,54 +18,60 @@ delete this shim. Until then:
 is equivalent to `from src import precheck`.
 
 `vbalidator.<submodule>` works too (api, scoring, reporting, rules,
-roundtrip) via the sys.modules aliases below — important for tooling
-that imports inner modules, e.g.
-`from vbalidator.rules import all_rules`.
+roundtrip, …) — important for tooling that imports inner modules,
+e.g. `from vbalidator.rules import all_rules`.
+
+Everything is resolved lazily: `import vbalidator` only loads what a
+caller actually touches, so a CLI or pre-commit run never pays for
+`roundtrip` / `rules` unless it uses them.
 """
 from __future__ import annotations
 
+import importlib
 import sys
+from importlib.machinery import ModuleSpec
+
+from src import __version__
+
+_SUBMODULES = frozenset({
+    "api", "analyzer", "config", "lexer", "parser", "preprocessor",
+    "reporting", "roundtrip", "rules", "scoring",
+})
+_EXPORTS = frozenset({"precheck", "precheck_matrix", "precheck_source", "PrecheckResult"})
+
+
+class _SubmoduleAlias:
+    """Meta-path finder + loader resolving `vbalidator.<sub>` to the very
+    module object `src.<sub>` is, on first import. A real
+    `vbalidator/<sub>.py` (once the package is renamed) is found by the
+    regular path finder first and wins. (Duck-typed: `importlib.abc`
+    alone costs more to import than the rest of this package.)"""
+
+    def find_spec(self, fullname, path=None, target=None):
+        package, _, name = fullname.rpartition(".")
+        if package == __name__ and name in _SUBMODULES:
+            return ModuleSpec(fullname, self)
+        return None
+
+    def create_module(self, spec):
+        return importlib.import_module(f"src.{spec.name.rpartition('.')[2]}")
+
+    def exec_module(self, module):
+        pass  # already executed as `src.<sub>`
+
+
+if not any(isinstance(finder, _SubmoduleAlias) for finder in sys.meta_path):
+    sys.meta_path.append(_SubmoduleAlias())
+
+
+def __getattr__(name):
+    if name in _EXPORTS:
+        import src
+
+        return getattr(src, name)
+    if name in _SUBMODULES:
+        return importlib.import_module(f"{__name__}.{name}")
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
-# Pull every submodule we want to alias eagerly so importers like
-# `from vbalidator.api import precheck` resolve without surprises.
-from src import (  # noqa: F401  (re-exported public surface)
-    PrecheckResult,
-    __version__,
-    precheck,
-    precheck_source,
-)
-from src import (
-    api as _api,
-    analyzer as _analyzer,
-    config as _config,
-    lexer as _lexer,
-    parser as _parser,
-    preprocessor as _preprocessor,
-    reporting as _reporting,
-    roundtrip as _roundtrip,
-    rules as _rules,
-    scoring as _scoring,
-)
-
-# Make `from vbalidator.<sub> import …` resolve to the same object
-# `from src.<sub> import …` would. `setdefault` so a real
-# `vbalidator/<sub>.py` (if added in the future migration) wins.
-for _name, _mod in {
-    "api": _api,
-    "analyzer": _analyzer,
-    "config": _config,
-    "lexer": _lexer,
-    "parser": _parser,
-    "preprocessor": _preprocessor,
-    "reporting": _reporting,
-    "roundtrip": _roundtrip,
-    "rules": _rules,
-    "scoring": _scoring,
-}.items():
-    sys.modules.setdefault(f"vbalidator.{_name}", _mod)
-
-del _api, _analyzer, _config, _lexer, _parser, _preprocessor
-del _reporting, _roundtrip, _rules, _scoring
-del _name, _mod, sys
-
-__all__ = ["precheck", "precheck_source", "PrecheckResult", "__version__"]
+__all__ = ["precheck", "precheck_matrix", "precheck_source", "PrecheckResult", "__version__"]